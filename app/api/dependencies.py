@@ -1,16 +1,111 @@
 """
 API dependencies for FastAPI
 """
-from app.services.wallet_assistant import WalletSessionManager
+import asyncio
+import importlib
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.services.wallet_assistant import WalletSessionManager
+
+logger = logging.getLogger(__name__)
 
 # Singleton instance of session manager
-_session_manager = None
+_session_manager: Optional["WalletSessionManager"] = None
+
+# Start-up warm-up task and what it reported
+_warmup: Optional[asyncio.Task] = None
+# Set once the first warm-up attempt has finished, successfully or not
+_first_attempt: Optional[asyncio.Event] = None
+_readiness: Dict[str, Any] = {"ready": False, "warmup_seconds": None, "error": None}
+
+
+def _create_session_manager() -> "WalletSessionManager":
+    # Imported on first use so loading the API does not pull in the service stack
+    from app.services.wallet_assistant import WalletSessionManager
+    return WalletSessionManager()
+
 
-def get_session_manager() -> WalletSessionManager:
+async def get_session_manager() -> "WalletSessionManager":
     """
-    Dependency that provides the session manager
+    Dependency that provides the session manager, waiting for the first warm-up attempt if it is still running
     """
     global _session_manager
+    if _first_attempt is not None and not _first_attempt.is_set():
+        await _first_attempt.wait()
     if _session_manager is None:
-        _session_manager = WalletSessionManager()
-    return _session_manager
\ No newline at end of file
+        _session_manager = _create_session_manager()
+    return _session_manager
+
+
+async def _warm_up_once():
+    global _session_manager
+    # Module imports are the slow part; run them off the event loop so probes stay responsive
+    await asyncio.to_thread(importlib.import_module, "app.services.wallet_assistant")
+
+    if _session_manager is None:
+        _session_manager = _create_session_manager()
+    _session_manager.start()
+    try:
+        await asyncio.wait_for(_session_manager.warm_up(), timeout=settings.WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Warm-up did not finish within {settings.WARMUP_TIMEOUT}s; serving with cold caches")
+
+
+async def _warm_up():
+    start = time.perf_counter()
+    while True:
+        try:
+            await _warm_up_once()
+            _readiness.update(ready=True, error=None)
+            logger.info(f"Session manager ready in {time.perf_counter() - start:.2f}s")
+            return
+        except Exception as e:
+            # e.g. every node down or replying garbage; /ready stays 503 until an attempt succeeds
+            _readiness["error"] = str(e)
+            logger.error(f"Session manager warm-up failed: {e}; retrying in {settings.WARMUP_RETRY_INTERVAL}s")
+        finally:
+            _readiness["warmup_seconds"] = round(time.perf_counter() - start, 3)
+            _first_attempt.set()
+        await asyncio.sleep(settings.WARMUP_RETRY_INTERVAL)
+
+
+def start_session_manager() -> asyncio.Task:
+    """
+    Start building and warming up the session manager in the background
+    """
+    global _warmup, _first_attempt
+    if _warmup is None or _warmup.done():
+        _first_attempt = asyncio.Event()
+        _warmup = asyncio.get_running_loop().create_task(_warm_up())
+    return _warmup
+
+
+def readiness() -> Dict[str, Any]:
+    """
+    Whether start-up warm-up has finished, for readiness probes
+    """
+    return dict(_readiness)
+
+
+async def shutdown_session_manager():
+    """
+    Close the session manager if it was created
+    """
+    global _session_manager, _warmup, _first_attempt
+    if _warmup is not None:
+        if not _warmup.done():
+            _warmup.cancel()
+        try:
+            await _warmup
+        except asyncio.CancelledError:
+            pass
+        _warmup = _first_attempt = None
+    if _session_manager is not None:
+        await _session_manager.close()
+        _session_manager = None
+    _readiness.update(ready=False, warmup_seconds=None, error=None)
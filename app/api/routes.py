@@ -2,29 +2,40 @@
 API routes for the AI Wallet Assistant
 """
 import logging
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
-from app.services.wallet_assistant import WalletSessionManager
 from app.models.schemas import (
     ConnectWalletRequest, CommandRequest, 
-    SessionResponse, ErrorResponse
+    SessionResponse, ErrorResponse, TrackTransactionRequest, IntentRequest,
+    BatchSendRequest, TransactionIntent, WalletCommand
 )
 from app.api.dependencies import get_session_manager
+from app.core.config import settings
+from app.core.security import SecurityValidator
+from app.utils.helpers import format_sse, parse_payout_csv
+from app.utils.serialization import FastJSONResponse, dumps
+
+if TYPE_CHECKING:
+    from app.services.wallet_assistant import WalletSessionManager
 
 # Set up router
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 logger = logging.getLogger(__name__)
 
 @router.post("/connect", response_model=SessionResponse)
 async def connect_wallet(
     request: ConnectWalletRequest,
-    session_manager: WalletSessionManager = Depends(get_session_manager)
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
 ):
     """
     Connect a wallet and create a new session
     """
     try:
-        session_id = session_manager.create_session(
+        session_id = await session_manager.create_session(
             address=request.address,
             network=request.network
         )
@@ -42,23 +53,21 @@ async def connect_wallet(
 @router.post("/command")
 async def process_command(
     request: CommandRequest,
-    background_tasks: BackgroundTasks,
-    session_manager: WalletSessionManager = Depends(get_session_manager)
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
 ):
     """
     Process a wallet command
     """
     try:
-        # Schedule session cleanup in background
-        background_tasks.add_task(session_manager.cleanup_inactive_sessions)
-        
         # Process the command
         result = await session_manager.handle_user_request(
             user_input=request.command,
-            session_id=request.session_id
+            session_id=request.session_id,
+            cursor=request.cursor
         )
         
-        return result
+        # Rendered directly, skipping FastAPI's jsonable_encoder pass
+        return FastJSONResponse(result)
     except ValueError as e:
         return ErrorResponse(
             error=str(e),
@@ -69,10 +78,100 @@ async def process_command(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post("/intent")
+async def process_intent(
+    request: IntentRequest,
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
+):
+    """
+    Run a structured command without natural-language parsing
+    """
+    try:
+        result = await session_manager.handle_intent(
+            intent=request.to_intent(),
+            session_id=request.session_id
+        )
+        return FastJSONResponse(result)
+    except ValueError as e:
+        return ErrorResponse(
+            error=str(e),
+            suggestion="Make sure your session is active and your intent is valid"
+        )
+    except Exception as e:
+        logger.error(f"Intent processing error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/send/batch")
+async def batch_send(
+    request: BatchSendRequest,
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
+):
+    """
+    Build the payloads of a payout to many recipients, given as CSV rows of address,amount
+    """
+    try:
+        recipients, amounts = parse_payout_csv(request.csv, request.amount)
+        result = await session_manager.handle_intent(
+            intent=TransactionIntent(
+                action=WalletCommand.SEND,
+                asset=request.asset,
+                recipients=recipients,
+                amounts=amounts,
+                network=request.network
+            ),
+            session_id=request.session_id
+        )
+        return FastJSONResponse(result)
+    except ValueError as e:
+        return ErrorResponse(
+            error=str(e),
+            suggestion="Send one 'address,amount' row per recipient"
+        )
+    except Exception as e:
+        logger.error(f"Batch send error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/command/stream")
+async def stream_command(
+    request: CommandRequest,
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
+):
+    """
+    Process a wallet command, streaming server-sent events as the intent is parsed
+    """
+    if not session_manager.get_session(request.session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    async def events():
+        try:
+            async for event, data in session_manager.stream_user_request(
+                user_input=request.command,
+                session_id=request.session_id,
+                cursor=request.cursor
+            ):
+                yield format_sse(event, data)
+        except ValueError as e:
+            yield format_sse("error", ErrorResponse(
+                error=str(e),
+                suggestion="Make sure your session is active and your command is valid"
+            ).model_dump())
+        except Exception as e:
+            logger.error(f"Command streaming error: {e}")
+            yield format_sse("error", {"error": "Internal server error"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/session/{session_id}")
 async def get_session_info(
     session_id: str,
-    session_manager: WalletSessionManager = Depends(get_session_manager)
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
 ):
     """
     Get information about an active session
@@ -82,9 +181,106 @@ async def get_session_info(
     if not wallet_state:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return {
+    return FastJSONResponse({
         "address": wallet_state.address,
         "network": wallet_state.network,
         "balances": wallet_state.balance,
         "pending_transactions": len(wallet_state.pending_transactions)
-    }
\ No newline at end of file
+    })
+
+
+@router.get("/history/{session_id}")
+async def get_history(
+    session_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+    limit: int = Query(default=settings.HISTORY_LIMIT, ge=1, le=settings.HISTORY_PAGE_MAX),
+    cursor: Optional[str] = None,
+    format: str = Query(default="json", pattern="^(json|ndjson)$"),
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
+):
+    """
+    Query the stored transaction history of a session's wallet
+
+    Returns one page and a ``next_cursor`` to pass back for the next one.
+    With ``format=ndjson`` every matching transaction is streamed instead,
+    one JSON object per line, and ``limit`` is ignored.
+    """
+    wallet_state = session_manager.get_session(session_id)
+
+    if not wallet_state:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    try:
+        if format == "ndjson":
+            records = session_manager.assistant.iter_history(
+                wallet_state,
+                since=since,
+                until=until,
+                status=status,
+                cursor=cursor
+            )
+            # A sync generator runs in the threadpool; memory is bounded by one store page
+            return StreamingResponse(
+                (dumps(record) + b"\n" for record in records),
+                media_type="application/x-ndjson"
+            )
+
+        transactions, next_cursor = session_manager.assistant.query_history(
+            wallet_state,
+            since=since,
+            until=until,
+            status=status,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return FastJSONResponse({
+        "address": wallet_state.address,
+        "transactions": transactions,
+        "next_cursor": next_cursor
+    })
+
+
+
+@router.post("/transactions")
+async def track_transaction(
+    request: TrackTransactionRequest,
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
+):
+    """
+    Register a signed and submitted transaction; it moves to history once mined
+    """
+    try:
+        pending = await session_manager.track_transaction(request.session_id, request.tx_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"transaction": pending, "tracked": len(session_manager.receipts)})
+
+
+@router.get("/exposure")
+async def get_exposure(
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
+):
+    """
+    USD exposure per asset and network across all active sessions, from cached prices
+    """
+    return FastJSONResponse(session_manager.exposure())
+
+
+@router.get("/stats")
+async def get_stats(
+    session_manager: "WalletSessionManager" = Depends(get_session_manager)
+):
+    """
+    Command parser counters, including the fast-path hit ratio, and RPC endpoint health
+    """
+    return {
+        "parser": session_manager.assistant.parser.stats(),
+        "address_cache": SecurityValidator.cache_stats(),
+        "sessions": session_manager.sessions.stats(),
+        "providers": session_manager.assistant.providers.stats()
+    }
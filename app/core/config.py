@@ -1,7 +1,7 @@
 """
 Application configuration settings
 """
-from typing import List
+from typing import Dict, List, Optional
 from pathlib import Path
 import os
 
@@ -23,20 +23,134 @@ class Settings(BaseSettings):
     # API Keys
     GROQ_API_KEY: str = Field(default="", env="GROQ_API_KEY")
     ETHEREUM_NODE_URL: str = Field(default="", env="ETHEREUM_NODE_URL")
+    ETHEREUM_RPC_URL: str = ""  # full node URL (e.g. a local anvil node); overrides ETHEREUM_NODE_URL
+    RPC_ENDPOINTS: Dict[str, List[str]] = {}  # network -> JSON-RPC URLs, e.g. {"sepolia": ["https://..."]}
     
     # Session Management
     INACTIVITY_TIMEOUT: int = 300  # 5 minutes
+    SESSION_SWEEP_INTERVAL: float = 5.0  # seconds between expiry sweeps
+    SESSION_BACKEND: str = "tiered"  # "tiered" or "memory" (in process), or "sqlite" (on disk, shared across restarts)
+    SESSION_MEMORY_BUDGET_MB: float = 64.0  # hot tier size before sessions spill to disk ("tiered")
+    SESSION_HIBERNATE_TTL: int = 30 * 24 * 60 * 60  # seconds an idle session is kept on disk ("tiered")
+    SESSION_DB_BUSY_TIMEOUT: float = 0.05  # seconds a SQLite session call may block the event loop on another connection
+    WARMUP_TIMEOUT: float = 10.0  # seconds start-up may spend priming upstream caches
+    WARMUP_RETRY_INTERVAL: float = 5.0  # seconds between start-up attempts after one fails
     MAX_TOKENS: int = 1024
     
+    # Command Parsing
+    GROQ_MODEL: str = "Llama3-8b-8192"
+    GROQ_API_BASE: str = "https://api.groq.com/openai/v1"
+    LLM_MAX_CONCURRENCY: int = 32  # outstanding LLM requests per process
+    LLM_POOL_SIZE: int = 64  # keep-alive connections
+    LLM_TIMEOUT: float = 15.0  # seconds per attempt
+    LLM_MAX_RETRIES: int = 2
+    LLM_BACKOFF_BASE: float = 0.25
+    LLM_BACKOFF_MAX: float = 4.0
+    FAST_PATH_ENABLED: bool = True  # parse common phrasings locally before calling the LLM
+    KNOWN_ASSETS: List[str] = ["ETH", "WETH", "USDC", "USDT", "DAI", "WBTC", "MATIC", "LINK", "UNI"]
+    INTENT_CACHE_ENABLED: bool = True
+    INTENT_CACHE_MAX_ENTRIES: int = 2048
+    INTENT_CACHE_TTL: int = 24 * 60 * 60
+    INTENT_CACHE_FLUSH_INTERVAL: int = 30
+    CONVERSATION_MAX_TURNS: int = 10  # recent commands remembered per session
+    CONVERSATION_TOKEN_BUDGET: int = 512  # prompt tokens spent on earlier turns
+    CONVERSATION_MAX_SESSIONS: int = 10000  # sessions with conversation memory per process
+    
+    # Gas Oracle
+    GAS_ORACLE_REFRESH_INTERVAL: float = 12.0  # seconds, roughly one block
+    GAS_ORACLE_MAX_AGE: float = 60.0  # serve the fallback quote beyond this age
+    GAS_FALLBACK_PRICE_GWEI: float = 30.0
+    GAS_FALLBACK_PRIORITY_FEE_GWEI: float = 1.5
+    GAS_ESTIMATE_TTL: float = 600.0  # seconds before a memoized transfer gas estimate is refreshed
+    GAS_LIMIT_MARGIN: float = 1.2  # headroom over eth_estimateGas results
+    RECIPIENT_TYPE_CACHE_SIZE: int = 16384  # recipients whose contract/EOA type is remembered
+    CONTRACT_RECIPIENT_GAS_HEADROOM: int = 40000  # extra gas for sends to contracts, and to recipients not yet known
+    
+    # Provider pool
+    RPC_TIMEOUT: float = 10.0
+    RPC_POOL_SIZE: int = 32  # keep-alive connections per endpoint
+    RPC_LATENCY_WINDOW: int = 100  # recent requests per endpoint used for its p95
+    RPC_HEDGE_DELAY_MS: float = 250.0  # hedge delay before an endpoint has latency samples
+    RPC_HEDGE_MIN_DELAY_MS: float = 50.0  # floor under the p95-based hedge delay
+    RPC_CIRCUIT_FAILURES: int = 3  # consecutive failures that open an endpoint's circuit
+    RPC_CIRCUIT_COOLDOWN: float = 30.0  # seconds before an open circuit lets a trial request through
+    RPC_HEALTH_CHECK_INTERVAL: float = 15.0
+    RPC_MAX_BLOCK_LAG: int = 5  # endpoints further behind the head are used last
+    
+    # Balances
+    BALANCE_CACHE_TTL: float = 15.0  # seconds per (network, address)
+    BALANCE_BATCH_WINDOW_MS: float = 5.0  # collect concurrent lookups into one batch
+    BALANCE_BATCH_MAX: int = 200  # addresses per batch
+    BALANCE_CACHE_MAX_ENTRIES: int = 10000  # addresses cached, least recently used evicted first
+    MOCK_BALANCES: Dict[str, float] = {"ETH": 5.0, "USDC": 1000.0}  # used when no node is configured
+    
+    # Receipt tracking
+    RECEIPT_BLOCK_TIME: float = 12.0  # initial block time estimate, refined from observed blocks
+    RECEIPT_POLL_MIN_INTERVAL: float = 1.0
+    RECEIPT_POLL_MAX_INTERVAL: float = 60.0
+    RECEIPT_BATCH_MAX: int = 200  # receipts per JSON-RPC batch
+    
+    # Batch sends
+    BATCH_SEND_MAX: int = 1000  # recipients per batch send
+    NONCE_CACHE_TTL: float = 30.0  # seconds before a wallet's next nonce is re-read from the node, or dropped if idle
+    
+    # Tokens
+    TOKEN_REGISTRY_FILE: Path = Path(__file__).resolve().parent.parent / "data" / "tokens.json"
+    
+    # Prices
+    PRICE_SOURCE: str = "coingecko"  # "coingecko" or "http" (live), "file" (tests and benchmarks), or "none"
+    PRICE_SOURCE_URL: Optional[str] = None  # for "http": an endpoint answering {symbol: usd_price}; overrides the CoinGecko URL
+    PRICE_COINGECKO_IDS: Dict[str, str] = {
+        "ETH": "ethereum", "WETH": "weth", "WBTC": "wrapped-bitcoin", "USDC": "usd-coin", "USDT": "tether",
+        "DAI": "dai", "MATIC": "matic-network", "LINK": "chainlink", "UNI": "uniswap"
+    }  # asset symbol -> CoinGecko coin id
+    PRICE_FILE: Optional[Path] = None  # for "file": a {symbol: usd_price} JSON file
+    PRICE_REFRESH_INTERVAL: float = 60.0
+    PRICE_MAX_AGE: float = 600.0  # prices older than this are reported as stale
+    PRICED_NETWORKS: List[str] = ["mainnet"]  # networks whose assets trade at the source's prices; others stay unpriced
+    EXPOSURE_REBUILD_INTERVAL: float = 300.0  # seconds between full recomputes of the holdings index
+    
+    # Address validation
+    ADDRESS_CACHE_SIZE: int = 16384  # checksummed addresses kept in the LRU cache
+    
     # Storage
     DATA_DIR: Path = Path("wallet_data")
-    TRANSACTIONS_FILE: Path = DATA_DIR / "transactions.json"
+    TRANSACTIONS_FILE: Path = DATA_DIR / "transactions.json"  # legacy, migrated on first open
+    TRANSACTIONS_SEGMENT_MAX_BYTES: int = 8 * 1024 * 1024
+    TRANSACTIONS_COMPACT_AFTER_SEGMENTS: int = 4
+    TRANSACTIONS_FSYNC: bool = False  # fsync every direct save
+    TRANSACTIONS_QUEUE_MAX: int = 10000  # queued saves before callers wait
+    TRANSACTIONS_COMMIT_BATCH_MAX: int = 512  # saves per group commit
+    TRANSACTIONS_COMMIT_FSYNC: bool = True  # fsync each group commit
+    HISTORY_LIMIT: int = 50  # default page size
+    HISTORY_PAGE_MAX: int = 1000
+    HISTORY_STREAM_PAGE_SIZE: int = 500  # records read per store lookup when streaming NDJSON
+    INTENT_CACHE_FILE: Path = DATA_DIR / "intent_cache.json"
+    SESSION_DB_FILE: Path = DATA_DIR / "sessions.db"
+    SESSION_COLD_DB_FILE: Path = DATA_DIR / "sessions_cold.db"
     
     # New settings from your .env file
     MAINNET_CHAIN_ID: str = Field(default="1", env="MAINNET_CHAIN_ID")
     SESSION_ENCRYPTION_KEY: str = Field(default="", env="SESSION_ENCRYPTION_KEY")
     SENTRY_DSN: str = Field(default="", env="SENTRY_DSN")
 
+    @property
+    def ethereum_rpc_url(self) -> str:
+        """Full JSON-RPC URL of the Ethereum node, or empty if none is configured"""
+        if self.ETHEREUM_RPC_URL:
+            return self.ETHEREUM_RPC_URL
+        if self.ETHEREUM_NODE_URL:
+            return f"https://mainnet.infura.io/v3/{self.ETHEREUM_NODE_URL}"
+        return ""
+
+    @property
+    def rpc_endpoints(self) -> Dict[str, List[str]]:
+        """JSON-RPC URLs per network; the single-node settings fill in mainnet"""
+        endpoints = {network: list(urls) for network, urls in self.RPC_ENDPOINTS.items()}
+        if self.ethereum_rpc_url and not endpoints.get("mainnet"):
+            endpoints["mainnet"] = [self.ethereum_rpc_url]
+        return endpoints
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -44,7 +158,4 @@ class Settings(BaseSettings):
 
 
 # Create global settings object
-settings = Settings()
-
-# Ensure data directory exists
-settings.DATA_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+settings = Settings()
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition
+
+Counters, gauges and fixed-bucket histograms keyed by label values. An
+observation is a dict lookup plus a bisect, cheap enough to leave on in
+production. The metrics used by the app are defined at the bottom of this
+module and rendered by the ``/metrics`` route.
+"""
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in list(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Point-in-time value, either set directly or read from a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str):
+        self._values[self._key(labels)] = value
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {float(self._function())}"]
+            except Exception:
+                return []
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in list(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set"""
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[Dict[str, str]]:
+        """Time a block; labels may be updated inside it, and outcome becomes "error" on exceptions"""
+        labels.setdefault("outcome", "ok")
+        start = time.perf_counter()
+        try:
+            yield labels
+        except BaseException:
+            labels["outcome"] = "error"
+            raise
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, counts in list(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {self._sums[key]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Request pipeline
+COMMAND_LATENCY = registry.histogram(
+    "wallet_command_seconds", "End-to-end command processing time", ["action", "outcome"]
+)
+STAGE_LATENCY = registry.histogram(
+    "wallet_stage_seconds",
+    "Time spent in each stage of command processing",
+    ["stage", "action", "outcome"]
+)
+
+# Parsing
+PARSE_REQUESTS = registry.counter(
+    "wallet_parse_requests_total", "Commands parsed, by the path that answered them", ["path"]
+)
+LLM_TOKENS = registry.counter(
+    "wallet_llm_tokens_total", "Tokens consumed by LLM calls", ["kind"]
+)
+
+# Caches
+CACHE_LOOKUPS = registry.counter(
+    "wallet_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]
+)
+
+# Sessions and storage
+ACTIVE_SESSIONS = registry.gauge(
+    "wallet_active_sessions", "Sessions used within the inactivity timeout, hibernated ones excluded"
+)
+TRACKED_TRANSACTIONS = registry.gauge(
+    "wallet_tracked_transactions", "Submitted transactions waiting for a receipt"
+)
+STORE_WRITE_LATENCY = registry.histogram(
+    "wallet_store_write_seconds", "Transaction store write latency", ["outcome"]
+)
+STORE_COMMIT_BATCH = registry.histogram(
+    "wallet_store_commit_batch_size", "Transactions per group commit",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+STORE_QUEUE_DEPTH = registry.gauge(
+    "wallet_store_queue_depth", "Transactions queued for a group commit"
+)
+
+# Upstream RPC
+RPC_REQUESTS = registry.counter(
+    "wallet_rpc_requests_total", "JSON-RPC requests by network, endpoint host and outcome",
+    ["network", "endpoint", "outcome"]
+)
+RPC_HEDGES = registry.counter(
+    "wallet_rpc_hedged_total", "Read requests also sent to a second endpoint because the first was slow", ["network"]
+)
@@ -2,22 +2,61 @@
 Security and validation functions
 """
 import logging
-from web3 import Web3
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+from eth_utils import is_address, to_checksum_address
+
+from app.core.config import settings
 from app.models.schemas import WalletState
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=settings.ADDRESS_CACHE_SIZE)
+def _checksum(address: str) -> Optional[str]:
+    """Checksummed form of a valid address, or None; memoized because both steps hash with keccak"""
+    try:
+        if not is_address(address):
+            return None
+        return to_checksum_address(address)
+    except Exception as e:
+        logger.error(f"Address validation error: {e}")
+        return None
+
+
 class SecurityValidator:
     @staticmethod
     def validate_eth_address(address: str) -> bool:
         """Validate Ethereum address format"""
-        try:
-            return Web3.is_address(address)
-        except Exception as e:
-            logger.error(f"Address validation error: {e}")
-            return False
+        return SecurityValidator.checksum_address(address) is not None
+
+    @staticmethod
+    def checksum_address(address: str) -> Optional[str]:
+        """Return the EIP-55 checksummed address, or None if it is invalid"""
+        if not isinstance(address, str):
+            return None
+        return _checksum(address.strip())
+
+    @staticmethod
+    def checksum_addresses(addresses: Iterable[str]) -> List[Optional[str]]:
+        """Checksum many addresses at once, in input order; invalid ones map to None"""
+        results: Dict[Any, Optional[str]] = {}
+        checksummed = []
+        for address in addresses:
+            # Repeated addresses in one batch are resolved once
+            if address not in results:
+                results[address] = SecurityValidator.checksum_address(address)
+            checksummed.append(results[address])
+        return checksummed
+
+    @staticmethod
+    def cache_stats() -> Dict[str, int]:
+        """Hit and size counters of the address cache"""
+        info = _checksum.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
 
     @staticmethod
     def validate_balance(wallet_state: WalletState, asset: str, amount: float) -> bool:
         """Check if wallet has sufficient balance for transaction"""
-        return wallet_state.balance.get(asset, 0) >= amount
\ No newline at end of file
+        return wallet_state.balance.get(asset, 0) >= amount
@@ -31,7 +31,11 @@ class TransactionIntent(BaseModel):
     asset: Optional[str] = None
     amount: Optional[float] = None
     recipient: Optional[str] = None
-    network: str = "mainnet"
+    recipients: Optional[List[str]] = None  # batch send, ``amount`` to each unless ``amounts`` is given
+    amounts: Optional[List[float]] = None  # per-recipient amounts of a batch send
+    target_asset: Optional[str] = None  # asset received in a swap
+    network: Optional[str] = None  # None for the session's network
+    cursor: Optional[str] = None  # history page to continue from
     
     @classmethod
     def parse_from_json(cls, json_str: str) -> "TransactionIntent":
@@ -51,6 +55,8 @@ class TransactionConfirmation(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
     gas_used: float
     gas_price: float
+    address: Optional[str] = None  # wallet that sent the transaction
+    network: Optional[str] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert model to dict with datetime handling"""
@@ -84,6 +90,30 @@ class ConnectWalletRequest(BaseModel):
 class CommandRequest(BaseModel):
     session_id: str
     command: str
+    cursor: Optional[str] = None  # next_cursor of a previous history response
+
+
+class IntentRequest(TransactionIntent):
+    """A structured command: the intent fields plus the session to run it in"""
+    session_id: str
+    network: Optional[str] = None  # defaults to the session's network
+
+    def to_intent(self) -> TransactionIntent:
+        return TransactionIntent(**self.model_dump(exclude={"session_id"}))
+
+
+class BatchSendRequest(BaseModel):
+    """A batch send as CSV rows of ``address,amount``; rows without an amount get ``amount``"""
+    session_id: str
+    asset: str
+    csv: str
+    amount: Optional[float] = None
+    network: Optional[str] = None  # defaults to the session's network
+
+
+class TrackTransactionRequest(BaseModel):
+    session_id: str
+    tx_hash: str
 
 
 class SessionResponse(BaseModel):
@@ -2,13 +2,16 @@
 AI parsing service for natural language commands
 """
 import logging
-import asyncio
-from typing import Dict, Any
-
-from groq import Groq
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 
 from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS, LLM_TOKENS, PARSE_REQUESTS, STAGE_LATENCY
 from app.models.schemas import TransactionIntent
+from app.services.command_grammar import parse_fast_path
+from app.services.intent_cache import IntentTemplateCache, cache_fingerprint
+from app.services.intent_stream import IncrementalIntentParser
+from app.services.llm_client import AsyncLLMClient
 
 logger = logging.getLogger(__name__)
 
@@ -16,38 +19,194 @@ class AIParser:
     """Handles parsing user input into structured transaction intents"""
     
     def __init__(self, api_key: str):
-        self.groq = Groq(api_key=api_key)
+        self.llm = AsyncLLMClient(
+            api_key=api_key,
+            base_url=settings.GROQ_API_BASE,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            timeout=settings.LLM_TIMEOUT,
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_base=settings.LLM_BACKOFF_BASE,
+            backoff_max=settings.LLM_BACKOFF_MAX,
+            pool_size=settings.LLM_POOL_SIZE
+        )
         self.system_prompt = """You are an AI Wallet Assistant. Parse user commands into structured JSON.
         Respond ONLY in JSON format: {
             "action": "send|swap|balance|history",
             "asset": "asset symbol",
             "amount": number,
             "recipient": "address",
-            "network": "network"
+            "recipients": ["address", ...] (only when sending the same amount to several addresses),
+            "target_asset": "asset symbol received (swap only)",
+            "network": "network name, or null unless the user names one"
         }"""
-        
-    async def parse_command(self, user_input: str) -> TransactionIntent:
-        """Parse natural language input into structured transaction intent"""
+        self.model = settings.GROQ_MODEL
+        self.fast_path_enabled = settings.FAST_PATH_ENABLED
+        self.fast_path_hits = 0
+        self.llm_calls = 0
+
+        # Learned intent templates; stale automatically when the prompt or model changes
+        self.intent_cache: Optional[IntentTemplateCache] = None
+        if settings.INTENT_CACHE_ENABLED:
+            self.intent_cache = IntentTemplateCache(
+                fingerprint=cache_fingerprint(self.system_prompt, self.model),
+                known_assets=settings.KNOWN_ASSETS,
+                max_entries=settings.INTENT_CACHE_MAX_ENTRIES,
+                ttl=settings.INTENT_CACHE_TTL,
+                path=settings.INTENT_CACHE_FILE,
+                flush_interval=settings.INTENT_CACHE_FLUSH_INTERVAL
+            )
+
+    @property
+    def fast_path_hit_ratio(self) -> float:
+        """Share of parsed commands answered by the local grammar"""
+        total = self.fast_path_hits + self.llm_calls
+        return self.fast_path_hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Parser counters for monitoring"""
+        return {
+            "fast_path_enabled": self.fast_path_enabled,
+            "fast_path_hits": self.fast_path_hits,
+            "llm_calls": self.llm_calls,
+            "fast_path_hit_ratio": self.fast_path_hit_ratio,
+            "intent_cache": self.intent_cache.stats() if self.intent_cache is not None else None
+        }
+
+    async def close(self):
+        """Persist learned intent templates and close the LLM connection pool"""
+        if self.intent_cache is not None:
+            self.intent_cache.save()
+        await self.llm.close()
+
+    def _parse_locally(
+        self,
+        user_input: str,
+        context: Optional[List[Dict[str, str]]] = None
+    ) -> Optional[TransactionIntent]:
+        """Answer from the grammar fast path or the learned templates, without the LLM"""
+        if self.fast_path_enabled:
+            intent = parse_fast_path(user_input)
+            if intent is not None:
+                self.fast_path_hits += 1
+                PARSE_REQUESTS.inc(path="fast_path")
+                return intent
+
+        # A template knows nothing of earlier turns, which e.g. "send the same to 0x..." depends on
+        if self.intent_cache is not None and not context:
+            intent = self.intent_cache.lookup(user_input)
+            CACHE_LOOKUPS.inc(cache="intent_template", result="hit" if intent is not None else "miss")
+            if intent is not None:
+                PARSE_REQUESTS.inc(path="intent_cache")
+            return intent
+        return None
+
+    @staticmethod
+    def _count_tokens(usage: Optional[Dict[str, Any]]):
+        """Record the token usage reported by the API"""
+        if not usage:
+            return
+        for kind in ("prompt", "completion"):
+            tokens = usage.get(f"{kind}_tokens")
+            if tokens:
+                LLM_TOKENS.inc(tokens, kind=kind)
+
+    def _messages(self, user_input: str, context: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        """System prompt, prior turns of the conversation, then the command"""
+        return [
+            {"role": "system", "content": self.system_prompt},
+            *(context or ()),
+            {"role": "user", "content": user_input}
+        ]
+
+    def _finish(self, user_input: str, json_str: str, with_context: bool = False) -> TransactionIntent:
+        """Parse the model's JSON answer and learn its template"""
+        logger.debug(f"Parsed intent: {json_str}")
+        with STAGE_LATENCY.time(stage="parse", action="unknown") as labels:
+            intent = TransactionIntent.parse_from_json(json_str)
+            labels["action"] = intent.action.value
+        if self.intent_cache is not None:
+            self.intent_cache.learn(user_input, intent, require_slot=with_context)
+        return intent
+
+    async def parse_command(
+        self,
+        user_input: str,
+        context: Optional[List[Dict[str, str]]] = None
+    ) -> TransactionIntent:
+        """Parse natural language input into structured transaction intent, given prior conversation turns"""
+        intent = self._parse_locally(user_input, context)
+        if intent is not None:
+            return intent
+
+        self.llm_calls += 1
+        PARSE_REQUESTS.inc(path="llm")
+        start = time.perf_counter()
+        elapsed: Optional[float] = None
+        outcome, action = "error", "unknown"
         try:
             # Request completion from Groq
-            response = await asyncio.to_thread(
-                self.groq.chat.completions.create,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                model="Llama3-8b-8192",
+            response = await self.llm.chat_completion(
+                messages=self._messages(user_input, context),
+                model=self.model,
                 temperature=0.1,
                 max_tokens=settings.MAX_TOKENS
             )
+            elapsed = time.perf_counter() - start
+            self._count_tokens(response.get("usage"))
             
-            # Extract JSON from response
-            json_str = response.choices[0].message.content
-            logger.debug(f"Parsed intent: {json_str}")
-            
-            # Parse JSON into TransactionIntent
-            return TransactionIntent.parse_from_json(json_str)
+            # Extract JSON from response and parse it into TransactionIntent
+            json_str = response["choices"][0]["message"]["content"]
+            intent = self._finish(user_input, json_str, with_context=bool(context))
+            outcome, action = "ok", intent.action.value
+            return intent
             
         except Exception as e:
             logger.error(f"Command parsing error: {str(e)}")
-            raise ValueError(f"Could not parse command: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Could not parse command: {str(e)}")
+        finally:
+            # Observed after parsing so the span carries the resulting action
+            if elapsed is None:
+                elapsed = time.perf_counter() - start
+            STAGE_LATENCY.observe(elapsed, stage="llm", action=action, outcome=outcome)
+
+    async def stream_command(
+        self,
+        user_input: str,
+        context: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Parse a command while the completion streams in
+
+        Yields ("field", (name, value)) for each intent field as soon as it is
+        known, then ("intent", TransactionIntent) once the object is complete.
+        """
+        intent = self._parse_locally(user_input, context)
+        if intent is not None:
+            for name, value in intent.model_dump(mode="json").items():
+                yield "field", (name, value)
+            yield "intent", intent
+            return
+
+        self.llm_calls += 1
+        PARSE_REQUESTS.inc(path="llm")
+        start = time.perf_counter()
+        try:
+            fields = IncrementalIntentParser()
+            chunks = []
+            async for delta in self.llm.stream_chat_completion(
+                messages=self._messages(user_input, context),
+                model=self.model,
+                temperature=0.1,
+                max_tokens=settings.MAX_TOKENS
+            ):
+                chunks.append(delta)
+                for field in fields.feed(delta):
+                    yield "field", field
+
+            elapsed = time.perf_counter() - start
+            intent = self._finish(user_input, "".join(chunks), with_context=bool(context))
+        except Exception as e:
+            STAGE_LATENCY.observe(time.perf_counter() - start, stage="llm", action="unknown", outcome="error")
+            logger.error(f"Command parsing error: {str(e)}")
+            raise ValueError(f"Could not parse command: {str(e)}")
+        STAGE_LATENCY.observe(elapsed, stage="llm", action=intent.action.value, outcome="ok")
+        yield "intent", intent
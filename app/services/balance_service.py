@@ -0,0 +1,206 @@
+"""
+On-chain balance loading
+
+Balance requests that arrive within a short window are combined into one
+JSON-RPC batch. The batch holds an ``eth_getBalance`` call per address and
+Multicall3 ``aggregate3`` calls that read the ``balanceOf`` of every ERC-20
+in the token registry in one ``eth_call``. Addresses are validated before
+they join a batch, so one bad address cannot fail the others. Results are
+cached per (network, address) for ``ttl`` seconds, in an LRU of at most
+``max_entries`` addresses whose expired entries are still served while the
+node is unavailable. Callers invalidate an entry when a send is likely to
+change it.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from eth_abi import decode, encode
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.core.security import SecurityValidator
+from app.services.provider_pool import NetworkPool
+from app.services.rpc_client import RpcError
+from app.services.token_registry import TokenRegistry
+
+logger = logging.getLogger(__name__)
+
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")  # aggregate3((address,bool,bytes)[])
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")  # balanceOf(address)
+MULTICALL_CHUNK = 500  # sub-calls per eth_call
+
+BalanceKey = Tuple[str, str]
+
+
+class BalanceService:
+    """Batched, cached native and ERC-20 balance reads"""
+
+    def __init__(
+        self,
+        providers: Mapping[str, NetworkPool],
+        tokens: TokenRegistry,
+        ttl: float = 15.0,
+        batch_window: float = 0.005,
+        max_batch: int = 200,
+        max_entries: int = 10000,
+        fallback_balances: Optional[Dict[str, float]] = None
+    ):
+        self.providers = providers
+        self.tokens = tokens
+        self.ttl = ttl
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_entries = max_entries
+        self.fallback_balances = fallback_balances
+
+        # Least recently used first
+        self._cache: "OrderedDict[BalanceKey, Tuple[float, Dict[str, float]]]" = OrderedDict()
+        self._pending: Dict[str, Dict[str, "asyncio.Future[Dict[str, float]]"]] = {}
+        self._flush_tasks: Dict[str, asyncio.TimerHandle] = {}
+
+    @staticmethod
+    def _key(network: str, address: str) -> BalanceKey:
+        return network, address.lower()
+
+    def invalidate(self, network: str, address: str):
+        """Drop the cached balances of an address"""
+        self._cache.pop(self._key(network, address), None)
+
+    async def get_balances(self, network: str, address: str) -> Dict[str, float]:
+        """Return {asset: balance} for an address, from cache or the next batch; raises ValueError for bad input"""
+        checksummed = SecurityValidator.checksum_address(address)
+        if checksummed is None:
+            raise ValueError(f"Invalid Ethereum address: {address}")
+        key = self._key(network, checksummed)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            CACHE_LOOKUPS.inc(cache="balance", result="hit")
+            return dict(cached[1])
+        CACHE_LOOKUPS.inc(cache="balance", result="miss")
+
+        client = self.providers.get(network)
+        if client is None:
+            if self.fallback_balances is None:
+                configured = ", ".join(sorted(self.providers)) or "none"
+                raise ValueError(f"Unsupported network: {network} (configured: {configured})")
+            logger.debug(f"No node configured for {network}; using fallback balances")
+            return dict(self.fallback_balances)
+
+        pending = self._pending.setdefault(network, {})
+        future = pending.get(checksummed)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            pending[checksummed] = future
+            if len(pending) >= self.max_batch:
+                self._schedule_flush(network, immediately=True)
+            else:
+                self._schedule_flush(network)
+
+        try:
+            return dict(await asyncio.shield(future))
+        except RpcError as e:
+            # Serve stale data rather than failing when the node is unavailable
+            if cached is not None:
+                logger.warning(f"Serving stale balances for {address}: {e}")
+                return dict(cached[1])
+            raise ValueError(f"Could not load balances: {e}")
+
+    def _schedule_flush(self, network: str, immediately: bool = False):
+        loop = asyncio.get_running_loop()
+        if immediately:
+            handle = self._flush_tasks.pop(network, None)
+            if handle is not None:
+                handle.cancel()
+            loop.create_task(self._flush(network))
+        elif network not in self._flush_tasks:
+            self._flush_tasks[network] = loop.call_later(
+                self.batch_window, lambda: loop.create_task(self._flush(network))
+            )
+
+    async def _flush(self, network: str):
+        """Load every queued address of a network in one batch request"""
+        self._flush_tasks.pop(network, None)
+        pending = self._pending.pop(network, {})
+        if not pending:
+            return
+
+        try:
+            results = await self.fetch_balances(network, list(pending))
+        except Exception as e:
+            error = e if isinstance(e, RpcError) else RpcError(str(e))
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        now = time.monotonic()
+        for address, future in pending.items():
+            balances = results[address]
+            key = self._key(network, address)
+            self._cache[key] = (now, balances)
+            self._cache.move_to_end(key)
+            if not future.done():
+                future.set_result(balances)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def fetch_balances(self, network: str, addresses: List[str]) -> Dict[str, Dict[str, float]]:
+        """Read native and token balances of many checksummed addresses in a single JSON-RPC batch"""
+        client = self.providers[network]
+        tokens = self.tokens.contracts(network)
+        native = self.tokens.native(network)
+        # Networks missing from the registry are assumed to use ether
+        native_symbol = native.symbol if native is not None else "ETH"
+        native_decimals = native.decimals if native is not None else 18
+
+        calls = [("eth_getBalance", [address, "latest"]) for address in addresses]
+
+        sub_calls = [
+            (token.address, address)
+            for address in addresses
+            for token in tokens
+        ]
+        chunks = [sub_calls[i:i + MULTICALL_CHUNK] for i in range(0, len(sub_calls), MULTICALL_CHUNK)]
+        for chunk in chunks:
+            data = AGGREGATE3_SELECTOR + encode(
+                ["(address,bool,bytes)[]"],
+                [[(token, True, BALANCE_OF_SELECTOR + encode(["address"], [owner])) for token, owner in chunk]]
+            )
+            calls.append(("eth_call", [{"to": MULTICALL3_ADDRESS, "data": "0x" + data.hex()}, "latest"]))
+
+        replies = await client.batch(calls)
+
+        results: Dict[str, Dict[str, float]] = {}
+        for address, reply in zip(addresses, replies[:len(addresses)]):
+            if isinstance(reply, RpcError):
+                raise reply
+            results[address] = {native_symbol: int(reply, 16) / 10 ** native_decimals}
+
+        token_values: List[Optional[int]] = []
+        for reply in replies[len(addresses):]:
+            if isinstance(reply, RpcError):
+                raise reply
+            (returned,) = decode(["(bool,bytes)[]"], bytes.fromhex(reply[2:]))
+            for success, value in returned:
+                token_values.append(int.from_bytes(value[:32], "big") if success and len(value) >= 32 else None)
+
+        i = 0
+        for address in addresses:
+            for token in tokens:
+                value = token_values[i]
+                i += 1
+                if value is not None:
+                    results[address][token.symbol] = token.from_base_units(value)
+
+        return results
+
+    def close(self):
+        """Cancel scheduled flushes"""
+        for handle in self._flush_tasks.values():
+            handle.cancel()
+        self._flush_tasks.clear()
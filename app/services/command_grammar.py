@@ -0,0 +1,118 @@
+"""
+Deterministic grammar for common wallet commands
+
+Covers the fixed phrasings of the send (including batch sends to a list of
+addresses), swap, balance, history and help commands so they can be turned
+into a TransactionIntent without a model round trip. Anything the grammar does not match exactly returns None and is
+left to the LLM.
+"""
+import re
+from typing import Optional
+
+from app.models.schemas import TransactionIntent, WalletCommand
+
+ADDRESS = r"0x[a-fA-F0-9]{40}"
+AMOUNT = r"\d+(?:\.\d+)?|\.\d+"
+ASSET = r"[A-Za-z][A-Za-z0-9]{1,9}"
+NETWORK = r"(?:\s+on\s+(?P<network>[A-Za-z][\w-]*))?"
+POLITE = r"(?:please\s+|pls\s+|can you\s+|could you\s+)?"
+ADDRESS_LIST = rf"{ADDRESS}(?:(?:\s*,\s*(?:and\s+)?|\s+and\s+|\s+){ADDRESS})*"
+
+_SEND = re.compile(
+    rf"{POLITE}(?:send|transfer|pay)\s+(?P<amount>{AMOUNT})\s*(?P<asset>{ASSET})"
+    rf"\s+to\s+(?P<recipient>{ADDRESS}){NETWORK}",
+    re.IGNORECASE
+)
+# "send 10 USDC each to A, B and C", "pay 10 USDC to each of A B C"
+_SEND_EACH = re.compile(
+    rf"{POLITE}(?:send|transfer|pay)\s+(?P<amount>{AMOUNT})\s*(?P<asset>{ASSET})"
+    rf"\s+(?:each\s+to|to\s+each\s+of|to\s+each)\s+(?P<recipients>{ADDRESS_LIST}){NETWORK}",
+    re.IGNORECASE
+)
+_ADDRESS = re.compile(ADDRESS)
+_SWAP = re.compile(
+    rf"{POLITE}(?:swap|exchange|convert)\s+(?P<amount>{AMOUNT})\s*(?P<asset>{ASSET})"
+    rf"\s+(?:for|to|into)\s+(?P<target>{ASSET}){NETWORK}",
+    re.IGNORECASE
+)
+_BALANCE = re.compile(
+    rf"{POLITE}(?:(?:show|check|get|view|display)\s+(?:me\s+)?)?"
+    r"(?:(?:what(?:'s| is)\s+)?(?:my\s+)?)(?:wallet\s+|account\s+|token\s+)?"
+    r"(?:balance|balances|portfolio|holdings)",
+    re.IGNORECASE
+)
+_HISTORY = re.compile(
+    rf"{POLITE}(?:(?:show|list|get|view|display)\s+(?:me\s+)?)?(?:my\s+)?"
+    r"(?:(?:transaction|tx)\s+history|history|transactions|past transactions|recent transactions)",
+    re.IGNORECASE
+)
+_HELP = re.compile(
+    r"help(?:\s+me)?|what can you do|what commands can i use|commands|usage",
+    re.IGNORECASE
+)
+
+# Trailing punctuation and filler that never changes the meaning of a command
+_TRAILING = re.compile(r"[\s.!?]+$|\s+please$", re.IGNORECASE)
+
+
+def _normalize(user_input: str) -> str:
+    text = " ".join(user_input.strip().split())
+    previous = None
+    while previous != text:
+        previous = text
+        text = _TRAILING.sub("", text)
+    return text
+
+
+def _network(match: "re.Match[str]") -> Optional[str]:
+    """Network named with "on X", or None so the session's network applies"""
+    network = match.group("network")
+    return network.lower() if network else None
+
+
+def parse_fast_path(user_input: str) -> Optional[TransactionIntent]:
+    """Parse a command with the local grammar, or return None if it is not an exact match"""
+    text = _normalize(user_input)
+    if not text:
+        return None
+
+    match = _SEND.fullmatch(text)
+    if match:
+        return TransactionIntent(
+            action=WalletCommand.SEND,
+            asset=match.group("asset").upper(),
+            amount=float(match.group("amount")),
+            recipient=match.group("recipient"),
+            network=_network(match)
+        )
+
+    match = _SEND_EACH.fullmatch(text)
+    if match:
+        return TransactionIntent(
+            action=WalletCommand.SEND,
+            asset=match.group("asset").upper(),
+            amount=float(match.group("amount")),
+            recipients=_ADDRESS.findall(match.group("recipients")),
+            network=_network(match)
+        )
+
+    match = _SWAP.fullmatch(text)
+    if match:
+        return TransactionIntent(
+            action=WalletCommand.SWAP,
+            asset=match.group("asset").upper(),
+            amount=float(match.group("amount")),
+            target_asset=match.group("target").upper(),
+            network=_network(match)
+        )
+
+    if _BALANCE.fullmatch(text):
+        return TransactionIntent(action=WalletCommand.BALANCE)
+
+    if _HISTORY.fullmatch(text):
+        return TransactionIntent(action=WalletCommand.HISTORY)
+
+    if _HELP.fullmatch(text):
+        return TransactionIntent(action=WalletCommand.HELP)
+
+    return None
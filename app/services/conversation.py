@@ -0,0 +1,143 @@
+"""
+Per-session conversation memory for the command parser
+
+Each session keeps its recent turns as ``WalletMessage`` objects in a ring
+buffer: the user's command and the intent it was parsed into. Before an LLM
+call the turns are compacted to fit a token budget. The newest turns are
+kept verbatim. Older turns, including those that fell out of the ring buffer,
+are folded into one short summary line of the actions they requested. The
+rendered context is cached until the conversation changes, so unchanged
+history is not re-serialized on every command.
+
+Memories live in the process that served the session, in an LRU bounded by
+``max_sessions``.
+"""
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.models.schemas import TransactionIntent, WalletMessage
+from app.utils.serialization import dumps
+
+Message = Dict[str, str]
+
+# Rough token count per message: ~4 characters per token plus the role framing
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return MESSAGE_OVERHEAD_TOKENS + (len(text) + 3) // 4
+
+
+def describe_intent(intent: Dict[str, Any]) -> str:
+    """One-line summary of a parsed intent, e.g. "send 0.1 ETH to 0x..." """
+    parts = [intent.get("action") or "unknown"]
+    if intent.get("amount") is not None:
+        parts.append(str(intent["amount"]))
+    if intent.get("asset"):
+        parts.append(intent["asset"])
+    if intent.get("target_asset"):
+        parts.append(f"for {intent['target_asset']}")
+    if intent.get("recipient"):
+        parts.append(f"to {intent['recipient']}")
+    elif intent.get("recipients"):
+        parts.append(f"to {len(intent['recipients'])} recipients")
+    if intent.get("network") and intent["network"] != "mainnet":
+        parts.append(f"on {intent['network']}")
+    return " ".join(parts)
+
+
+class ConversationMemory:
+    """Ring buffer of one session's turns with a token-budgeted, cached LLM context"""
+
+    def __init__(self, max_turns: int = 10, max_summaries: int = 5):
+        # A turn is a user message and the assistant's parsed intent
+        self._messages: Deque[WalletMessage] = deque(maxlen=2 * max_turns)
+        # Actions of turns no longer held verbatim, oldest first
+        self._evicted: Deque[str] = deque(maxlen=max_summaries)
+        self._version = 0
+        self._cached: Optional[Tuple[int, int, List[Message]]] = None
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    @property
+    def messages(self) -> List[WalletMessage]:
+        return list(self._messages)
+
+    def add_turn(self, user_input: str, intent: TransactionIntent):
+        """Record a command and the intent it was parsed into"""
+        data = intent.model_dump(mode="json", exclude_none=True, exclude={"cursor"})
+        if len(self._messages) == self._messages.maxlen:
+            # The oldest turn is about to fall out of the buffer; keep its gist
+            self._evicted.append(describe_intent(self._messages[1].metadata or {}))
+        self._messages.append(WalletMessage(role="user", content=user_input))
+        self._messages.append(WalletMessage(role="assistant", content=dumps(data).decode(), metadata=data))
+        self._version += 1
+
+    def context(self, token_budget: int) -> List[Message]:
+        """Prior turns as chat messages, compacted to fit ``token_budget``; cached until the next turn"""
+        if self._cached is not None and self._cached[:2] == (self._version, token_budget):
+            return self._cached[2]
+
+        messages = list(self._messages)
+        kept: List[Message] = []
+        used = 0
+        # Newest turns first; a turn is kept whole or not at all
+        index = len(messages)
+        while index >= 2:
+            user, assistant = messages[index - 2], messages[index - 1]
+            cost = estimate_tokens(user.content) + estimate_tokens(assistant.content)
+            if used + cost > token_budget:
+                break
+            kept[:0] = [
+                {"role": "user", "content": user.content},
+                {"role": "assistant", "content": assistant.content}
+            ]
+            used += cost
+            index -= 2
+
+        summaries = list(self._evicted) + [
+            describe_intent(message.metadata or {})
+            for message in messages[:index] if message.role == "assistant"
+        ]
+        # Fold what did not fit into one line, dropping the oldest actions until it fits as well
+        while summaries:
+            summary = "Earlier requests in this conversation: " + "; ".join(summaries)
+            if used + estimate_tokens(summary) <= token_budget:
+                kept.insert(0, {"role": "system", "content": summary})
+                break
+            summaries.pop(0)
+
+        self._cached = (self._version, token_budget, kept)
+        return kept
+
+    def clear(self):
+        self._messages.clear()
+        self._evicted.clear()
+        self._version += 1
+
+
+class ConversationStore:
+    """Conversation memories by session ID, least recently used dropped beyond ``max_sessions``"""
+
+    def __init__(self, max_sessions: int = 10000, max_turns: int = 10):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._memories: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._memories)
+
+    def get(self, session_id: str) -> ConversationMemory:
+        """The session's memory, created on first use"""
+        memory = self._memories.get(session_id)
+        if memory is None:
+            memory = self._memories[session_id] = ConversationMemory(self.max_turns)
+            while len(self._memories) > self.max_sessions:
+                self._memories.popitem(last=False)
+        else:
+            self._memories.move_to_end(session_id)
+        return memory
+
+    def drop(self, session_id: str):
+        self._memories.pop(session_id, None)
@@ -0,0 +1,152 @@
+"""
+Background gas price oracle
+
+Base fee, priority fee and legacy gas price are refreshed from one network's
+provider pool on a fixed interval by a background task, in a single JSON-RPC
+batch, so request handlers read a cached quote instead of paying an RPC round
+trip. When the cached data is older than
+``max_age`` a configured fallback quote is served and a refresh is triggered.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.services.provider_pool import NetworkPool
+from app.services.rpc_client import RpcError
+from app.utils.helpers import wait_event
+
+logger = logging.getLogger(__name__)
+
+GWEI = 10 ** 9
+
+
+@dataclass(frozen=True)
+class GasQuote:
+    """Gas fees in wei, with the time they were fetched"""
+    base_fee: Optional[int]
+    priority_fee: int
+    gas_price: int
+    fetched_at: Optional[float]  # time.monotonic(), None if never fetched
+    source: str  # "node" or "fallback"
+
+    @property
+    def max_fee(self) -> int:
+        """EIP-1559 max fee, leaving room for the base fee to double"""
+        if self.base_fee is None:
+            return self.gas_price
+        return 2 * self.base_fee + self.priority_fee
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the underlying data was fetched"""
+        if self.fetched_at is None:
+            return None
+        return time.monotonic() - self.fetched_at
+
+
+class GasOracle:
+    """Keeps a fresh gas quote in memory, refreshed in the background"""
+
+    def __init__(
+        self,
+        rpc: Optional[NetworkPool],
+        refresh_interval: float = 12.0,
+        max_age: float = 60.0,
+        fallback_gas_price_gwei: float = 30.0,
+        fallback_priority_fee_gwei: float = 1.5
+    ):
+        self.rpc = rpc  # None: always serve the fallback quote
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.fallback_gas_price = int(fallback_gas_price_gwei * GWEI)
+        self.fallback_priority_fee = int(fallback_priority_fee_gwei * GWEI)
+
+        self._quote: Optional[GasQuote] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Start the refresh loop on the running event loop"""
+        if self.rpc is not None and (self._task is None or self._task.done()):
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the refresh loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            self._wakeup.clear()
+            await wait_event(self._wakeup, self.refresh_interval)
+
+    async def refresh(self) -> Optional[GasQuote]:
+        """Fetch a new quote from the node"""
+        if self.rpc is None:
+            return self._quote
+        try:
+            self._quote = await self._fetch()
+        except (RpcError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Gas oracle refresh for {self.rpc.network} failed: {e}")
+        return self._quote
+
+    async def _fetch(self) -> GasQuote:
+        """Read fees from the node in one batch"""
+        gas_price, block, priority_fee = await self.rpc.batch([
+            ("eth_gasPrice", []),
+            ("eth_getBlockByNumber", ["latest", False]),
+            ("eth_maxPriorityFeePerGas", []),
+        ])
+        for result in (gas_price, block):
+            if isinstance(result, RpcError):
+                raise result
+        gas_price = int(gas_price, 16)
+        base_fee = block.get("baseFeePerGas")
+        if base_fee is None:
+            priority_fee = 0
+        else:
+            base_fee = int(base_fee, 16)
+            if isinstance(priority_fee, RpcError) or priority_fee is None:
+                # Nodes without eth_maxPriorityFeePerGas: infer the tip from the legacy price
+                priority_fee = max(gas_price - base_fee, 0)
+            else:
+                priority_fee = int(priority_fee, 16)
+
+        return GasQuote(
+            base_fee=base_fee,
+            priority_fee=priority_fee,
+            gas_price=gas_price,
+            fetched_at=time.monotonic(),
+            source="node"
+        )
+
+    def get_quote(self) -> GasQuote:
+        """Return the cached quote, or the fallback if it is missing or stale"""
+        self.start()
+
+        quote = self._quote
+        if quote is not None and quote.age <= self.max_age:
+            CACHE_LOOKUPS.inc(cache="gas_quote", result="hit")
+            return quote
+        CACHE_LOOKUPS.inc(cache="gas_quote", result="miss")
+
+        # Stale or missing: serve the fallback now and refresh right away
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return GasQuote(
+            base_fee=None,
+            priority_fee=self.fallback_priority_fee,
+            gas_price=self.fallback_gas_price,
+            fetched_at=quote.fetched_at if quote else None,
+            source="fallback"
+        )
@@ -0,0 +1,252 @@
+"""
+Template-learning cache for parsed intents
+
+Commands are normalized by replacing addresses, numbers and known asset
+symbols with numbered placeholders, e.g. "send 0.5 USDC to 0xabc..." becomes
+"send <NUM0> <ASSET0> to <ADDR0>". After the LLM parses a command once, the
+shape of its TransactionIntent is stored per template with each field either
+a literal or a reference to a slot, so later commands with the same template
+are answered by filling in their own slot values.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.models.schemas import TransactionIntent, WalletCommand
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2
+SLOT_KEY = "$slot"
+# Fields an intent cannot run without; templates are only learned from complete intents
+REQUIRED_FIELDS = {
+    WalletCommand.SEND: ("asset", "amount", "recipient"),
+    WalletCommand.SWAP: ("asset", "amount", "target_asset")
+}
+
+_TOKEN = re.compile(r"0x[a-fA-F0-9]{40}|\d+(?:\.\d+)?|\.\d+|[A-Za-z][A-Za-z0-9]*|\S")
+
+
+def cache_fingerprint(system_prompt: str, model: str) -> str:
+    """Identify the prompt/model pair a cache was learned from"""
+    data = f"{CACHE_FORMAT_VERSION}\0{model}\0{system_prompt}"
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class IntentTemplateCache:
+    """Bounded LRU/TTL cache of intent shapes keyed on slot-normalized commands"""
+
+    def __init__(
+        self,
+        fingerprint: str,
+        known_assets: Iterable[str],
+        max_entries: int,
+        ttl: float,
+        path: Optional[Path] = None,
+        flush_interval: float = 30.0
+    ):
+        self.fingerprint = fingerprint
+        self.known_assets = {asset.upper() for asset in known_assets}
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.flush_interval = flush_interval
+
+        # template -> (shape, learned_at)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio
+        }
+
+    def normalize(self, user_input: str) -> Tuple[str, Dict[str, str]]:
+        """Split a command into its template and slot values"""
+        parts = []
+        slots: Dict[str, str] = {}
+        counters = {"ADDR": 0, "NUM": 0, "ASSET": 0}
+
+        for token in _TOKEN.findall(user_input):
+            if token.startswith("0x") and len(token) == 42:
+                kind = "ADDR"
+            elif token[0].isdigit() or (token[0] == "." and len(token) > 1):
+                kind = "NUM"
+            elif token.upper() in self.known_assets:
+                kind = "ASSET"
+            else:
+                kind = None
+
+            if kind is None:
+                parts.append(token.lower())
+                continue
+
+            name = f"{kind}{counters[kind]}"
+            counters[kind] += 1
+            slots[name] = token
+            parts.append(f"<{name}>")
+
+        return " ".join(parts), slots
+
+    def lookup(self, user_input: str) -> Optional[TransactionIntent]:
+        """Answer a command from a learned template, or return None"""
+        template, slots = self.normalize(user_input)
+        entry = self._entries.get(template)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        shape, learned_at = entry
+        if time.time() - learned_at > self.ttl:
+            del self._entries[template]
+            self._dirty = True
+            self.misses += 1
+            return None
+
+        try:
+            fields = {name: self._fill(value, slots) for name, value in shape.items()}
+            intent = TransactionIntent(**fields)
+        except (KeyError, ValueError, ValidationError):
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(template)
+        self.hits += 1
+        return intent
+
+    def learn(self, user_input: str, intent: TransactionIntent, require_slot: bool = False):
+        """Store the shape of an LLM-parsed intent under the command's template
+
+        With ``require_slot`` the shape is only stored if some field comes
+        from the command itself, for intents parsed with conversation context
+        where e.g. "do it again" depends on earlier turns. Intents missing a
+        required field, e.g. a follow-up the model could not resolve, are
+        never stored.
+        """
+        if any(getattr(intent, name) is None for name in REQUIRED_FIELDS.get(intent.action, ())):
+            return
+        template, slots = self.normalize(user_input)
+        shape = self._shape(intent, slots)
+        if shape is None:
+            return
+        if require_slot and not any(isinstance(value, dict) and SLOT_KEY in value for value in shape.values()):
+            return
+
+        self._entries[template] = (shape, time.time())
+        self._entries.move_to_end(template)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.flush_interval:
+            self.save()
+
+    def _shape(self, intent: TransactionIntent, slots: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Describe intent fields as slot references, or None if they cannot be derived from the slots"""
+        shape: Dict[str, Any] = {}
+        for name, value in intent.model_dump(mode="json").items():
+            if name in ("recipients", "amounts") and value is not None:
+                # Lists vary in length between otherwise identical commands
+                return None
+            if name in ("asset", "target_asset", "amount", "recipient") and value is not None:
+                matches = [slot for slot, raw in slots.items() if self._matches(name, value, raw)]
+                # Values that do not come from exactly one slot (e.g. "half my ETH")
+                # depend on more than the template and must not be cached
+                if len(matches) != 1:
+                    return None
+                shape[name] = {SLOT_KEY: matches[0]}
+            else:
+                shape[name] = value
+        return shape
+
+    @staticmethod
+    def _matches(field: str, value: Any, raw: str) -> bool:
+        if field == "amount":
+            try:
+                return float(raw) == float(value)
+            except ValueError:
+                return False
+        return raw.lower() == str(value).lower()
+
+    @staticmethod
+    def _fill(value: Any, slots: Dict[str, str]) -> Any:
+        if isinstance(value, dict) and SLOT_KEY in value:
+            raw = slots[value[SLOT_KEY]]
+            if value[SLOT_KEY].startswith("NUM"):
+                return float(raw)
+            if value[SLOT_KEY].startswith("ASSET"):
+                return raw.upper()
+            return raw
+        return value
+
+    def invalidate(self):
+        """Drop every learned template, e.g. after the prompt or model changed"""
+        self._entries.clear()
+        self._dirty = True
+        self.save()
+
+    def load(self):
+        """Load persisted templates, discarding them if they were learned for another prompt or model"""
+        if not self.path or not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Could not load intent cache: {e}")
+            return
+
+        if data.get("fingerprint") != self.fingerprint:
+            logger.info("Intent cache was built for a different prompt or model; discarding it")
+            self._dirty = True
+            return
+
+        now = time.time()
+        for template, shape, learned_at in data.get("entries", [])[-self.max_entries:]:
+            if now - learned_at <= self.ttl:
+                self._entries[template] = (shape, learned_at)
+
+    def save(self):
+        """Persist the cache atomically"""
+        self._last_save = time.monotonic()
+        if not self.path or not self._dirty:
+            return
+
+        data = {
+            "fingerprint": self.fingerprint,
+            "entries": [[template, shape, learned_at] for template, (shape, learned_at) in self._entries.items()]
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Could not save intent cache: {e}")
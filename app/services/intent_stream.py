@@ -0,0 +1,111 @@
+"""
+Incremental parsing of streamed intent JSON
+
+The LLM answers with one flat JSON object. ``IncrementalIntentParser`` is
+fed the completion as it streams in and reports each top-level field as
+soon as its value is complete. Callers can react to ``action`` before the
+model has finished the rest of the object.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IncrementalIntentParser:
+    """Emits (key, value) pairs of a streamed top-level JSON object as they complete"""
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = True
+        self._key: Optional[str] = None
+        self._start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume the next chunk and return the fields it completed"""
+        if self.complete:
+            return []
+
+        self._text += chunk
+        text = self._text
+        completed: List[Tuple[str, Any]] = []
+
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._expect_key:
+                            self._key = json.loads(text[self._start:i + 1])
+                            self._start = None
+                        else:
+                            # String values are known as soon as the closing quote arrives
+                            self._emit(text[self._start:i + 1], completed)
+                i += 1
+                continue
+
+            if not self._started:
+                # Skip anything the model put before the object, e.g. a code fence
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._start is None:
+                    self._start = i
+            elif ch in "{[":
+                if self._depth == 1 and self._start is None:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text[self._start:i] if self._start is not None else None, completed)
+                    self.complete = True
+                    i += 1
+                    break
+                if self._depth == 1:
+                    self._emit(text[self._start:i + 1], completed)
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect_key = False
+                elif ch == ",":
+                    self._emit(text[self._start:i] if self._start is not None else None, completed)
+                    self._expect_key = True
+                elif not ch.isspace() and self._start is None:
+                    # Start of a number, true, false or null
+                    self._start = i
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def _emit(self, raw: Optional[str], completed: List[Tuple[str, Any]]):
+        """Decode a finished value and record it under the current key"""
+        if raw is None or self._key is None:
+            self._start = None
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw.strip()
+        self.fields[self._key] = value
+        completed.append((self._key, value))
+        self._key = None
+        self._start = None
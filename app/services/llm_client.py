@@ -0,0 +1,223 @@
+"""
+Async client for OpenAI-compatible chat-completions APIs
+
+All calls share one keep-alive aiohttp connection pool. Outstanding
+requests are capped by a semaphore. Each attempt has its own timeout, and
+failed attempts are retried with jittered exponential backoff. Identical
+requests that are already in flight share one upstream call. Streamed
+completions are yielded as content deltas while they arrive.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from typing import Dict, Any, AsyncIterator, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMRequestError(Exception):
+    """Raised when a chat completion cannot be obtained"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncLLMClient:
+    """Pooled, rate-limited chat-completions client with single-flight deduplication"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        max_concurrency: int = 32,
+        timeout: float = 15.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        pool_size: int = 64
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the shared session on first use, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
+            )
+        return self._session
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Request a chat completion, sharing the upstream call with identical in-flight requests"""
+        payload: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        key = hashlib.sha256(body.encode()).hexdigest()
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._post_with_retries("/chat/completions", body))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.debug("Joining in-flight chat completion")
+
+        # A cancelled caller must not cancel the request other callers are waiting on
+        return await asyncio.shield(task)
+
+    async def _post_with_retries(self, path: str, body: str) -> Dict[str, Any]:
+        """POST a request, retrying timeouts, connection errors and retryable statuses"""
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            retry_after: Optional[float] = None
+            try:
+                async with self._semaphore:
+                    async with self._get_session().post(
+                        url,
+                        data=body,
+                        timeout=aiohttp.ClientTimeout(total=self.timeout)
+                    ) as response:
+                        if response.status == 200:
+                            return await response.json(content_type=None)
+
+                        text = await response.text()
+                        error = LLMRequestError(
+                            f"Upstream returned {response.status}: {text[:200]}",
+                            status=response.status
+                        )
+                        if response.status not in RETRYABLE_STATUS:
+                            raise error
+                        retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = LLMRequestError(f"Request failed: {e!r}")
+
+            if attempt >= self.max_retries:
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            attempt += 1
+            logger.warning(f"LLM request failed ({error}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion, yielding content deltas as they arrive
+
+        Failures are retried only until the first delta has been yielded.
+        """
+        payload: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        body = json.dumps(payload, separators=(",", ":"))
+        url = f"{self.base_url}/chat/completions"
+
+        attempt = 0
+        started = False
+        while True:
+            retry_after: Optional[float] = None
+            try:
+                async with self._semaphore:
+                    async with self._get_session().post(
+                        url,
+                        data=body,
+                        # Bound the wait for each chunk rather than the whole stream
+                        timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+                    ) as response:
+                        if response.status == 200:
+                            async for line in response.content:
+                                line = line.strip()
+                                if not line.startswith(b"data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == b"[DONE]":
+                                    return
+                                choices = json.loads(data).get("choices") or [{}]
+                                delta = (choices[0].get("delta") or {}).get("content")
+                                if delta:
+                                    started = True
+                                    yield delta
+                            return
+
+                        text = await response.text()
+                        error = LLMRequestError(
+                            f"Upstream returned {response.status}: {text[:200]}",
+                            status=response.status
+                        )
+                        if response.status not in RETRYABLE_STATUS:
+                            raise error
+                        retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+                error = LLMRequestError(f"Stream failed: {e!r}")
+                if started:
+                    raise error
+
+            if attempt >= self.max_retries:
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            attempt += 1
+            logger.warning(f"LLM stream failed ({error}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, honoring Retry-After when the server sends it"""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    async def close(self):
+        """Close the shared connection pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,82 @@
+"""
+Local nonce allocation per sending address
+
+Batch sends need one nonce per transaction, and the transactions are built
+before any of them is signed, so the node's pending count cannot tell them
+apart. The next nonce of each (network, address) is kept in memory and handed
+out in sequential ranges. It is read from the node (``eth_getTransactionCount``
+on the pending block) on first use. It is read again once the entry is older
+than ``ttl``: by then signed transactions show up in the pending count, and
+reservations that were never signed are given up so they leave no gap.
+Addresses idle for longer than ``ttl`` are evicted, since their next
+reservation reads the node anyway.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Mapping, Optional, Tuple
+
+from app.services.provider_pool import NetworkPool
+
+logger = logging.getLogger(__name__)
+
+NonceKey = Tuple[str, str]
+
+
+@dataclass
+class _AddressNonces:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    next_nonce: Optional[int] = None  # None until read from the node
+    synced_at: float = 0.0
+    users: int = 0  # reservations holding or waiting for the lock
+
+
+class NonceManager:
+    """Sequential nonce ranges per (network, address), synced from the node at most every ``ttl`` seconds"""
+
+    def __init__(self, providers: Mapping[str, NetworkPool], ttl: float = 30.0):
+        self.providers = providers
+        self.ttl = ttl
+        # Least recently synced first
+        self._addresses: "OrderedDict[NonceKey, _AddressNonces]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    async def reserve(self, network: str, address: str, count: int = 1) -> int:
+        """Reserve ``count`` consecutive nonces and return the first"""
+        key = (network, address.lower())
+        state = self._addresses.get(key)
+        if state is None:
+            state = self._addresses[key] = _AddressNonces()
+        state.users += 1
+        try:
+            # Concurrent batches from one wallet get disjoint ranges
+            async with state.lock:
+                if state.next_nonce is None or time.monotonic() - state.synced_at >= self.ttl:
+                    count_hex = await self.providers[network].call("eth_getTransactionCount", [address, "pending"])
+                    state.next_nonce, state.synced_at = int(count_hex, 16), time.monotonic()
+                    self._addresses.move_to_end(key)
+                start = state.next_nonce
+                state.next_nonce += count
+        finally:
+            state.users -= 1
+        self._evict_expired()
+        return start
+
+    def _evict_expired(self):
+        """Drop addresses last synced more than ``ttl`` ago, oldest first, unless a reservation is using them"""
+        now = time.monotonic()
+        while self._addresses:
+            key, state = next(iter(self._addresses.items()))
+            if state.users or now - state.synced_at < self.ttl:
+                break
+            del self._addresses[key]
+
+    def forget(self, network: str, address: str):
+        """Drop an address's cached nonce so the next reservation reads it from the node"""
+        state = self._addresses.get((network, address.lower()))
+        if state is not None:
+            state.next_nonce = None
@@ -0,0 +1,237 @@
+"""
+USD price feed
+
+Asset prices are read from a pluggable ``PriceSource`` by a background task
+on a fixed interval and kept in memory, so valuations never wait on the
+source. ``CoinGeckoPriceSource`` queries CoinGecko's public price API,
+``HttpPriceSource`` fetches ``{symbol: price}`` JSON from any URL, and
+``FilePriceSource`` and ``StaticPriceSource`` serve fixed prices for tests and
+benchmarks. Without a source no asset is priced. Sources quote market
+prices by symbol; the cache keys them by (network, symbol) for the networks
+whose assets trade at those prices, so e.g. sepolia ETH stays unpriced. Prices
+older than ``max_age`` are still served but marked stale, and reading them
+triggers an immediate refresh.
+"""
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import aiohttp
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.utils.helpers import wait_event
+
+logger = logging.getLogger(__name__)
+
+COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price"
+
+PriceKey = Tuple[str, str]  # network, upper-case symbol
+
+
+def _parse_prices(data: Dict[str, object]) -> Dict[str, float]:
+    return {symbol.upper(): float(price) for symbol, price in data.items() if price is not None}
+
+
+class PriceSource(ABC):
+    """Where USD prices come from"""
+
+    @abstractmethod
+    async def fetch(self) -> Dict[str, float]:
+        """Current USD price per asset symbol"""
+
+    async def close(self):
+        """Release source resources"""
+
+
+class StaticPriceSource(PriceSource):
+    """Fixed prices, for tests and local development"""
+
+    def __init__(self, prices: Dict[str, float]):
+        self.prices = _parse_prices(prices)
+
+    async def fetch(self) -> Dict[str, float]:
+        return dict(self.prices)
+
+
+class FilePriceSource(PriceSource):
+    """Prices from a local ``{symbol: price}`` JSON file, re-read on every refresh; for tests and benchmarks"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _read(self) -> Dict[str, float]:
+        with open(self.path, encoding="utf-8") as f:
+            return _parse_prices(json.load(f))
+
+    async def fetch(self) -> Dict[str, float]:
+        return await asyncio.to_thread(self._read)
+
+
+class HttpPriceSource(PriceSource):
+    """Prices from an HTTP endpoint answering ``{symbol: price}`` JSON"""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def fetch(self) -> Dict[str, float]:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        async with self._session.get(self.url, params=self._params()) as response:
+            response.raise_for_status()
+            return self._parse(await response.json(content_type=None))
+
+    def _params(self) -> Optional[Dict[str, str]]:
+        return None
+
+    def _parse(self, data: Any) -> Dict[str, float]:
+        return _parse_prices(data)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class CoinGeckoPriceSource(HttpPriceSource):
+    """Live prices from CoinGecko's ``simple/price`` API, for the assets in ``ids``"""
+
+    def __init__(self, ids: Mapping[str, str], url: str = COINGECKO_URL, timeout: float = 10.0):
+        super().__init__(url, timeout)
+        # symbol -> CoinGecko coin id
+        self.ids = {symbol.upper(): coin for symbol, coin in ids.items()}
+
+    def _params(self) -> Dict[str, str]:
+        return {"ids": ",".join(sorted(set(self.ids.values()))), "vs_currencies": "usd"}
+
+    def _parse(self, data: Any) -> Dict[str, float]:
+        if not isinstance(data, dict):
+            raise ValueError("Unexpected CoinGecko response")
+        prices = {}
+        for symbol, coin in self.ids.items():
+            quote = data.get(coin)
+            if isinstance(quote, dict) and quote.get("usd") is not None:
+                prices[symbol] = float(quote["usd"])
+        return prices
+
+
+def create_price_source(
+    kind: str,
+    path: Optional[Path] = None,
+    url: Optional[str] = None,
+    ids: Optional[Mapping[str, str]] = None
+) -> Optional[PriceSource]:
+    """Build the configured price source; None for "none", which leaves every asset unpriced"""
+    if kind == "none":
+        return None
+    if kind == "coingecko":
+        return CoinGeckoPriceSource(ids or {}, url or COINGECKO_URL)
+    if kind == "http":
+        if not url:
+            raise ValueError("PRICE_SOURCE_URL is required for the http price source")
+        return HttpPriceSource(url)
+    if kind == "file":
+        if path is None:
+            raise ValueError("PRICE_FILE is required for the file price source")
+        return FilePriceSource(path)
+    raise ValueError(f"Unknown price source: {kind}")
+
+
+@dataclass(frozen=True)
+class PriceSnapshot:
+    """USD prices by (network, symbol), with the time they were fetched"""
+    prices: Dict[PriceKey, float]
+    fetched_at: Optional[float]  # time.monotonic(), None if never fetched
+    stale: bool
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the prices were fetched"""
+        if self.fetched_at is None:
+            return None
+        return time.monotonic() - self.fetched_at
+
+    def price(self, network: str, symbol: str) -> Optional[float]:
+        """USD price of an asset on a network, or None if it has none"""
+        return self.prices.get((network, symbol.upper()))
+
+
+class PriceCache:
+    """Keeps the latest prices in memory, refreshed in the background"""
+
+    def __init__(
+        self,
+        source: Optional[PriceSource],
+        refresh_interval: float = 60.0,
+        max_age: float = 600.0,
+        networks: Iterable[str] = ("mainnet",)
+    ):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.networks = tuple(networks)  # where the source's prices apply
+
+        self._prices: Dict[PriceKey, float] = {}
+        self._fetched_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Start the refresh loop on the running event loop, if there is one and a source is configured"""
+        if self.source is not None and (self._task is None or self._task.done()):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the refresh loop and close the source"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.source is not None:
+            await self.source.close()
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            self._wakeup.clear()
+            await wait_event(self._wakeup, self.refresh_interval)
+
+    async def refresh(self) -> Dict[PriceKey, float]:
+        """Fetch new prices from the source, keeping the previous ones on failure"""
+        if self.source is None:
+            return self._prices
+        try:
+            quotes = await self.source.fetch()
+        except (OSError, ValueError, TypeError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Price refresh failed: {e}")
+            return self._prices
+        prices = {(network, symbol): price for network in self.networks for symbol, price in quotes.items()}
+        # Replaced whole, so readers holding the previous dict see a consistent set
+        self._prices = prices
+        self._fetched_at = time.monotonic()
+        return prices
+
+    def snapshot(self) -> PriceSnapshot:
+        """Current prices; stale or missing prices trigger a refresh"""
+        self.start()
+
+        fetched_at = self._fetched_at
+        stale = fetched_at is None or time.monotonic() - fetched_at > self.max_age
+        CACHE_LOOKUPS.inc(cache="prices", result="miss" if stale else "hit")
+        if stale and self._wakeup is not None:
+            self._wakeup.set()
+        return PriceSnapshot(self._prices, fetched_at, stale)
@@ -0,0 +1,391 @@
+"""
+Pooled JSON-RPC access to several endpoints per network
+
+Every network, looked up by name or chain ID, has one or more endpoints. Each
+endpoint keeps its own keep-alive ``JsonRpcClient``. Requests go to the
+endpoint with the lowest recent p95 latency. An endpoint that keeps failing is
+taken out of rotation by a circuit breaker until a cooldown passes. A
+background health check re-measures every endpoint, checks it serves the
+expected chain and deprioritizes endpoints that lag behind the head.
+
+Read-only requests are hedged: when the first endpoint has not answered within
+its p95 latency, the same request also goes to the next endpoint and the first
+answer wins. Writes go to one endpoint at a time and only fail over on errors.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Mapping, Optional, Union
+from urllib.parse import urlsplit
+
+from app.core.metrics import RPC_HEDGES, RPC_REQUESTS
+from app.services.rpc_client import JsonRpcClient, RpcCall, RpcError
+
+logger = logging.getLogger(__name__)
+
+# Chain IDs of well-known networks, so pools can be addressed by chain ID before the first health check
+KNOWN_CHAIN_IDS: Dict[str, int] = {
+    "mainnet": 1,
+    "optimism": 10,
+    "bsc": 56,
+    "polygon": 137,
+    "base": 8453,
+    "arbitrum": 42161,
+    "holesky": 17000,
+    "sepolia": 11155111,
+}
+
+# Methods with side effects are never sent to two endpoints at once
+NON_IDEMPOTENT_METHODS = frozenset({
+    "eth_sendRawTransaction",
+    "eth_sendTransaction",
+    "eth_sign",
+    "eth_signTransaction",
+    "personal_sign",
+})
+
+
+class Endpoint:
+    """One JSON-RPC URL with its latency window and circuit breaker"""
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 10.0,
+        pool_size: int = 32,
+        latency_window: int = 100,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0
+    ):
+        self.url = url
+        # Host only: URL paths often carry API keys
+        self.name = urlsplit(url).netloc or url
+        self.client = JsonRpcClient(url, timeout=timeout, pool_size=pool_size)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._p95: Optional[float] = None
+        self.failures = 0
+        self.open_until = 0.0
+        self.block_number: Optional[int] = None
+        self.chain_id: Optional[int] = None
+        self.lagging = False
+        self.disabled = False  # serves a different chain than configured
+
+    @property
+    def p95(self) -> Optional[float]:
+        """95th percentile of recent latencies, None before the first sample"""
+        if self._p95 is None and self._latencies:
+            ordered = sorted(self._latencies)
+            self._p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return self._p95
+
+    @property
+    def circuit_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    def record_latency(self, elapsed: float):
+        self._latencies.append(elapsed)
+        self._p95 = None
+
+    def record_success(self, elapsed: float):
+        self.record_latency(elapsed)
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self) -> bool:
+        """Count a failed request; returns True when this opens the circuit"""
+        self.failures += 1
+        if self.failures < self.failure_threshold:
+            return False
+        # Past the cooldown the next request is a trial; another failure re-opens straight away
+        self.open_until = time.monotonic() + self.cooldown
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95
+        return {
+            "endpoint": self.name,
+            "p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+            "circuit": "open" if self.circuit_open else "closed",
+            "failures": self.failures,
+            "block_number": self.block_number,
+            "lagging": self.lagging,
+            "disabled": self.disabled
+        }
+
+
+class NetworkPool:
+    """Endpoints of one network, with the same call/batch interface as JsonRpcClient"""
+
+    def __init__(
+        self,
+        network: str,
+        endpoints: List[Endpoint],
+        chain_id: Optional[int] = None,
+        hedge_delay: float = 0.25,
+        hedge_min_delay: float = 0.05
+    ):
+        self.network = network
+        self.endpoints = endpoints
+        self.chain_id = chain_id
+        self.hedge_delay = hedge_delay
+        self.hedge_min_delay = hedge_min_delay
+
+    def ranked(self) -> List[Endpoint]:
+        """Endpoints in the order requests should try them"""
+        usable = [endpoint for endpoint in self.endpoints if not endpoint.disabled]
+        closed = [endpoint for endpoint in usable if not endpoint.circuit_open]
+        if not closed:
+            # Every breaker is open: try the ones due to close first rather than failing outright
+            return sorted(usable, key=lambda endpoint: endpoint.open_until)
+        # Unmeasured endpoints sort first so they get measured
+        return sorted(closed, key=lambda endpoint: (endpoint.lagging, endpoint.p95 or 0.0))
+
+    def _hedge_after(self, endpoint: Endpoint) -> float:
+        """How long to wait for an endpoint before hedging to the next one"""
+        p95 = endpoint.p95
+        return max(self.hedge_min_delay, p95 if p95 is not None else self.hedge_delay)
+
+    async def call(self, method: str, params=()) -> Any:
+        """Send one JSON-RPC call to the best endpoint and return its result"""
+        return await self._send(
+            lambda client: client.call(method, params),
+            hedge=method not in NON_IDEMPOTENT_METHODS
+        )
+
+    async def batch(self, calls: List[RpcCall]) -> List[Union[Any, RpcError]]:
+        """Send calls as one batch request; failed calls are returned as RpcError instances"""
+        if not calls:
+            return []
+        return await self._send(
+            lambda client: client.batch(calls),
+            hedge=all(method not in NON_IDEMPOTENT_METHODS for method, _ in calls)
+        )
+
+    async def _send(self, request: Callable[[JsonRpcClient], Awaitable[Any]], hedge: bool) -> Any:
+        candidates = iter(self.ranked())
+        attempts: Dict[asyncio.Future, Endpoint] = {}
+        started: Dict[asyncio.Future, float] = {}
+        last_error: Optional[RpcError] = None
+
+        def launch() -> bool:
+            endpoint = next(candidates, None)
+            if endpoint is None:
+                return False
+            attempt = asyncio.ensure_future(request(endpoint.client))
+            attempts[attempt] = endpoint
+            started[attempt] = time.monotonic()
+            return True
+
+        if not launch():
+            raise RpcError(f"No endpoints configured for network: {self.network}")
+
+        try:
+            while attempts:
+                primary = next(iter(attempts.values()))
+                timeout = self._hedge_after(primary) if hedge else None
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than usual: ask the next endpoint too and take whichever answers first
+                    if launch():
+                        RPC_HEDGES.inc(network=self.network)
+                    else:
+                        hedge = False
+                    continue
+
+                for attempt in done:
+                    endpoint = attempts.pop(attempt)
+                    elapsed = time.monotonic() - started.pop(attempt)
+                    try:
+                        result = attempt.result()
+                    except RpcError as e:
+                        if e.code is not None:
+                            # The node answered with a JSON-RPC error; another endpoint would say the same
+                            endpoint.record_success(elapsed)
+                            RPC_REQUESTS.inc(network=self.network, endpoint=endpoint.name, outcome="ok")
+                            raise
+                        last_error = e
+                        RPC_REQUESTS.inc(network=self.network, endpoint=endpoint.name, outcome="error")
+                        if endpoint.record_failure():
+                            logger.warning(
+                                f"Circuit opened for {self.network} endpoint {endpoint.name} "
+                                f"after {endpoint.failures} failures: {e}"
+                            )
+                        continue
+                    endpoint.record_success(elapsed)
+                    RPC_REQUESTS.inc(network=self.network, endpoint=endpoint.name, outcome="ok")
+                    return result
+
+                # Fail over once nothing else is in flight
+                if not attempts and not launch():
+                    break
+            raise last_error or RpcError(f"All endpoints failed for network: {self.network}")
+        finally:
+            for attempt, endpoint in attempts.items():
+                if attempt.done():
+                    if not attempt.cancelled():
+                        attempt.exception()
+                    continue
+                attempt.cancel()
+                # A hedged loser took at least this long; keeps its p95 honest
+                endpoint.record_latency(time.monotonic() - started[attempt])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chain_id": self.chain_id,
+            "endpoints": [endpoint.stats() for endpoint in self.endpoints]
+        }
+
+
+class ProviderPool(Mapping[str, NetworkPool]):
+    """Network pools by name, also reachable by chain ID, with a background health check"""
+
+    def __init__(
+        self,
+        endpoints: Dict[str, List[str]],
+        timeout: float = 10.0,
+        pool_size: int = 32,
+        latency_window: int = 100,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        hedge_delay: float = 0.25,
+        hedge_min_delay: float = 0.05,
+        health_interval: float = 15.0,
+        max_block_lag: int = 5
+    ):
+        self.health_interval = health_interval
+        self.max_block_lag = max_block_lag
+        self._pools: Dict[str, NetworkPool] = {}
+        self._chain_ids: Dict[int, str] = {}
+
+        for network, urls in endpoints.items():
+            if not urls:
+                continue
+            pool = NetworkPool(
+                network,
+                [
+                    Endpoint(
+                        url,
+                        timeout=timeout,
+                        pool_size=pool_size,
+                        latency_window=latency_window,
+                        failure_threshold=failure_threshold,
+                        cooldown=cooldown
+                    )
+                    for url in urls
+                ],
+                chain_id=KNOWN_CHAIN_IDS.get(network),
+                hedge_delay=hedge_delay,
+                hedge_min_delay=hedge_min_delay
+            )
+            self._pools[network] = pool
+            if pool.chain_id is not None:
+                self._chain_ids[pool.chain_id] = network
+
+        self._task: Optional[asyncio.Task] = None
+
+    def resolve(self, key: Union[str, int]) -> Optional[str]:
+        """Network name for a name or chain ID (decimal or hex), None if not configured"""
+        if isinstance(key, str) and key in self._pools:
+            return key
+        try:
+            chain_id = key if isinstance(key, int) else int(key, 0)
+        except (TypeError, ValueError):
+            return None
+        return self._chain_ids.get(chain_id)
+
+    def __getitem__(self, key: Union[str, int]) -> NetworkPool:
+        network = self.resolve(key)
+        if network is None:
+            raise KeyError(key)
+        return self._pools[network]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._pools)
+
+    def __len__(self) -> int:
+        return len(self._pools)
+
+    def chain_id(self, network: str) -> Optional[int]:
+        pool = self.get(network)
+        return pool.chain_id if pool else None
+
+    async def check(self):
+        """Measure every endpoint once and update routing state"""
+        await asyncio.gather(*(
+            self._check_endpoint(pool, endpoint)
+            for pool in self._pools.values()
+            for endpoint in pool.endpoints
+        ))
+        for pool in self._pools.values():
+            heights = [e.block_number for e in pool.endpoints if e.block_number is not None and not e.circuit_open]
+            head = max(heights, default=None)
+            for endpoint in pool.endpoints:
+                endpoint.lagging = (
+                    head is not None and endpoint.block_number is not None
+                    and head - endpoint.block_number > self.max_block_lag
+                )
+
+    async def _check_endpoint(self, pool: NetworkPool, endpoint: Endpoint):
+        start = time.monotonic()
+        try:
+            chain_id, block_number = await endpoint.client.batch([("eth_chainId", []), ("eth_blockNumber", [])])
+            for result in (chain_id, block_number):
+                if isinstance(result, RpcError):
+                    raise result
+            # A garbled reply, e.g. a null block number, fails this endpoint rather than the whole check
+            chain_id, block_number = int(chain_id, 16), int(block_number, 16)
+        except (RpcError, ValueError, TypeError) as e:
+            if endpoint.record_failure():
+                logger.warning(f"Health check opened circuit for {pool.network} endpoint {endpoint.name}: {e}")
+            return
+
+        # A successful check closes an open circuit, acting as its trial request
+        endpoint.record_success(time.monotonic() - start)
+        endpoint.block_number = block_number
+        endpoint.chain_id = chain_id
+        if pool.chain_id is None:
+            pool.chain_id = endpoint.chain_id
+            self._chain_ids.setdefault(endpoint.chain_id, pool.network)
+        if endpoint.chain_id != pool.chain_id and not endpoint.disabled:
+            logger.error(
+                f"{pool.network} endpoint {endpoint.name} serves chain {endpoint.chain_id}, "
+                f"expected {pool.chain_id}; taking it out of rotation"
+            )
+        endpoint.disabled = endpoint.chain_id != pool.chain_id
+
+    def start(self):
+        """Start the health check loop on the running event loop"""
+        if self._pools and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Provider health check failed: {e}")
+            await asyncio.sleep(self.health_interval)
+
+    async def stop(self):
+        """Stop the health check loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def close(self):
+        """Stop health checks and close every endpoint's connection pool"""
+        await self.stop()
+        for pool in self._pools.values():
+            for endpoint in pool.endpoints:
+                await endpoint.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {network: pool.stats() for network, pool in self._pools.items()}
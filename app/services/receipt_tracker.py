@@ -0,0 +1,238 @@
+"""
+Background tracking of submitted transactions
+
+One loop polls receipts for every pending transaction across all sessions.
+Each poll is a single JSON-RPC batch per network (``eth_blockNumber`` plus one
+``eth_getTransactionReceipt`` per hash, chunked), so RPC volume grows with the
+number of batches rather than the number of sessions. The loop sleeps until the
+next block is expected, learning the block time from the block numbers it
+sees, and backs off exponentially while the node is failing.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from app.models.schemas import TransactionConfirmation
+from app.services.provider_pool import NetworkPool
+from app.services.rpc_client import RpcError
+from app.utils.helpers import wait_event
+
+logger = logging.getLogger(__name__)
+
+GWEI = 10 ** 9
+
+
+@dataclass
+class TrackedTransaction:
+    """A submitted transaction waiting for its receipt"""
+    tx_hash: str
+    network: str
+    address: Optional[str] = None
+    session_id: Optional[str] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _NetworkState:
+    block_number: Optional[int] = None
+    block_seen_at: Optional[float] = None
+    block_time: float = 12.0
+    failures: int = 0
+    next_poll: float = 0.0
+
+
+ReceiptCallback = Callable[[TrackedTransaction, TransactionConfirmation], Awaitable[None]]
+
+
+def confirmation_from_receipt(tracked: TrackedTransaction, receipt: Dict[str, Any]) -> TransactionConfirmation:
+    """Build the stored confirmation for a mined transaction"""
+    gas_price = receipt.get("effectiveGasPrice") or "0x0"
+    return TransactionConfirmation(
+        tx_hash=tracked.tx_hash,
+        status="confirmed" if receipt.get("status") == "0x1" else "failed",
+        gas_used=float(int(receipt.get("gasUsed") or "0x0", 16)),
+        gas_price=int(gas_price, 16) / GWEI,
+        address=tracked.address,
+        network=tracked.network
+    )
+
+
+class ReceiptTracker:
+    """Polls receipts for pending transactions of all sessions in one batched loop"""
+
+    def __init__(
+        self,
+        providers: Mapping[str, NetworkPool],
+        on_receipt: ReceiptCallback,
+        block_time: float = 12.0,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        max_batch: int = 200
+    ):
+        self.providers = providers
+        self.on_receipt = on_receipt
+        self.initial_block_time = block_time
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_batch = max_batch
+
+        self._pending: Dict[str, Dict[str, TrackedTransaction]] = {}
+        self._networks: Dict[str, _NetworkState] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.polls = 0
+
+    def __len__(self) -> int:
+        return sum(len(pending) for pending in self._pending.values())
+
+    def __contains__(self, tx_hash: str) -> bool:
+        return any(tx_hash.lower() in pending for pending in self._pending.values())
+
+    def track(self, tracked: TrackedTransaction):
+        """Start watching a transaction; the next poll includes it"""
+        if tracked.network not in self.providers:
+            raise ValueError(f"No node configured for network: {tracked.network}")
+        self._pending.setdefault(tracked.network, {})[tracked.tx_hash.lower()] = tracked
+        state = self._networks.setdefault(tracked.network, _NetworkState(block_time=self.initial_block_time))
+        # A new hash is worth one prompt poll rather than waiting out a backoff
+        state.next_poll = min(state.next_poll, time.monotonic() + self.min_interval)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def untrack(self, tx_hash: str, network: str) -> Optional[TrackedTransaction]:
+        """Stop watching a transaction"""
+        return self._pending.get(network, {}).pop(tx_hash.lower(), None)
+
+    def block_time(self, network: str) -> Optional[float]:
+        """Current block time estimate for a network"""
+        state = self._networks.get(network)
+        return state.block_time if state else None
+
+    def start(self):
+        """Start the poll loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the poll loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                now = time.monotonic()
+                due = [
+                    network for network, pending in self._pending.items()
+                    if pending and self._networks[network].next_poll <= now
+                ]
+                if due:
+                    results = await asyncio.gather(*(self.poll(network) for network in due), return_exceptions=True)
+                    for network, result in zip(due, results):
+                        if isinstance(result, Exception):
+                            # e.g. a malformed node reply; the network backs off and its transactions stay pending
+                            delay = self._back_off(self._networks[network])
+                            logger.error(f"Receipt poll for {network} failed: {result!r}; retrying in {delay:.1f}s")
+
+                self._wakeup.clear()
+                delay = self._next_delay()
+            except Exception as e:
+                logger.error(f"Receipt tracker iteration failed: {e!r}")
+                delay = self.min_interval
+            await wait_event(self._wakeup, delay)
+
+    def _next_delay(self) -> Optional[float]:
+        """Seconds until the earliest network poll is due, or None when idle"""
+        due_times = [
+            self._networks[network].next_poll
+            for network, pending in self._pending.items() if pending
+        ]
+        if not due_times:
+            return None
+        return max(0.0, min(due_times) - time.monotonic())
+
+    async def poll(self, network: str) -> int:
+        """Fetch receipts for one network's pending transactions; returns how many were mined"""
+        pending = self._pending.get(network)
+        state = self._networks[network]
+        if not pending:
+            return 0
+
+        client = self.providers[network]
+        hashes = list(pending)
+        mined = 0
+        try:
+            for start in range(0, len(hashes), self.max_batch):
+                chunk = hashes[start:start + self.max_batch]
+                calls = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in chunk]
+                if start == 0:
+                    calls.insert(0, ("eth_blockNumber", []))
+                results = await client.batch(calls)
+                self.polls += 1
+                if start == 0:
+                    self._observe_block(state, results.pop(0))
+                deliveries = []
+                for tx_hash, receipt in zip(chunk, results):
+                    if isinstance(receipt, RpcError) or not receipt:
+                        continue
+                    tracked = pending.pop(tx_hash, None)
+                    if tracked is None:
+                        continue
+                    deliveries.append(self._deliver(tracked, receipt))
+                # Delivered together so the confirmations of one poll share a store commit
+                await asyncio.gather(*deliveries)
+                mined += len(deliveries)
+        except RpcError as e:
+            delay = self._back_off(state)
+            logger.warning(f"Receipt poll for {network} failed ({e}); retrying in {delay:.1f}s")
+            return mined
+
+        state.failures = 0
+        state.next_poll = self._schedule(state)
+        return mined
+
+    def _back_off(self, state: _NetworkState) -> float:
+        """Push a failing network's next poll back exponentially; returns the delay"""
+        state.failures += 1
+        delay = min(self.max_interval, state.block_time * (2 ** state.failures))
+        state.next_poll = time.monotonic() + delay
+        return delay
+
+    def _observe_block(self, state: _NetworkState, result: Any):
+        """Update the block time estimate from a fresh block number"""
+        if isinstance(result, RpcError) or result is None:
+            return
+        number = int(result, 16)
+        now = time.monotonic()
+        if state.block_number is not None and number > state.block_number and state.block_seen_at is not None:
+            observed = (now - state.block_seen_at) / (number - state.block_number)
+            # Smooth the estimate; one poll only bounds when the block arrived
+            state.block_time = 0.5 * state.block_time + 0.5 * observed
+        if state.block_number is None or number > state.block_number:
+            state.block_number = number
+            state.block_seen_at = now
+
+    def _schedule(self, state: _NetworkState) -> float:
+        """Time of the next poll: just after the next block is expected"""
+        now = time.monotonic()
+        if state.block_seen_at is None:
+            delay = state.block_time
+        else:
+            expected = state.block_seen_at + state.block_time
+            # Block is overdue: check again at a fraction of the block time
+            delay = expected - now if expected > now else state.block_time / 4
+        return now + min(self.max_interval, max(self.min_interval, delay))
+
+    async def _deliver(self, tracked: TrackedTransaction, receipt: Dict[str, Any]):
+        try:
+            await self.on_receipt(tracked, confirmation_from_receipt(tracked, receipt))
+        except Exception as e:
+            logger.error(f"Failed to record receipt for {tracked.tx_hash}: {e}")
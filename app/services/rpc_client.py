@@ -0,0 +1,102 @@
+"""
+Async JSON-RPC client for Ethereum nodes
+
+Shares one keep-alive aiohttp connection pool and can send many calls as a
+single JSON-RPC batch request.
+"""
+import asyncio
+import itertools
+import logging
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+RpcCall = Tuple[str, Sequence[Any]]
+
+
+class RpcError(Exception):
+    """Raised when a node returns an error or cannot be reached"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class JsonRpcClient:
+    """Pooled JSON-RPC client with batch support"""
+
+    def __init__(self, url: str, timeout: float = 10.0, pool_size: int = 32):
+        self.url = url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ids = itertools.count(1)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the shared session on first use, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def _post(self, payload: Any) -> Any:
+        try:
+            async with self._get_session().post(self.url, json=payload) as response:
+                if response.status != 200:
+                    raise RpcError(f"Node returned HTTP {response.status}")
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RpcError(f"Node request failed: {e!r}")
+
+    async def call(self, method: str, params: Sequence[Any] = ()) -> Any:
+        """Send one JSON-RPC call and return its result"""
+        reply = await self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)})
+        return self._result(reply)
+
+    async def batch(self, calls: List[RpcCall]) -> List[Union[Any, RpcError]]:
+        """Send calls as one batch request; failed calls are returned as RpcError instances"""
+        if not calls:
+            return []
+
+        first_id = next(self._ids)
+        ids = [first_id] + [next(self._ids) for _ in calls[1:]]
+        payload = [
+            {"jsonrpc": "2.0", "id": call_id, "method": method, "params": list(params)}
+            for call_id, (method, params) in zip(ids, calls)
+        ]
+        replies = await self._post(payload)
+        if not isinstance(replies, list):
+            # Some nodes answer a rejected batch with a single error object
+            raise RpcError(f"Batch rejected: {replies.get('error') if isinstance(replies, dict) else replies}")
+
+        by_id = {reply.get("id"): reply for reply in replies}
+        results: List[Union[Any, RpcError]] = []
+        for call_id in ids:
+            reply = by_id.get(call_id)
+            if reply is None:
+                results.append(RpcError("Missing reply in batch response"))
+                continue
+            try:
+                results.append(self._result(reply))
+            except RpcError as e:
+                results.append(e)
+        return results
+
+    @staticmethod
+    def _result(reply: Any) -> Any:
+        if not isinstance(reply, dict):
+            raise RpcError(f"Malformed reply: {reply!r}")
+        if reply.get("error"):
+            error = reply["error"]
+            raise RpcError(str(error.get("message", error)), code=error.get("code"))
+        return reply.get("result")
+
+    async def close(self):
+        """Close the shared connection pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
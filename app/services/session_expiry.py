@@ -0,0 +1,75 @@
+"""
+Session expiry tracking
+
+A lazy-deletion min-heap of session deadlines. Touching a session only
+records its last activity time, so it costs O(1). The heap entry is checked
+when its original deadline comes up: if the session was active since then
+it is pushed back with its new deadline, otherwise it expires. Each session
+has one live entry, whose deadline is remembered; entries left behind by
+``remove`` and a later ``add`` are dropped when they surface instead of being
+pushed back. A sweep therefore only does work for sessions whose deadline
+has passed, and the heap holds at most one entry per tracked session plus
+the removed ones still waiting to surface.
+"""
+import heapq
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class SessionExpiryQueue:
+    """Tracks session inactivity deadlines"""
+
+    def __init__(self, timeout: float, clock: Callable[[], float] = time.monotonic):
+        self.timeout = timeout
+        self.clock = clock
+        self._heap: List[Tuple[float, str]] = []
+        self._last_active: Dict[str, float] = {}
+        # Deadline of each session's live heap entry
+        self._queued: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._last_active)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._last_active
+
+    def add(self, session_id: str):
+        """Start tracking a session"""
+        now = self.clock()
+        self._last_active[session_id] = now
+        self._queued[session_id] = now + self.timeout
+        heapq.heappush(self._heap, (now + self.timeout, session_id))
+
+    def touch(self, session_id: str):
+        """Record activity on a session"""
+        if session_id in self._last_active:
+            self._last_active[session_id] = self.clock()
+
+    def remove(self, session_id: str):
+        """Stop tracking a session; its heap entry is discarded when it surfaces"""
+        self._last_active.pop(session_id, None)
+        self._queued.pop(session_id, None)
+
+    def last_active(self, session_id: str) -> Optional[float]:
+        return self._last_active.get(session_id)
+
+    def pop_expired(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return every session whose inactivity deadline has passed"""
+        now = self.clock() if now is None else now
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            queued, session_id = heapq.heappop(heap)
+            if self._queued.get(session_id) != queued:
+                # Removed, or superseded by the entry of a later add
+                continue
+
+            deadline = self._last_active[session_id] + self.timeout
+            if deadline <= now:
+                del self._last_active[session_id]
+                del self._queued[session_id]
+                expired.append(session_id)
+            else:
+                self._queued[session_id] = deadline
+                heapq.heappush(heap, (deadline, session_id))
+        return expired
@@ -0,0 +1,532 @@
+"""
+Session storage backends
+
+``InMemorySessionStore`` keeps sessions in a per-process dict.
+``TieredSessionStore`` is the default: a per-process hot tier bounded by a
+memory budget, spilling least recently used and idle sessions to a local
+SQLite file and restoring them on access. ``SQLiteSessionStore`` keeps every
+session in a SQLite database in WAL mode, so sessions survive a restart of
+the server. Its states are stored in a compact binary encoding. Its calls run
+on the event loop, so the connection waits at most ``busy_timeout`` for
+another connection to the file, such as a backup, before failing.
+
+Every backend is used by a single server process, which owns the
+transaction log, and requests on a session are serialized by an in-process
+lock.
+"""
+import asyncio
+import io
+import logging
+import pickle
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from app.models.schemas import TransactionConfirmation, WalletState
+from app.services.session_expiry import SessionExpiryQueue
+
+logger = logging.getLogger(__name__)
+
+CODEC_VERSION = 1
+
+# (session ID, address, network, balance items) of one session
+Holding = Tuple[str, str, str, Tuple[Tuple[str, float], ...]]
+
+
+# ----------------------------------------------------------------------
+# Binary encoding of WalletState
+# ----------------------------------------------------------------------
+
+class _PrimitiveUnpickler(pickle.Unpickler):
+    """Unpickler that refuses to load anything but builtin primitives"""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name}")
+
+
+def _encode_tx(tx: TransactionConfirmation) -> tuple:
+    return (tx.tx_hash, tx.status, tx.timestamp.timestamp(), tx.gas_used, tx.gas_price, tx.address, tx.network)
+
+
+def _decode_tx(data: tuple) -> TransactionConfirmation:
+    # Sessions written before network was recorded have six fields
+    tx_hash, status, timestamp, gas_used, gas_price, address, *rest = data
+    return TransactionConfirmation.model_construct(
+        tx_hash=tx_hash,
+        status=status,
+        timestamp=datetime.fromtimestamp(timestamp),
+        gas_used=gas_used,
+        gas_price=gas_price,
+        address=address,
+        network=rest[0] if rest else None
+    )
+
+
+def _state_fields(state: WalletState) -> tuple:
+    """A WalletState as plain tuples: address, network, balance, pending, history"""
+    return (
+        state.address,
+        state.network,
+        tuple(state.balance.items()),
+        tuple(_encode_tx(tx) for tx in state.pending_transactions),
+        tuple(_encode_tx(tx) for tx in state.transaction_history)
+    )
+
+
+def _state_from_fields(address, network, balance, pending, history) -> WalletState:
+    return WalletState.model_construct(
+        address=address,
+        network=network,
+        balance=dict(balance),
+        pending_transactions=[_decode_tx(tx) for tx in pending],
+        transaction_history=[_decode_tx(tx) for tx in history]
+    )
+
+
+def _dump_fields(fields: tuple) -> bytes:
+    return pickle.dumps((CODEC_VERSION,) + fields, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_fields(blob: bytes) -> tuple:
+    version, *fields = _PrimitiveUnpickler(io.BytesIO(blob)).load()
+    if version != CODEC_VERSION:
+        raise ValueError(f"Unsupported session encoding version: {version}")
+    return tuple(fields)
+
+
+def encode_wallet_state(state: WalletState) -> bytes:
+    """Serialize a WalletState as a pickle of plain tuples"""
+    return _dump_fields(_state_fields(state))
+
+
+def decode_wallet_state(blob: bytes) -> WalletState:
+    """Inverse of encode_wallet_state"""
+    return _state_from_fields(*_load_fields(blob))
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+
+class SessionStore(ABC):
+    """Storage backend for wallet sessions"""
+
+    def __init__(self):
+        # Lock per session, held while a request works on it
+        self._local_locks: Dict[str, asyncio.Lock] = {}
+        self._lock_waiters: Dict[str, int] = {}
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[WalletState]:
+        """Return a session and record activity on it"""
+
+    @abstractmethod
+    def put(self, session_id: str, state: WalletState):
+        """Create or replace a session"""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Remove a session"""
+
+    @abstractmethod
+    def expire(self) -> List[str]:
+        """Remove and return sessions past the inactivity timeout"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of active sessions"""
+
+    @abstractmethod
+    def holdings(self) -> Iterator[Holding]:
+        """Balances of every active session, without building WalletState models"""
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for the stats endpoint"""
+        return {"sessions": len(self)}
+
+    def close(self):
+        """Release backend resources"""
+
+    @asynccontextmanager
+    async def lock(self, session_id: str) -> AsyncIterator[None]:
+        """Hold a session exclusively while a request reads and updates it"""
+        local = self._local_locks.setdefault(session_id, asyncio.Lock())
+        self._lock_waiters[session_id] = self._lock_waiters.get(session_id, 0) + 1
+        try:
+            async with local:
+                yield
+        finally:
+            self._lock_waiters[session_id] -= 1
+            if not self._lock_waiters[session_id]:
+                del self._lock_waiters[session_id]
+                del self._local_locks[session_id]
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process session dict with heap-based expiry"""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self._sessions: Dict[str, WalletState] = {}
+        self._expiry = SessionExpiryQueue(timeout)
+
+    def get(self, session_id: str) -> Optional[WalletState]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._expiry.touch(session_id)
+        return session
+
+    def put(self, session_id: str, state: WalletState):
+        if session_id not in self._expiry:
+            self._expiry.add(session_id)
+        self._sessions[session_id] = state
+
+    def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self._expiry.remove(session_id)
+
+    def expire(self) -> List[str]:
+        expired = self._expiry.pop_expired()
+        for session_id in expired:
+            self._sessions.pop(session_id, None)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def holdings(self) -> Iterator[Holding]:
+        for session_id, state in list(self._sessions.items()):
+            yield session_id, state.address, state.network, tuple(state.balance.items())
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions kept across restarts in a WAL-mode SQLite database"""
+
+    def __init__(self, path: Path, timeout: float, busy_timeout: float = 0.05):
+        super().__init__()
+        self.path = path
+        self.timeout = timeout
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A short busy timeout bounds how long another connection to the file can stall the event loop
+        self._conn = sqlite3.connect(str(path), timeout=busy_timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                state BLOB NOT NULL,
+                last_active REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active);
+        """)
+
+    def get(self, session_id: str) -> Optional[WalletState]:
+        now = time.time()
+        with self._conn:
+            self._conn.execute("BEGIN")
+            updated = self._conn.execute(
+                "UPDATE sessions SET last_active = ? WHERE session_id = ? AND last_active >= ?",
+                (now, session_id, now - self.timeout)
+            ).rowcount
+            if not updated:
+                return None
+            row = self._conn.execute(
+                "SELECT state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        try:
+            return decode_wallet_state(row[0])
+        except (ValueError, pickle.UnpicklingError) as e:
+            logger.error(f"Could not decode session {session_id}: {e}")
+            return None
+
+    def put(self, session_id: str, state: WalletState):
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, state, last_active) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, last_active = excluded.last_active",
+            (session_id, encode_wallet_state(state), time.time())
+        )
+
+    def delete(self, session_id: str):
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def expire(self) -> List[str]:
+        cutoff = time.time() - self.timeout
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT session_id FROM sessions WHERE last_active < ?", (cutoff,)
+            )]
+            self._conn.execute("DELETE FROM sessions WHERE last_active < ?", (cutoff,))
+        return expired
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def holdings(self) -> Iterator[Holding]:
+        rows = self._conn.execute(
+            "SELECT session_id, state FROM sessions WHERE last_active >= ?", (time.time() - self.timeout,)
+        ).fetchall()
+        for session_id, blob in rows:
+            try:
+                address, network, balance, *_ = _load_fields(blob)
+            except (ValueError, pickle.UnpicklingError) as e:
+                logger.error(f"Could not decode session {session_id}: {e}")
+                continue
+            yield session_id, address, network, balance
+
+    def close(self):
+        self._conn.close()
+
+
+class _HotSession:
+    """Hot-tier session held as the codec's tuples rather than Pydantic models"""
+    __slots__ = ("fields", "size", "last_active")
+
+    def __init__(self, fields: tuple, last_active: float):
+        self.fields = fields
+        self.size = _estimate_size(fields)
+        self.last_active = last_active  # wall clock, carried into the cold tier
+
+
+# Resident sizes in bytes measured with tracemalloc, used to keep the hot tier within its budget
+_SESSION_OVERHEAD = 440
+_BALANCE_ENTRY_SIZE = 30
+_TX_SIZE = 130
+
+
+def _estimate_size(fields: tuple) -> int:
+    address, network, balance, pending, history = fields
+    return (
+        _SESSION_OVERHEAD + len(address) + len(network)
+        + _BALANCE_ENTRY_SIZE * len(balance)
+        + _TX_SIZE * (len(pending) + len(history))
+    )
+
+
+class TieredSessionStore(SessionStore):
+    """Memory-bounded hot tier over an on-disk cold tier, for a single process
+
+    Hot sessions are compact tuples in LRU order. When the hot tier exceeds
+    its byte budget, the least recently used sessions are spilled to SQLite.
+    Sessions idle past the inactivity timeout hibernate there instead of being
+    dropped. ``get`` restores a cold session into the hot tier. Cold sessions
+    are deleted after ``hibernate_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        timeout: float,
+        memory_budget: int = 64 * 1024 * 1024,
+        hibernate_ttl: float = 30 * 24 * 60 * 60
+    ):
+        super().__init__()
+        self.path = path
+        self.timeout = timeout
+        self.memory_budget = memory_budget
+        self.hibernate_ttl = hibernate_ttl
+
+        self._hot: "OrderedDict[str, _HotSession]" = OrderedDict()
+        self._hot_bytes = 0
+        self._expiry = SessionExpiryQueue(timeout)
+        self.spilled = 0
+        self.restored = 0
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cold_sessions (
+                session_id TEXT PRIMARY KEY,
+                state BLOB NOT NULL,
+                last_active REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cold_sessions_last_active ON cold_sessions (last_active);
+        """)
+
+    def get(self, session_id: str) -> Optional[WalletState]:
+        session = self._hot.get(session_id)
+        if session is None:
+            session = self._restore(session_id)
+            if session is None:
+                return None
+        else:
+            self._hot.move_to_end(session_id)
+        self._expiry.touch(session_id)
+        session.last_active = time.time()
+        return _state_from_fields(*session.fields)
+
+    def put(self, session_id: str, state: WalletState):
+        if session_id not in self._expiry:
+            self._expiry.add(session_id)
+        self._insert_hot(session_id, _HotSession(_state_fields(state), time.time()))
+        self._evict()
+
+    def delete(self, session_id: str):
+        session = self._hot.pop(session_id, None)
+        if session is not None:
+            self._hot_bytes -= session.size
+        self._expiry.remove(session_id)
+        self._conn.execute("DELETE FROM cold_sessions WHERE session_id = ?", (session_id,))
+
+    def expire(self) -> List[str]:
+        """Hibernate idle hot sessions; remove and return cold sessions past ``hibernate_ttl``"""
+        idle = self._expiry.pop_expired()
+        if idle:
+            self._spill(idle)
+            logger.debug(f"Hibernated {len(idle)} idle sessions")
+
+        cutoff = time.time() - self.hibernate_ttl
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT session_id FROM cold_sessions WHERE last_active < ?", (cutoff,)
+            )]
+            self._conn.execute("DELETE FROM cold_sessions WHERE last_active < ?", (cutoff,))
+        return expired
+
+    def __len__(self) -> int:
+        """Active sessions: hot ones and those spilled for memory, but not hibernated ones"""
+        return len(self._hot) + self._conn.execute(
+            "SELECT COUNT(*) FROM cold_sessions WHERE last_active >= ?", (time.time() - self.timeout,)
+        ).fetchone()[0]
+
+    def holdings(self) -> Iterator[Holding]:
+        """Balances of hot sessions and of cold ones spilled for memory while still active"""
+        for session_id, session in list(self._hot.items()):
+            address, network, balance, _, _ = session.fields
+            yield session_id, address, network, balance
+        # Hibernated sessions have been idle past the inactivity timeout and are left out
+        rows = self._conn.execute(
+            "SELECT session_id, state FROM cold_sessions WHERE last_active >= ?", (time.time() - self.timeout,)
+        ).fetchall()
+        for session_id, blob in rows:
+            if session_id in self._hot:
+                continue
+            try:
+                address, network, balance, *_ = _load_fields(blob)
+            except (ValueError, pickle.UnpicklingError) as e:
+                logger.error(f"Could not decode session {session_id}: {e}")
+                continue
+            yield session_id, address, network, balance
+
+    def cold_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM cold_sessions").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self),
+            "hot": len(self._hot),
+            "hot_bytes": self._hot_bytes,
+            "memory_budget": self.memory_budget,
+            "cold": self.cold_count(),
+            "spilled": self.spilled,
+            "restored": self.restored
+        }
+
+    def _insert_hot(self, session_id: str, session: _HotSession):
+        previous = self._hot.pop(session_id, None)
+        if previous is not None:
+            self._hot_bytes -= previous.size
+        self._hot[session_id] = session
+        self._hot_bytes += session.size
+
+    def _evict(self):
+        """Spill least recently used sessions until the hot tier fits its budget"""
+        if self._hot_bytes <= self.memory_budget or len(self._hot) <= 1:
+            return
+        # Spill down to 90% of the budget so a full tier does not write on every put
+        target = self.memory_budget * 0.9
+        victims = []
+        freed = 0
+        for session_id, session in self._hot.items():
+            if self._hot_bytes - freed <= target or len(victims) == len(self._hot) - 1:
+                break
+            victims.append(session_id)
+            freed += session.size
+        for session_id in victims:
+            self._expiry.remove(session_id)
+        self._spill(victims)
+
+    def _spill(self, session_ids: List[str]):
+        """Move sessions from the hot tier to the cold tier in one transaction"""
+        rows = []
+        for session_id in session_ids:
+            session = self._hot.pop(session_id, None)
+            if session is None:
+                continue
+            self._hot_bytes -= session.size
+            rows.append((session_id, _dump_fields(session.fields), session.last_active))
+        if not rows:
+            return
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO cold_sessions (session_id, state, last_active) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, last_active = excluded.last_active",
+                rows
+            )
+        self.spilled += len(rows)
+
+    def _restore(self, session_id: str) -> Optional[_HotSession]:
+        """Load a cold session back into the hot tier"""
+        with self._conn:
+            self._conn.execute("BEGIN")
+            row = self._conn.execute(
+                "SELECT state, last_active FROM cold_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM cold_sessions WHERE session_id = ?", (session_id,))
+        if row[1] < time.time() - self.hibernate_ttl:
+            return None
+        try:
+            session = _HotSession(_load_fields(row[0]), row[1])
+        except (ValueError, pickle.UnpicklingError) as e:
+            logger.error(f"Could not decode session {session_id}: {e}")
+            return None
+
+        self._expiry.add(session_id)
+        self._insert_hot(session_id, session)
+        self.restored += 1
+        self._evict()
+        return session
+
+    def close(self):
+        """Hibernate every hot session so sessions survive a restart, then close the database"""
+        self._spill(list(self._hot))
+        self._conn.close()
+
+
+def create_session_store(
+    backend: str,
+    timeout: float,
+    db_path: Path,
+    busy_timeout: float = 0.05,
+    cold_path: Optional[Path] = None,
+    memory_budget: int = 64 * 1024 * 1024,
+    hibernate_ttl: float = 30 * 24 * 60 * 60
+) -> SessionStore:
+    """Build the configured session backend"""
+    if backend == "memory":
+        return InMemorySessionStore(timeout)
+    if backend == "tiered":
+        return TieredSessionStore(
+            cold_path or db_path.with_name("sessions_cold.db"),
+            timeout,
+            memory_budget=memory_budget,
+            hibernate_ttl=hibernate_ttl
+        )
+    if backend == "sqlite":
+        return SQLiteSessionStore(db_path, timeout, busy_timeout=busy_timeout)
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -0,0 +1,110 @@
+"""
+Token metadata registry
+
+Assets per network are loaded once from a JSON file (``app/data/tokens.json``
+by default). Each has a contract address (null for the native asset),
+decimals and a typical transfer gas cost. Tokens are indexed by
+``(network, symbol)`` and ``(network, address)`` for O(1) lookups on the
+send and balance paths.
+"""
+import json
+import logging
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from eth_abi import encode
+from eth_utils import to_checksum_address
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_SELECTOR = bytes.fromhex("a9059cbb")  # transfer(address,uint256)
+
+
+@dataclass(frozen=True)
+class Token:
+    """An asset on one network; ``address`` is None for the native asset"""
+    network: str
+    symbol: str
+    address: Optional[str]
+    decimals: int
+    transfer_gas: int  # typical gas of a transfer to an externally owned account
+
+    @property
+    def is_native(self) -> bool:
+        return self.address is None
+
+    def to_base_units(self, amount: Union[float, str, Decimal]) -> int:
+        """Convert a display amount to integer base units, exactly"""
+        try:
+            units = Decimal(str(amount)).scaleb(self.decimals)
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount: {amount}")
+        if units != units.to_integral_value():
+            raise ValueError(f"{self.symbol} supports at most {self.decimals} decimal places")
+        return int(units)
+
+    def from_base_units(self, units: int) -> float:
+        return units / (10 ** self.decimals)
+
+
+def transfer_calldata(recipient: str, units: int) -> str:
+    """ABI-encoded ERC-20 ``transfer(recipient, units)`` call"""
+    return "0x" + (TRANSFER_SELECTOR + encode(["address", "uint256"], [recipient, units])).hex()
+
+
+class TokenRegistry:
+    """Tokens by (network, symbol) and (network, address)"""
+
+    def __init__(self, tokens: Iterable[Token]):
+        self._by_symbol: Dict[Tuple[str, str], Token] = {}
+        self._by_address: Dict[Tuple[str, str], Token] = {}
+        self._contracts: Dict[str, List[Token]] = {}
+        self._native: Dict[str, Token] = {}
+        for token in tokens:
+            self._by_symbol[(token.network, token.symbol)] = token
+            if token.address is None:
+                self._native[token.network] = token
+            else:
+                self._by_address[(token.network, token.address.lower())] = token
+                self._contracts.setdefault(token.network, []).append(token)
+
+    @classmethod
+    def load(cls, path: Path) -> "TokenRegistry":
+        """Read a {network: {symbol: {address, decimals, transfer_gas}}} file"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        tokens = []
+        for network, assets in data.items():
+            for symbol, meta in assets.items():
+                address = meta.get("address")
+                tokens.append(Token(
+                    network=network,
+                    symbol=symbol.upper(),
+                    address=to_checksum_address(address) if address else None,
+                    decimals=int(meta["decimals"]),
+                    transfer_gas=int(meta.get("transfer_gas") or (21000 if not address else 65000))
+                ))
+        registry = cls(tokens)
+        logger.info(f"Loaded {len(tokens)} tokens on {len(data)} networks from {path}")
+        return registry
+
+    def __len__(self) -> int:
+        return len(self._by_symbol)
+
+    def get(self, network: str, symbol: Optional[str]) -> Optional[Token]:
+        if not symbol:
+            return None
+        return self._by_symbol.get((network, symbol.upper()))
+
+    def by_address(self, network: str, address: str) -> Optional[Token]:
+        return self._by_address.get((network, address.lower()))
+
+    def native(self, network: str) -> Optional[Token]:
+        """The native asset of a network"""
+        return self._native.get(network)
+
+    def contracts(self, network: str) -> List[Token]:
+        """ERC-20 tokens of a network, in file order"""
+        return self._contracts.get(network, [])
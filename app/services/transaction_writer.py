@@ -0,0 +1,110 @@
+"""
+Write-behind persistence for transaction confirmations
+
+Callers hand confirmations to an in-memory queue and return immediately, or
+wait for their commit when they need durability. One background task drains
+the queue: everything waiting at that moment is committed as a single append
+and one fsync in a worker thread, so a burst of saves shares one write and the
+event loop never blocks on file I/O. A full queue makes callers wait instead
+of growing without bound, and ``close`` commits whatever is still queued.
+"""
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from app.core.metrics import STORE_COMMIT_BATCH, STORE_QUEUE_DEPTH
+from app.models.schemas import TransactionConfirmation
+from app.services.transaction_store import TransactionStore
+
+logger = logging.getLogger(__name__)
+
+_Pending = Tuple[TransactionConfirmation, Optional["asyncio.Future[None]"]]
+
+
+class TransactionWriter:
+    """Async write-behind queue that group-commits confirmations to a TransactionStore"""
+
+    def __init__(
+        self,
+        store: TransactionStore,
+        max_queue: int = 10000,
+        max_batch: int = 512,
+        fsync: bool = True
+    ):
+        self.store = store
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.fsync = fsync
+
+        self._queue: Optional["asyncio.Queue[_Pending]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self.commits = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the commit loop on the running event loop"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            STORE_QUEUE_DEPTH.set_function(lambda: len(self))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def save(self, tx: TransactionConfirmation, wait: bool = False):
+        """Queue a confirmation; with wait=True return only once it is committed, raising if the write failed"""
+        self.start()
+        future = asyncio.get_running_loop().create_future() if wait else None
+        # Blocks while the queue is full, pushing back on producers
+        await self._queue.put((tx, future))
+        if future is not None:
+            await future
+
+    async def flush(self):
+        """Wait until everything queued so far is committed"""
+        if self._queue is not None and self._task is not None:
+            await self._queue.join()
+
+    async def _run(self):
+        while True:
+            batch: List[_Pending] = [await self._queue.get()]
+            # Whatever queued up during the previous commit goes into this one
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit(self, batch: List[_Pending]):
+        STORE_COMMIT_BATCH.observe(len(batch))
+        try:
+            await asyncio.to_thread(self.store.save_many, [tx for tx, _ in batch], self.fsync)
+        except Exception as e:
+            logger.error(f"Failed to commit {len(batch)} transactions: {e}")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        self.commits += 1
+        for _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    async def close(self):
+        """Commit everything still queued, then stop the commit loop"""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        STORE_QUEUE_DEPTH.set_function(None)
@@ -0,0 +1,148 @@
+"""
+Memoized transfer gas limits
+
+Gas limits for sends are served from memory, keyed by (network, asset,
+recipient type), where the recipient type is "eoa" or "contract". A miss or a
+stale entry answers with the registry's typical cost right away and refreshes
+in the background. Contract recipients get ``contract_headroom`` on top of
+that cost, since a plain 21000-gas send runs out in their receive logic, and
+so does a recipient whose code has not been read yet. The refresh reads the
+recipient's code once per address and runs ``eth_estimateGas`` for the same
+transfer. Estimates never go below the registry's typical cost: a sample sent
+to an existing holder can come in under what a first transfer to a fresh
+recipient needs. The send path therefore never waits on the node.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Mapping, Optional, Set, Tuple
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.services.provider_pool import NetworkPool
+from app.services.rpc_client import RpcError
+from app.services.token_registry import Token, transfer_calldata
+
+logger = logging.getLogger(__name__)
+
+EstimateKey = Tuple[str, str, str]  # network, symbol, recipient type
+MAX_REFRESHES = 64  # background refreshes in flight; a large batch send does not flood the node
+
+
+class TransferGasEstimator:
+    """Gas limits per (network, asset, recipient type), estimated in the background"""
+
+    def __init__(
+        self,
+        providers: Mapping[str, NetworkPool],
+        ttl: float = 600.0,
+        margin: float = 1.2,
+        max_addresses: int = 16384,
+        contract_headroom: int = 40000
+    ):
+        self.providers = providers
+        self.ttl = ttl
+        self.margin = margin
+        self.max_addresses = max_addresses
+        self.contract_headroom = contract_headroom
+
+        self._estimates: Dict[EstimateKey, Tuple[int, float]] = {}
+        # (network, address) -> has contract code
+        self._is_contract: "OrderedDict[Tuple[str, str], bool]" = OrderedDict()
+        self._refreshing: Set[EstimateKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def recipient_type(self, network: str, recipient: str) -> Optional[str]:
+        """"contract" or "eoa" if the recipient's code has been read, else None"""
+        key = (network, recipient.lower())
+        is_contract = self._is_contract.get(key)
+        if is_contract is None:
+            return None
+        self._is_contract.move_to_end(key)
+        return "contract" if is_contract else "eoa"
+
+    def gas_limit(self, token: Token, sender: str, recipient: str) -> int:
+        """Gas limit for a transfer, from memory; schedules a refresh when missing or stale"""
+        recipient_type = self.recipient_type(token.network, recipient)
+        # Until the code is read, budget for a contract: too little gas fails the send, too much is not spent
+        key = (token.network, token.symbol, recipient_type or "contract")
+        entry = self._estimates.get(key)
+        fresh = self._is_fresh(entry)
+        CACHE_LOOKUPS.inc(cache="transfer_gas", result="hit" if fresh else "miss")
+        if not fresh or recipient_type is None:
+            self._schedule_refresh(token, sender, recipient)
+        if recipient_type is None:
+            # Another contract's estimate says little about this one
+            return max(entry[0] if entry is not None else 0, self._typical_gas(token, "contract"))
+        return entry[0] if entry is not None else self._typical_gas(token, recipient_type)
+
+    def _typical_gas(self, token: Token, recipient_type: str) -> int:
+        """The registry's cost, with headroom for a contract's receive logic"""
+        if recipient_type == "contract":
+            return token.transfer_gas + self.contract_headroom
+        return token.transfer_gas
+
+    def _is_fresh(self, entry: Optional[Tuple[int, float]]) -> bool:
+        return entry is not None and time.monotonic() - entry[1] < self.ttl
+
+    def _schedule_refresh(self, token: Token, sender: str, recipient: str):
+        if token.network not in self.providers or len(self._tasks) >= MAX_REFRESHES:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.refresh(token, sender, recipient))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def refresh(self, token: Token, sender: str, recipient: str) -> Optional[int]:
+        """Estimate a transfer like this one and memoize it under its recipient type"""
+        rpc = self.providers.get(token.network)
+        if rpc is None:
+            return None
+        try:
+            recipient_type = self.recipient_type(token.network, recipient)
+            if recipient_type is None:
+                code = await rpc.call("eth_getCode", [recipient, "latest"])
+                is_contract = bool(code) and code not in ("0x", "0x0")
+                self._remember_code(token.network, recipient, is_contract)
+                recipient_type = "contract" if is_contract else "eoa"
+
+            key = (token.network, token.symbol, recipient_type)
+            entry = self._estimates.get(key)
+            if self._is_fresh(entry):
+                # Only the recipient's code was missing
+                return entry[0]
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+            try:
+                if token.is_native:
+                    tx = {"from": sender, "to": recipient, "value": "0x1"}
+                else:
+                    tx = {"from": sender, "to": token.address, "data": transfer_calldata(recipient, 1)}
+                estimate = int(await rpc.call("eth_estimateGas", [tx]), 16)
+            finally:
+                self._refreshing.discard(key)
+        except (RpcError, ValueError, TypeError) as e:
+            # e.g. the sender holds none of the token yet; the typical cost stays in use
+            logger.debug(f"Gas estimate for {token.symbol} on {token.network} failed: {e}")
+            return None
+
+        gas = max(int(estimate * self.margin), token.transfer_gas)
+        self._estimates[key] = (gas, time.monotonic())
+        return gas
+
+    def _remember_code(self, network: str, address: str, is_contract: bool):
+        self._is_contract[(network, address.lower())] = is_contract
+        while len(self._is_contract) > self.max_addresses:
+            self._is_contract.popitem(last=False)
+
+    async def close(self):
+        """Cancel refreshes still in flight"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
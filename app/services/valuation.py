@@ -0,0 +1,162 @@
+"""
+Portfolio valuation in USD
+
+A single wallet is valued against the in-memory price snapshot, with no
+network calls. Fleet-wide exposure is served from a ``HoldingsIndex`` that
+keeps running amount totals per (network, asset) column over the latest
+balances of every wallet with a session. A report then costs one
+multiplication per column, whatever the number of sessions. The index is
+updated as sessions are stored and removed. It is periodically rebuilt from
+the session store in one columnar pass, which drops sessions that left
+without notice and resets floating-point drift.
+"""
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Mapping, Tuple
+
+from app.services.price_feed import PriceCache
+from app.services.session_store import Holding
+
+WalletKey = Tuple[str, str]  # network, lowercase address
+Balance = Tuple[Tuple[str, float], ...]
+
+
+class HoldingsIndex:
+    """Running (network, asset) totals over the latest balances of each wallet with a session"""
+
+    def __init__(self):
+        self._sessions: Dict[str, WalletKey] = {}
+        self._refs: Dict[WalletKey, int] = {}
+        # One entry per wallet: several sessions of the same wallet hold the same funds
+        self._wallets: Dict[WalletKey, Balance] = {}
+        self._totals: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.rebuilt_at = None  # time.monotonic() of the last rebuild
+
+    @property
+    def sessions(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def wallets(self) -> int:
+        return len(self._wallets)
+
+    def totals(self) -> Dict[Tuple[str, str], float]:
+        return dict(self._totals)
+
+    def update(self, session_id: str, address: str, network: str, balance: Mapping[str, float]):
+        """Record a session's current balances"""
+        key = (network, address.lower())
+        previous = self._sessions.get(session_id)
+        if previous != key:
+            if previous is not None:
+                self.remove(session_id)
+            self._sessions[session_id] = key
+            self._refs[key] = self._refs.get(key, 0) + 1
+
+        items = tuple(balance.items())
+        old = self._wallets.get(key)
+        if old == items:
+            return
+        if old is not None:
+            self._add(network, old, -1.0)
+        self._add(network, items, 1.0)
+        self._wallets[key] = items
+
+    def remove(self, session_id: str):
+        """Forget a session; its wallet leaves the totals with its last session"""
+        key = self._sessions.pop(session_id, None)
+        if key is None:
+            return
+        self._refs[key] -= 1
+        if self._refs[key]:
+            return
+        del self._refs[key]
+        self._add(key[0], self._wallets.pop(key), -1.0)
+
+    def _add(self, network: str, balance: Balance, sign: float):
+        totals = self._totals
+        for asset, amount in balance:
+            totals[(network, asset)] += sign * amount
+
+    def rebuild(self, holdings: Iterable[Holding]):
+        """Replace the index with the given sessions, summing each column afresh"""
+        sessions: Dict[str, WalletKey] = {}
+        wallets: Dict[WalletKey, Balance] = {}
+        refs: Dict[WalletKey, int] = {}
+        for session_id, address, network, balance in holdings:
+            key = (network, address.lower())
+            sessions[session_id] = key
+            wallets[key] = balance
+            refs[key] = refs.get(key, 0) + 1
+
+        totals: Dict[Tuple[str, str], float] = defaultdict(float)
+        for (network, _), balance in wallets.items():
+            for asset, amount in balance:
+                totals[(network, asset)] += amount
+
+        self._sessions = sessions
+        self._refs = refs
+        self._wallets = wallets
+        self._totals = totals
+        self.rebuilt_at = time.monotonic()
+
+
+class ValuationEngine:
+    """USD valuations from a PriceCache"""
+
+    def __init__(self, prices: PriceCache):
+        self.prices = prices
+
+    def value(self, balances: Mapping[str, float], network: str) -> Dict[str, Any]:
+        """USD value per asset and in total for one wallet's balances on a network"""
+        snapshot = self.prices.snapshot()
+        values: Dict[str, float] = {}
+        unpriced = []
+        for asset, amount in balances.items():
+            price = snapshot.price(network, asset)
+            if price is None:
+                unpriced.append(asset)
+            else:
+                values[asset] = amount * price
+        return {
+            # No total when nothing could be priced, rather than a misleading zero
+            "totalValueUSD": sum(values.values()) if values or not unpriced else None,
+            "valuesUSD": values,
+            "unpriced": unpriced,
+            "pricesAge": round(snapshot.age, 3) if snapshot.age is not None else None,
+            "pricesStale": snapshot.stale
+        }
+
+    def exposure(self, index: HoldingsIndex) -> Dict[str, Any]:
+        """USD exposure per network and per asset on each network across the wallets of an index"""
+        start = time.perf_counter()
+        snapshot = self.prices.snapshot()
+
+        # network -> symbol -> totals; the same symbol on another network is another asset
+        assets: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        networks: Dict[str, float] = defaultdict(float)
+        for (network, asset), amount in index.totals().items():
+            symbol = asset.upper()
+            price = snapshot.price(network, symbol)
+            entry = assets[network].get(symbol)
+            if entry is None:
+                entry = assets[network][symbol] = {
+                    "amount": 0.0, "priceUSD": price, "valueUSD": None if price is None else 0.0
+                }
+            entry["amount"] += amount
+            if price is not None:
+                value = amount * price
+                entry["valueUSD"] += value
+                networks[network] += value
+
+        return {
+            "sessions": index.sessions,
+            "wallets": index.wallets,
+            "totalValueUSD": sum(networks.values()) if networks or not assets else None,
+            "networks": dict(networks),
+            "assets": dict(assets),
+            "pricesAge": round(snapshot.age, 3) if snapshot.age is not None else None,
+            "pricesStale": snapshot.stale,
+            "indexAge": round(time.monotonic() - index.rebuilt_at, 3) if index.rebuilt_at is not None else None,
+            "elapsedMs": round((time.perf_counter() - start) * 1000, 3)
+        }
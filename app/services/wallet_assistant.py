@@ -1,16 +1,32 @@
 """
 Core wallet assistant service
 """
+import asyncio
 import logging
 import os
+import re
+import time
 from datetime import datetime
-from typing import Dict, Any, Optional
-
-from web3 import Web3
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
 
 from app.core.config import settings
+from app.core.metrics import ACTIVE_SESSIONS, COMMAND_LATENCY, PARSE_REQUESTS, STAGE_LATENCY, TRACKED_TRANSACTIONS
+from app.core.security import SecurityValidator
 from app.services.ai_parser import AIParser
+from app.services.balance_service import BalanceService
+from app.services.conversation import ConversationMemory, ConversationStore
+from app.services.gas_oracle import GasOracle, GasQuote
+from app.services.nonce_manager import NonceManager
+from app.services.price_feed import PriceCache, create_price_source
+from app.services.receipt_tracker import ReceiptTracker, TrackedTransaction
+from app.services.provider_pool import KNOWN_CHAIN_IDS, NetworkPool, ProviderPool
+from app.services.session_store import SessionStore, create_session_store
+from app.services.rpc_client import RpcError
+from app.services.token_registry import Token, TokenRegistry, transfer_calldata
 from app.services.transaction_store import TransactionStore
+from app.services.transaction_writer import TransactionWriter
+from app.services.transfer_gas import TransferGasEstimator
+from app.services.valuation import HoldingsIndex, ValuationEngine
 from app.models.schemas import (
     TransactionIntent, WalletState, WalletCommand, 
     TransactionConfirmation
@@ -18,6 +34,9 @@ from app.models.schemas import (
 
 logger = logging.getLogger(__name__)
 
+TX_HASH_PATTERN = re.compile(r"0x[0-9a-fA-F]{64}")
+NETWORKS_BY_CHAIN_ID = {chain_id: network for network, chain_id in KNOWN_CHAIN_IDS.items()}
+
 class AIWalletAssistant:
     """Core wallet assistant that processes commands and manages transactions"""
     
@@ -29,116 +48,501 @@ class AIWalletAssistant:
             
         self.parser = AIParser(self.api_key)
         self.store = TransactionStore(settings.TRANSACTIONS_FILE)
+        # Saves are group-committed off the event loop
+        self.writer = TransactionWriter(
+            self.store,
+            max_queue=settings.TRANSACTIONS_QUEUE_MAX,
+            max_batch=settings.TRANSACTIONS_COMMIT_BATCH_MAX,
+            fsync=settings.TRANSACTIONS_COMMIT_FSYNC
+        )
         
-        # Initialize Web3 with provider from environment
-        ethereum_node_url = settings.ETHEREUM_NODE_URL
-        if ethereum_node_url:
-            self.web3 = Web3(Web3.HTTPProvider(f"https://mainnet.infura.io/v3/{ethereum_node_url}"))
-        else:
-            # Fallback to local provider for testing
-            self.web3 = Web3()
-            logger.warning("Using default Web3 provider. Set ETHEREUM_NODE_URL for production.")
+        # Keep-alive JSON-RPC endpoints per network, with failover and latency-aware routing
+        self.providers = ProviderPool(
+            settings.rpc_endpoints,
+            timeout=settings.RPC_TIMEOUT,
+            pool_size=settings.RPC_POOL_SIZE,
+            latency_window=settings.RPC_LATENCY_WINDOW,
+            failure_threshold=settings.RPC_CIRCUIT_FAILURES,
+            cooldown=settings.RPC_CIRCUIT_COOLDOWN,
+            hedge_delay=settings.RPC_HEDGE_DELAY_MS / 1000,
+            hedge_min_delay=settings.RPC_HEDGE_MIN_DELAY_MS / 1000,
+            health_interval=settings.RPC_HEALTH_CHECK_INTERVAL,
+            max_block_lag=settings.RPC_MAX_BLOCK_LAG
+        )
+        if not self.providers:
+            logger.warning("No RPC endpoints configured; using mock balances and fallback gas prices. "
+                           "Set ETHEREUM_NODE_URL, ETHEREUM_RPC_URL or RPC_ENDPOINTS for production.")
+
+        # Asset metadata per network, indexed once for sends and balance reads
+        self.tokens = TokenRegistry.load(settings.TOKEN_REGISTRY_FILE)
+
+        self.balances = BalanceService(
+            self.providers,
+            self.tokens,
+            ttl=settings.BALANCE_CACHE_TTL,
+            batch_window=settings.BALANCE_BATCH_WINDOW_MS / 1000,
+            max_batch=settings.BALANCE_BATCH_MAX,
+            max_entries=settings.BALANCE_CACHE_MAX_ENTRIES,
+            # Mock balances for local testing without a node
+            fallback_balances=None if self.providers else settings.MOCK_BALANCES
+        )
+
+        # Gas fees are refreshed in the background instead of per request, per network
+        self.gas_oracles: Dict[str, GasOracle] = {
+            network: self._new_gas_oracle(pool) for network, pool in self.providers.items()
+        }
+        self._fallback_gas_oracle = self._new_gas_oracle(None)
+        # Transfer gas limits are memoized and re-estimated in the background
+        self.transfer_gas = TransferGasEstimator(
+            self.providers,
+            ttl=settings.GAS_ESTIMATE_TTL,
+            margin=settings.GAS_LIMIT_MARGIN,
+            max_addresses=settings.RECIPIENT_TYPE_CACHE_SIZE,
+            contract_headroom=settings.CONTRACT_RECIPIENT_GAS_HEADROOM
+        )
+        # Nonces for batch sends, handed out locally in sequential ranges
+        self.nonces = NonceManager(self.providers, ttl=settings.NONCE_CACHE_TTL)
+
+        # USD prices are refreshed in the background; valuations read them from memory
+        self.prices = PriceCache(
+            create_price_source(
+                settings.PRICE_SOURCE,
+                path=settings.PRICE_FILE,
+                url=settings.PRICE_SOURCE_URL,
+                ids=settings.PRICE_COINGECKO_IDS
+            ),
+            refresh_interval=settings.PRICE_REFRESH_INTERVAL,
+            max_age=settings.PRICE_MAX_AGE,
+            networks=settings.PRICED_NETWORKS
+        )
+        self.valuation = ValuationEngine(self.prices)
+
+    @staticmethod
+    def _new_gas_oracle(rpc: Optional[NetworkPool]) -> GasOracle:
+        return GasOracle(
+            rpc,
+            refresh_interval=settings.GAS_ORACLE_REFRESH_INTERVAL,
+            max_age=settings.GAS_ORACLE_MAX_AGE,
+            fallback_gas_price_gwei=settings.GAS_FALLBACK_PRICE_GWEI,
+            fallback_priority_fee_gwei=settings.GAS_FALLBACK_PRIORITY_FEE_GWEI
+        )
+
+    def gas_oracle(self, network: str) -> GasOracle:
+        """Gas oracle of a network (name or chain ID); networks without endpoints get fallback quotes"""
+        resolved = self.providers.resolve(network)
+        return self.gas_oracles[resolved] if resolved else self._fallback_gas_oracle
+
+    def network_name(self, network: str) -> str:
+        """Configured or well-known network name for a name or chain ID"""
+        resolved = self.providers.resolve(network)
+        if resolved is not None:
+            return resolved
+        try:
+            return NETWORKS_BY_CHAIN_ID.get(int(network, 0), network)
+        except ValueError:
+            return network
     
-    async def process_command(self, user_input: str, wallet_state: WalletState) -> Dict[str, Any]:
+    async def process_command(
+        self,
+        user_input: str,
+        wallet_state: WalletState,
+        cursor: Optional[str] = None,
+        conversation: Optional[ConversationMemory] = None
+    ) -> Dict[str, Any]:
         """Process user command and return appropriate response"""
+        with COMMAND_LATENCY.time(action="unknown") as labels:
+            try:
+                # Parse natural language command, with earlier turns for references like "the same"
+                intent = await self.parser.parse_command(user_input, self._context(conversation))
+                if conversation is not None:
+                    conversation.add_turn(user_input, intent)
+                intent = self._with_cursor(intent, cursor)
+                labels["action"] = intent.action.value
+                result = await self.execute_intent(intent, wallet_state)
+            except Exception as e:
+                result = self._command_error(e)
+            if "error" in result:
+                labels["outcome"] = "error"
+            return result
+
+    async def process_intent(self, intent: TransactionIntent, wallet_state: WalletState) -> Dict[str, Any]:
+        """Execute an already structured intent, skipping the parser"""
+        PARSE_REQUESTS.inc(path="structured")
+        with COMMAND_LATENCY.time(action=intent.action.value) as labels:
+            try:
+                result = await self.execute_intent(intent, wallet_state)
+            except Exception as e:
+                result = self._command_error(e)
+            if "error" in result:
+                labels["outcome"] = "error"
+            return result
+
+    async def stream_command(
+        self,
+        user_input: str,
+        wallet_state: WalletState,
+        cursor: Optional[str] = None,
+        conversation: Optional[ConversationMemory] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Process a command while the intent streams in
+
+        Yields ("field", ...) events as intent fields become known, then
+        ("intent", ...) and ("result", ...), or ("error", ...) on failure.
+        """
+        start = time.perf_counter()
+        action, outcome = "unknown", "error"
         try:
-            # Parse natural language command
-            intent = await self.parser.parse_command(user_input)
+            intent = None
+            async for kind, value in self.parser.stream_command(user_input, self._context(conversation)):
+                if kind == "field":
+                    name, field_value = value
+                    if name == "action":
+                        self._prefetch(field_value, wallet_state)
+                    yield "field", {"name": name, "value": field_value}
+                else:
+                    if conversation is not None:
+                        conversation.add_turn(user_input, value)
+                    intent = self._with_cursor(value, cursor)
+
+            action = intent.action.value
+            yield "intent", intent.model_dump(mode="json")
+            result = await self.execute_intent(intent, wallet_state)
+            outcome = "error" if "error" in result else "ok"
+            yield "result", result
+        except Exception as e:
+            yield "error", self._command_error(e)
+        finally:
+            COMMAND_LATENCY.observe(time.perf_counter() - start, action=action, outcome=outcome)
+
+    @staticmethod
+    def _context(conversation: Optional[ConversationMemory]) -> Optional[List[Dict[str, str]]]:
+        """Prior turns to send with an LLM parse, within the prompt token budget"""
+        if conversation is None:
+            return None
+        return conversation.context(settings.CONVERSATION_TOKEN_BUDGET)
+
+    @staticmethod
+    def _with_cursor(intent: TransactionIntent, cursor: Optional[str]) -> TransactionIntent:
+        """Attach the request's history cursor to a parsed history intent"""
+        if cursor is None or intent.action != WalletCommand.HISTORY:
+            return intent
+        return intent.model_copy(update={"cursor": cursor})
+
+    def _prefetch(self, action: Any, wallet_state: WalletState):
+        """Start I/O the handler will need while the model is still streaming"""
+        if action == WalletCommand.SEND.value:
+            # Kicks off a refresh if the cached quote is stale
+            self.gas_oracle(wallet_state.network).get_quote()
+        elif action == WalletCommand.BALANCE.value:
+            task = asyncio.ensure_future(self.balances.get_balances(wallet_state.network, wallet_state.address))
+            # The handler awaits the same batch; failures are reported there
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _in_session_network(self, intent: TransactionIntent, wallet_state: WalletState) -> TransactionIntent:
+        """The intent on the session's network; a different network named by the user is rejected"""
+        if intent.network is None:
+            return intent.model_copy(update={"network": wallet_state.network})
+        network = self.network_name(intent.network)
+        session_network = self.network_name(wallet_state.network)
+        if network != session_network:
+            raise ValueError(
+                f"This session is connected to {session_network}, not {network}; "
+                f"reconnect on {network} to use it"
+            )
+        return intent
+
+    async def execute_intent(self, intent: TransactionIntent, wallet_state: WalletState) -> Dict[str, Any]:
+        """Dispatch a parsed intent to its handler"""
+        intent = self._in_session_network(intent, wallet_state)
+
+        # Process based on command type
+        if intent.action == WalletCommand.SEND:
+            return await self._handle_send(intent, wallet_state)
+            
+        elif intent.action == WalletCommand.BALANCE:
+            return await self._handle_balance(wallet_state)
+            
+        elif intent.action == WalletCommand.HISTORY:
+            return self._handle_history(intent, wallet_state)
+            
+        elif intent.action == WalletCommand.SWAP:
+            return await self._handle_swap(intent, wallet_state)
             
-            # Process based on command type
-            if intent.action == WalletCommand.SEND:
-                return await self._handle_send(intent, wallet_state)
-                
-            elif intent.action == WalletCommand.BALANCE:
-                return self._handle_balance(wallet_state)
-                
-            elif intent.action == WalletCommand.HISTORY:
-                return self._handle_history(wallet_state)
-                
-            elif intent.action == WalletCommand.SWAP:
-                return await self._handle_swap(intent, wallet_state)
-                
-            elif intent.action == WalletCommand.HELP:
-                return self._handle_help()
-                
-            else:
-                return {
-                    "error": f"Unsupported action: {intent.action}",
-                    "suggestion": "Try 'send', 'balance', 'history', or 'help'"
-                }
-                
-        except ValueError as e:
+        elif intent.action == WalletCommand.HELP:
+            return self._handle_help()
+            
+        else:
+            return {
+                "error": f"Unsupported action: {intent.action}",
+                "suggestion": "Try 'send', 'balance', 'history', or 'help'"
+            }
+
+    @staticmethod
+    def _command_error(e: Exception) -> Dict[str, Any]:
+        """Turn a command failure into an error response"""
+        if isinstance(e, ValueError):
             logger.error(f"Command processing error: {e}")
             return {
                 "error": str(e),
                 "suggestion": "Try formatting like: 'Send 0.1 ETH to 0x...'"
             }
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            return {
-                "error": "An unexpected error occurred",
-                "suggestion": "Please try again with a simpler command"
-            }
+        logger.error(f"Unexpected error: {e}")
+        return {
+            "error": "An unexpected error occurred",
+            "suggestion": "Please try again with a simpler command"
+        }
 
     async def _handle_send(self, intent: TransactionIntent, wallet_state: WalletState) -> Dict[str, Any]:
         """Handle send transaction command"""
+        if intent.recipients is not None:
+            return await self._handle_batch_send(intent, wallet_state)
+
         # Validate recipient address
-        if not intent.recipient or not self.web3.is_address(intent.recipient):
+        with STAGE_LATENCY.time(stage="validate_address", action="send"):
+            recipient = SecurityValidator.checksum_address(intent.recipient) if intent.recipient else None
+        if not recipient:
             raise ValueError("Invalid recipient address")
         
         # Validate asset and amount
         if not intent.asset or not intent.amount:
             raise ValueError("Missing asset or amount")
+        if intent.amount <= 0:
+            raise ValueError("Amount must be positive")
+        token = self._send_token(intent)
+        units = token.to_base_units(intent.amount)
             
         # Check balance
-        if wallet_state.balance.get(intent.asset, 0) < intent.amount:
-            raise ValueError(f"Insufficient balance: {wallet_state.balance.get(intent.asset, 0)} {intent.asset}")
-        
-        # Build transaction
-        gas_price = self.web3.eth.gas_price
-        gas_limit = 21000  # Default gas limit for ETH transfers
+        if wallet_state.balance.get(token.symbol, 0) < intent.amount:
+            raise ValueError(f"Insufficient balance: {wallet_state.balance.get(token.symbol, 0)} {token.symbol}")
         
-        tx_data = {
-            'from': wallet_state.address,
-            'to': intent.recipient,
-            'value': self.web3.to_wei(intent.amount, 'ether'),
-            'gasPrice': float(gas_price),  # Convert Decimal to float
-            'gas': gas_limit
-        }
+        # Build transaction from the cached gas quote and the memoized transfer gas limit
+        with STAGE_LATENCY.time(stage="gas", action="send"):
+            quote = self.gas_oracle(intent.network).get_quote()
+            gas_limit = self.transfer_gas.gas_limit(token, wallet_state.address, recipient)
+        tx_data = self._transfer_tx(
+            token, wallet_state.address, recipient, units, gas_limit, quote, self.providers.chain_id(intent.network)
+        )
         
         # Calculate gas estimate in ETH
-        gas_estimate = float(gas_price * gas_limit) / 1e18  # Convert wei to ETH
+        gas_estimate = float(quote.max_fee * gas_limit) / 1e18  # Convert wei to ETH
+        gas_age = quote.age
+        
+        # The balance is about to change once the user signs
+        self.balances.invalidate(wallet_state.network, wallet_state.address)
         
         # Return payload for MetaMask confirmation
         return {
             "action": "send",
             "details": {
                 "from": wallet_state.address,
-                "to": intent.recipient,
+                "to": recipient,
                 "amount": intent.amount,
-                "asset": intent.asset,
+                "asset": token.symbol,
+                "tokenAddress": token.address,
                 "network": intent.network,
-                "gasEstimate": gas_estimate
+                "gasLimit": gas_limit,
+                "gasEstimate": gas_estimate,
+                "gasPriceSource": quote.source,
+                "gasPriceAge": round(gas_age, 3) if gas_age is not None else None
             },
             "metaMaskPayload": tx_data
         }
+
+    async def _handle_batch_send(self, intent: TransactionIntent, wallet_state: WalletState) -> Dict[str, Any]:
+        """Handle a send to many recipients with one validation pass, one gas quote and sequential nonces"""
+        count = len(intent.recipients)
+        if not count:
+            raise ValueError("No recipients")
+        if count > settings.BATCH_SEND_MAX:
+            raise ValueError(f"Too many recipients: {count} (at most {settings.BATCH_SEND_MAX})")
+
+        # Validate asset and amounts
+        amounts = intent.amounts if intent.amounts is not None else [intent.amount] * count
+        if len(amounts) != count:
+            raise ValueError(f"Expected {count} amounts, got {len(amounts)}")
+        if not intent.asset or any(not amount for amount in amounts):
+            raise ValueError("Missing asset or amount")
+        if any(amount <= 0 for amount in amounts):
+            raise ValueError("Amount must be positive")
+
+        # Validate every recipient address together
+        with STAGE_LATENCY.time(stage="validate_address", action="send"):
+            recipients = SecurityValidator.checksum_addresses(intent.recipients)
+        invalid = [raw for raw, checksummed in zip(intent.recipients, recipients) if checksummed is None]
+        if invalid:
+            shown = ", ".join(str(address) for address in invalid[:5])
+            raise ValueError(f"Invalid recipient addresses ({len(invalid)}): {shown}{', ...' if len(invalid) > 5 else ''}")
+
+        token = self._send_token(intent)
+        units = [token.to_base_units(amount) for amount in amounts]
+        total = token.from_base_units(sum(units))
+
+        # Check balance against the whole batch
+        if wallet_state.balance.get(token.symbol, 0) < total:
+            raise ValueError(f"Insufficient balance: {wallet_state.balance.get(token.symbol, 0)} {token.symbol}, "
+                             f"batch total {total} {token.symbol}")
+
+        # One gas quote for the batch; gas limits and nonces come from memory
+        with STAGE_LATENCY.time(stage="gas", action="send"):
+            quote = self.gas_oracle(intent.network).get_quote()
+            gas_limits = [self.transfer_gas.gas_limit(token, wallet_state.address, recipient) for recipient in recipients]
+        first_nonce = await self._reserve_nonces(intent.network, wallet_state.address, count)
+
+        chain_id = self.providers.chain_id(intent.network)
+        payloads = []
+        for i, (recipient, amount_units, gas_limit) in enumerate(zip(recipients, units, gas_limits)):
+            tx_data = self._transfer_tx(token, wallet_state.address, recipient, amount_units, gas_limit, quote, chain_id)
+            if first_nonce is not None:
+                tx_data['nonce'] = hex(first_nonce + i)
+            payloads.append(tx_data)
+
+        gas_estimate = float(quote.max_fee * sum(gas_limits)) / 1e18
+        gas_age = quote.age
+
+        # The balance is about to change once the user signs
+        self.balances.invalidate(wallet_state.network, wallet_state.address)
+
+        return {
+            "action": "send",
+            "details": {
+                "from": wallet_state.address,
+                "recipients": count,
+                "totalAmount": total,
+                "asset": token.symbol,
+                "tokenAddress": token.address,
+                "network": intent.network,
+                "firstNonce": first_nonce,
+                "gasEstimate": gas_estimate,
+                "gasPriceSource": quote.source,
+                "gasPriceAge": round(gas_age, 3) if gas_age is not None else None
+            },
+            "transfers": [{"to": recipient, "amount": amount} for recipient, amount in zip(recipients, amounts)],
+            "metaMaskPayloads": payloads
+        }
+
+    def _send_token(self, intent: TransactionIntent) -> Token:
+        """Registry entry for the asset of a send intent"""
+        network = self.network_name(intent.network)
+        token = self.tokens.get(network, intent.asset)
+        if token is None:
+            raise ValueError(f"Unsupported asset on {network}: {intent.asset}")
+        return token
+
+    @staticmethod
+    def _transfer_tx(
+        token: Token,
+        sender: str,
+        recipient: str,
+        units: int,
+        gas_limit: int,
+        quote: GasQuote,
+        chain_id: Optional[int]
+    ) -> Dict[str, Any]:
+        """MetaMask payload of one native or ERC-20 transfer"""
+        if token.is_native:
+            tx_data = {
+                'from': sender,
+                'to': recipient,
+                'value': units,
+                'gas': gas_limit
+            }
+        else:
+            # ERC-20 transfers call the token contract; the recipient is in the calldata
+            tx_data = {
+                'from': sender,
+                'to': token.address,
+                'value': 0,
+                'data': transfer_calldata(recipient, units),
+                'gas': gas_limit
+            }
+        if chain_id is not None:
+            tx_data['chainId'] = hex(chain_id)
+        if quote.base_fee is not None:
+            tx_data['maxFeePerGas'] = quote.max_fee
+            tx_data['maxPriorityFeePerGas'] = quote.priority_fee
+        else:
+            tx_data['gasPrice'] = quote.gas_price
+        return tx_data
+
+    async def _reserve_nonces(self, network: str, address: str, count: int) -> Optional[int]:
+        """First of ``count`` sequential nonces, or None to let the wallet assign them"""
+        resolved = self.providers.resolve(network)
+        if resolved is None:
+            return None
+        try:
+            with STAGE_LATENCY.time(stage="nonce", action="send"):
+                return await self.nonces.reserve(resolved, address, count)
+        except RpcError as e:
+            logger.warning(f"Could not read the nonce of {address} on {resolved}; leaving nonces to the wallet: {e}")
+            return None
     
-    def _handle_balance(self, wallet_state: WalletState) -> Dict[str, Any]:
+    async def _handle_balance(self, wallet_state: WalletState) -> Dict[str, Any]:
         """Handle balance inquiry command"""
+        with STAGE_LATENCY.time(stage="balance", action="balance"):
+            wallet_state.balance = await self.balances.get_balances(wallet_state.network, wallet_state.address)
         return {
             "action": "balance",
             "balances": wallet_state.balance,
-            "totalValueUSD": sum(amount for asset, amount in wallet_state.balance.items()),
+            **self.valuation.value(wallet_state.balance, wallet_state.network),
             "network": wallet_state.network
         }
     
-    def _handle_history(self, wallet_state: WalletState) -> Dict[str, Any]:
-        """Handle transaction history command"""
+    def _handle_history(self, intent: TransactionIntent, wallet_state: WalletState) -> Dict[str, Any]:
+        """Handle transaction history command, one page at a time"""
+        transactions, next_cursor = self.query_history(
+            wallet_state,
+            limit=settings.HISTORY_LIMIT,
+            cursor=intent.cursor
+        )
+        pending = []
+        if intent.cursor is None:
+            # Pending transactions belong to the first page, unless the store already returned them on it;
+            # models are encoded by the response serializer
+            on_page = {tx.get("tx_hash") for tx in transactions}
+            pending = [tx for tx in wallet_state.pending_transactions if tx.tx_hash not in on_page]
         return {
             "action": "history",
-            "transactions": [tx.to_dict() for tx in wallet_state.transaction_history],
-            "pending": [tx.to_dict() for tx in wallet_state.pending_transactions]
+            "transactions": transactions,
+            "next_cursor": next_cursor,
+            "pending": pending
         }
+
+    def query_history(
+        self,
+        wallet_state: WalletState,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Query one page of stored transactions for the session's wallet, newest first"""
+        return self.store.query_page(
+            address=wallet_state.address,
+            since=since,
+            until=until,
+            status=status,
+            limit=limit,
+            cursor=cursor
+        )
+
+    def iter_history(
+        self,
+        wallet_state: WalletState,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream every stored transaction for the session's wallet, newest first"""
+        return self.store.iter_query(
+            address=wallet_state.address,
+            since=since,
+            until=until,
+            status=status,
+            cursor=cursor,
+            page_size=settings.HISTORY_STREAM_PAGE_SIZE
+        )
     
     async def _handle_swap(self, intent: TransactionIntent, wallet_state: WalletState) -> Dict[str, Any]:
         """Handle swap command"""
@@ -155,64 +559,277 @@ class AIWalletAssistant:
             "action": "help",
             "commands": [
                 {"name": "send", "format": "Send [amount] [asset] to [address]"},
+                {"name": "send", "format": "Send [amount] [asset] each to [address], [address], ..."},
                 {"name": "balance", "format": "Show my balance"},
                 {"name": "history", "format": "Show transaction history"},
                 {"name": "swap", "format": "Swap [amount] [asset] for [asset]"}
             ]
         }
     
-    def save_transaction(self, tx: TransactionConfirmation):
-        """Save transaction to storage"""
-        self.store.save_transaction(tx)
+    async def save_transaction(self, tx: TransactionConfirmation, wait: bool = False):
+        """Queue a transaction for storage; wait=True returns once it is durable"""
+        await self.writer.save(tx, wait=wait)
+
+    def start(self):
+        """Start background refreshes, endpoint health checks and the store writer on the running event loop"""
+        self.providers.start()
+        self.writer.start()
+        self.prices.start()
+        for oracle in self.gas_oracles.values():
+            oracle.start()
+
+    async def warm_up(self):
+        """Load prices, measure the endpoints, then prime gas quotes so the first send does not fall back"""
+        await self.prices.refresh()
+        if self.providers:
+            await self.providers.check()
+            await asyncio.gather(*(oracle.refresh() for oracle in self.gas_oracles.values()))
+
+    async def close(self):
+        """Stop background refreshes, flush parser caches and close the transaction store"""
+        for oracle in self.gas_oracles.values():
+            await oracle.stop()
+        await self.transfer_gas.close()
+        await self.prices.stop()
+        self.balances.close()
+        await self.providers.close()
+        await self.parser.close()
+        # Queued saves are committed before the store closes
+        await self.writer.close()
+        self.store.close()
 
 
 class WalletSessionManager:
     """Manages active wallet sessions"""
     
     def __init__(self):
-        self.active_sessions: Dict[str, WalletState] = {}
-        self.last_activity: Dict[str, datetime] = {}
+        self.sessions: SessionStore = create_session_store(
+            settings.SESSION_BACKEND,
+            timeout=settings.INACTIVITY_TIMEOUT,
+            db_path=settings.SESSION_DB_FILE,
+            busy_timeout=settings.SESSION_DB_BUSY_TIMEOUT,
+            cold_path=settings.SESSION_COLD_DB_FILE,
+            memory_budget=int(settings.SESSION_MEMORY_BUDGET_MB * 1024 * 1024),
+            hibernate_ttl=settings.SESSION_HIBERNATE_TTL
+        )
         self.assistant = AIWalletAssistant()
+        self._sweeper: Optional[asyncio.Task] = None
+
+        # Recent turns per session, so follow-up commands can refer to earlier ones
+        self.conversations = ConversationStore(
+            max_sessions=settings.CONVERSATION_MAX_SESSIONS,
+            max_turns=settings.CONVERSATION_MAX_TURNS
+        )
+
+        # Running balance totals over all sessions, for exposure reports
+        self.holdings = HoldingsIndex()
+
+        # One poll loop for the pending transactions of every session
+        self.receipts = ReceiptTracker(
+            self.assistant.providers,
+            on_receipt=self._record_receipt,
+            block_time=settings.RECEIPT_BLOCK_TIME,
+            min_interval=settings.RECEIPT_POLL_MIN_INTERVAL,
+            max_interval=settings.RECEIPT_POLL_MAX_INTERVAL,
+            max_batch=settings.RECEIPT_BATCH_MAX
+        )
+
+        # Read at scrape time
+        ACTIVE_SESSIONS.set_function(lambda: len(self.sessions))
+        TRACKED_TRANSACTIONS.set_function(lambda: len(self.receipts))
     
-    def create_session(self, address: str, network: str = "mainnet") -> str:
+    async def create_session(self, address: str, network: str = "mainnet") -> str:
         """Create a new wallet session"""
         session_id = f"session_{address[:10]}_{datetime.now().timestamp()}"
         
-        # Mock balance for testing - would be fetched from blockchain in production
-        self.active_sessions[session_id] = WalletState(
+        # Concurrent connects share batched, cached balance reads
+        balance = await self.assistant.balances.get_balances(network, address)
+        self._put(session_id, WalletState(
             address=address,
-            balance={"ETH": 5.0, "USDC": 1000.0},
+            balance=balance,
             network=network
-        )
+        ))
         
-        self.last_activity[session_id] = datetime.now()
         return session_id
     
     def get_session(self, session_id: str) -> Optional[WalletState]:
         """Get wallet session by ID"""
-        session = self.active_sessions.get(session_id)
-        if session:
-            self.last_activity[session_id] = datetime.now()
-        return session
+        return self.sessions.get(session_id)
+
+    def _put(self, session_id: str, wallet_state: WalletState):
+        """Store a session and keep the holdings index in step"""
+        self.sessions.put(session_id, wallet_state)
+        self.holdings.update(session_id, wallet_state.address, wallet_state.network, wallet_state.balance)
     
-    async def handle_user_request(self, user_input: str, session_id: str) -> Dict[str, Any]:
+    async def handle_user_request(self, user_input: str, session_id: str, cursor: Optional[str] = None) -> Dict[str, Any]:
         """Process user request within a session"""
-        wallet_state = self.get_session(session_id)
-        if not wallet_state:
-            raise ValueError("No active wallet session")
-        
-        # Process command
-        return await self.assistant.process_command(user_input, wallet_state)
+        # Requests on one session are serialized
+        async with self.sessions.lock(session_id):
+            wallet_state = self.get_session(session_id)
+            if not wallet_state:
+                raise ValueError("No active wallet session")
+            
+            # Process command
+            result = await self.assistant.process_command(
+                user_input,
+                wallet_state,
+                cursor=cursor,
+                conversation=self.conversations.get(session_id)
+            )
+            self._put(session_id, wallet_state)
+            return result
+
+    async def handle_intent(self, intent: TransactionIntent, session_id: str) -> Dict[str, Any]:
+        """Run a structured intent within a session, under the same lock as commands"""
+        async with self.sessions.lock(session_id):
+            wallet_state = self.get_session(session_id)
+            if not wallet_state:
+                raise ValueError("No active wallet session")
+
+            result = await self.assistant.process_intent(intent, wallet_state)
+            self._put(session_id, wallet_state)
+            return result
+
+    async def stream_user_request(
+        self,
+        user_input: str,
+        session_id: str,
+        cursor: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Process user request within a session, streaming intermediate events"""
+        async with self.sessions.lock(session_id):
+            wallet_state = self.get_session(session_id)
+            if not wallet_state:
+                raise ValueError("No active wallet session")
+
+            conversation = self.conversations.get(session_id)
+            async for event in self.assistant.stream_command(user_input, wallet_state, cursor=cursor, conversation=conversation):
+                yield event
+            self._put(session_id, wallet_state)
     
+    async def track_transaction(self, session_id: str, tx_hash: str) -> TransactionConfirmation:
+        """Register a submitted transaction so its receipt is picked up in the background"""
+        if not TX_HASH_PATTERN.fullmatch(tx_hash):
+            raise ValueError("Invalid transaction hash")
+        tx_hash = tx_hash.lower()
+
+        async with self.sessions.lock(session_id):
+            wallet_state = self.get_session(session_id)
+            if not wallet_state:
+                raise ValueError("No active wallet session")
+
+            for tx in wallet_state.pending_transactions:
+                if tx.tx_hash == tx_hash:
+                    return tx
+
+            pending = TransactionConfirmation(
+                tx_hash=tx_hash,
+                status="pending",
+                gas_used=0.0,
+                gas_price=0.0,
+                address=wallet_state.address,
+                network=wallet_state.network
+            )
+            self.receipts.track(TrackedTransaction(
+                tx_hash=tx_hash,
+                network=wallet_state.network,
+                address=wallet_state.address,
+                session_id=session_id
+            ))
+            wallet_state.pending_transactions.append(pending)
+            self._put(session_id, wallet_state)
+
+        # Persisted as pending so tracking resumes after a restart; the session already holds it
+        await self.assistant.save_transaction(pending)
+        return pending
+
+    async def _record_receipt(self, tracked: TrackedTransaction, confirmation: TransactionConfirmation):
+        """Persist a mined transaction and move it from the session's pending list to its history"""
+        # Durable before it leaves the pending list, so history never loses it in between
+        await self.assistant.save_transaction(confirmation, wait=True)
+        if tracked.address:
+            self.assistant.balances.invalidate(tracked.network, tracked.address)
+        if tracked.session_id is None:
+            return
+
+        async with self.sessions.lock(tracked.session_id):
+            wallet_state = self.get_session(tracked.session_id)
+            if not wallet_state:
+                return
+            wallet_state.pending_transactions = [
+                tx for tx in wallet_state.pending_transactions if tx.tx_hash != tracked.tx_hash
+            ]
+            wallet_state.transaction_history.append(confirmation)
+            self._put(tracked.session_id, wallet_state)
+
+    def _resume_tracking(self):
+        """Track transactions still stored as pending, e.g. from before a restart"""
+        resumed = 0
+        for record in self.assistant.store.iter_query(status="pending"):
+            network = record.get("network") or "mainnet"
+            if network not in self.assistant.providers or record["tx_hash"] in self.receipts:
+                continue
+            # The session may be gone; the store is still updated on confirmation
+            self.receipts.track(TrackedTransaction(
+                tx_hash=record["tx_hash"],
+                network=network,
+                address=record.get("address")
+            ))
+            resumed += 1
+        if resumed:
+            logger.info(f"Resumed tracking {resumed} pending transactions")
+
+    def exposure(self) -> Dict[str, Any]:
+        """USD exposure across the wallets of all active sessions"""
+        return self.assistant.valuation.exposure(self.holdings)
+
+    def rebuild_holdings(self):
+        """Recompute the holdings index from the session store"""
+        self.holdings.rebuild(self.sessions.holdings())
+
     def cleanup_inactive_sessions(self):
-        """Remove inactive sessions"""
-        now = datetime.now()
-        inactive_sessions = [
-            session_id for session_id, last_active in self.last_activity.items()
-            if (now - last_active).total_seconds() > settings.INACTIVITY_TIMEOUT
-        ]
-        
-        for session_id in inactive_sessions:
-            del self.active_sessions[session_id]
-            del self.last_activity[session_id]
-            logger.info(f"Cleaned up inactive session: {session_id}")
\ No newline at end of file
+        """Remove sessions whose inactivity timeout has passed"""
+        for session_id in self.sessions.expire():
+            self.conversations.drop(session_id)
+            self.holdings.remove(session_id)
+            logger.info(f"Cleaned up inactive session: {session_id}")
+        # Hibernated sessions leave the totals here
+        rebuilt_at = self.holdings.rebuilt_at
+        if rebuilt_at is None or time.monotonic() - rebuilt_at >= settings.EXPOSURE_REBUILD_INTERVAL:
+            self.rebuild_holdings()
+
+    def start(self):
+        """Start the periodic session expiry sweep and the assistant's background tasks"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+        self.assistant.start()
+        self.receipts.start()
+
+    async def warm_up(self):
+        """Prime upstream caches and resume receipt tracking before the first request"""
+        self._resume_tracking()
+        self.rebuild_holdings()
+        await self.assistant.warm_up()
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.SESSION_SWEEP_INTERVAL)
+            try:
+                self.cleanup_inactive_sessions()
+            except Exception as e:
+                logger.error(f"Session sweep failed: {e}")
+
+    async def close(self):
+        """Stop the expiry sweep and release resources held by the assistant"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        ACTIVE_SESSIONS.set_function(None)
+        TRACKED_TRANSACTIONS.set_function(None)
+        await self.receipts.stop()
+        await self.assistant.close()
+        self.sessions.close()
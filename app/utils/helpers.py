@@ -1,24 +1,72 @@
 """
 Helper functions and utilities
 """
+import asyncio
+import csv
+import io
 import logging
-from typing import Dict, Any
-import json
-from app.models.schemas import DecimalEncoder
+from typing import Dict, Any, List, Optional, Tuple
+from app.utils.serialization import dumps
 
 logger = logging.getLogger(__name__)
 
 def format_response(data: Dict[str, Any]) -> str:
     """Format response dictionary as pretty JSON string"""
     try:
-        return json.dumps(data, indent=2, cls=DecimalEncoder)
+        return dumps(data, indent=True).decode()
     except Exception as e:
         logger.error(f"Error formatting response: {e}")
         return str(data)
 
 
+def format_sse(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
 def format_address(address: str) -> str:
     """Format Ethereum address for display (0x123...abc)"""
     if not address or len(address) < 10:
         return address
-    return f"{address[:6]}...{address[-4:]}"
\ No newline at end of file
+    return f"{address[:6]}...{address[-4:]}"
+
+
+def parse_payout_csv(text: str, default_amount: Optional[float] = None) -> Tuple[List[str], List[float]]:
+    """Read ``address,amount`` rows (header and amount optional) into recipients and amounts"""
+    recipients: List[str] = []
+    amounts: List[float] = []
+    for line, row in enumerate(csv.reader(io.StringIO(text)), start=1):
+        row = [cell.strip() for cell in row]
+        if not row or not row[0] or row[0].startswith("#"):
+            continue
+        if line == 1 and not row[0].lower().startswith("0x"):
+            continue  # header
+        if len(row) > 1 and row[1]:
+            try:
+                amount = float(row[1])
+            except ValueError:
+                raise ValueError(f"Invalid amount on line {line}: {row[1]}")
+        elif default_amount is not None:
+            amount = default_amount
+        else:
+            raise ValueError(f"Missing amount on line {line}")
+        recipients.append(row[0])
+        amounts.append(amount)
+    if not recipients:
+        raise ValueError("No recipients in CSV")
+    return recipients, amounts
+
+
+async def wait_event(event: asyncio.Event, timeout: Optional[float]) -> bool:
+    """Wait until an event is set or the timeout passes; returns whether it was set
+
+    Unlike ``asyncio.wait_for(event.wait(), timeout)`` on Python < 3.12, a
+    cancellation arriving just as the event is set is never swallowed, so
+    background loops built on it always stop when cancelled.
+    """
+    waiter = asyncio.ensure_future(event.wait())
+    try:
+        await asyncio.wait({waiter}, timeout=timeout)
+    finally:
+        waiter.cancel()
+    return event.is_set()
@@ -0,0 +1,73 @@
+"""
+Fast JSON serialization for API responses and storage
+
+Encodes straight to bytes with orjson when it is installed, falling back to
+the standard library otherwise. Pydantic models, datetimes, enums and
+Decimals are handled by the encoder itself, so responses skip FastAPI's
+``jsonable_encoder`` pass and per-item ``to_dict()`` copies.
+"""
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _default(obj: Any) -> Any:
+    """Encode types neither encoder handles natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj: Any, indent: bool = False) -> bytes:
+    if indent:
+        return json.dumps(obj, default=_default, indent=2).encode()
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to compact (or 2-space indented) JSON bytes"""
+    if orjson is None:
+        return _stdlib_dumps(obj, indent)
+    try:
+        options = _ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else _ORJSON_OPTIONS
+        return orjson.dumps(obj, default=_default, option=options)
+    except orjson.JSONEncodeError:
+        # orjson rejects integers beyond 64 bits, e.g. large wei amounts
+        return _stdlib_dumps(obj, indent)
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by the fast encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
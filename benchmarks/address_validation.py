@@ -0,0 +1,75 @@
+"""
+Address validation micro-benchmark
+
+Compares the uncached per-call path (``Web3.is_address`` followed by
+``Web3.to_checksum_address``) with ``SecurityValidator``'s memoized single
+and batch APIs. The workload draws from a fixed pool of mixed-case addresses,
+so repeats follow the skew of real traffic.
+
+Usage:
+    python -m benchmarks.address_validation --calls 100000 --pool 2000
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Callable, List, Optional
+
+from eth_utils import to_checksum_address
+from web3 import Web3
+
+from app.core.security import SecurityValidator, _checksum
+
+
+def make_workload(calls: int, pool: int, seed: int) -> List[str]:
+    """Mixed-case checksummed addresses with a Zipf-like repeat pattern"""
+    rng = random.Random(seed)
+    addresses = [to_checksum_address(f"0x{rng.getrandbits(160):040x}") for _ in range(pool)]
+    weights = [1 / (rank + 1) for rank in range(pool)]
+    return rng.choices(addresses, weights=weights, k=calls)
+
+
+def timed(label: str, fn: Callable[[], None], calls: int, baseline: Optional[float] = None) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    speedup = f"  {baseline / elapsed:6.1f}x" if baseline else ""
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {elapsed / calls * 1e6:7.2f} us/address{speedup}")
+    return elapsed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--pool", type=int, default=2000, help="distinct addresses in the workload")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workload = make_workload(args.calls, args.pool, args.seed)
+
+    def uncached():
+        for address in workload:
+            if Web3.is_address(address):
+                Web3.to_checksum_address(address)
+
+    def cached():
+        for address in workload:
+            SecurityValidator.checksum_address(address)
+
+    def batch():
+        SecurityValidator.checksum_addresses(workload)
+
+    print(f"{args.calls} lookups over {args.pool} distinct addresses")
+    baseline = timed("Web3 per call", uncached, args.calls)
+    _checksum.cache_clear()
+    timed("SecurityValidator (cold)", cached, args.calls, baseline)
+    timed("SecurityValidator (warm)", cached, args.calls, baseline)
+    _checksum.cache_clear()
+    timed("checksum_addresses (cold)", batch, args.calls, baseline)
+    timed("checksum_addresses (warm)", batch, args.calls, baseline)
+    print(f"cache: {SecurityValidator.cache_stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
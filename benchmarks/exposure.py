@@ -0,0 +1,77 @@
+"""
+Fleet-wide exposure: per-report scan vs the holdings index
+
+Fills a tiered session store with sessions holding a few assets each, then
+reports the time to:
+
+* scan: rebuild the totals from every stored session, as a report without an
+  index would have to;
+* update: record one session's new balances in the index;
+* report: value the index against the cached prices.
+
+Usage:
+    python -m benchmarks.exposure --sessions 50000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from app.models.schemas import WalletState
+from app.services.price_feed import PriceCache, StaticPriceSource
+from app.services.session_store import TieredSessionStore
+from app.services.valuation import HoldingsIndex, ValuationEngine
+
+PRICES = {"ETH": 2500.0, "USDC": 1.0, "USDT": 1.0, "DAI": 1.0, "WBTC": 60000.0}
+
+
+def timed(fn, repeat: int) -> float:
+    """Median milliseconds of ``repeat`` calls"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TieredSessionStore(Path(tmp) / "cold.db", timeout=3600)
+        index = HoldingsIndex()
+        for i in range(args.sessions):
+            state = WalletState(
+                address=f"0x{i:040x}",
+                balance={"ETH": i % 10 / 3, "USDC": 100.0, "DAI": 5.0, "WBTC": 0.01}
+            )
+            store.put(f"s{i}", state)
+            index.update(f"s{i}", state.address, state.network, state.balance)
+
+        prices = PriceCache(StaticPriceSource(PRICES))
+        asyncio.run(prices.refresh())
+        engine = ValuationEngine(prices)
+
+        scan = timed(lambda: HoldingsIndex().rebuild(store.holdings()), args.repeat)
+        balance = {"ETH": 1.0, "USDC": 50.0, "DAI": 5.0, "WBTC": 0.01}
+        update = timed(lambda: index.update("s0", "0x" + "0" * 40, "mainnet", balance), args.repeat)
+        report = timed(lambda: engine.exposure(index), args.repeat)
+        store.close()
+
+    print(f"{args.sessions} sessions")
+    print(f"{'scan all sessions':<24} {scan:>10.3f} ms")
+    print(f"{'index update':<24} {update:>10.3f} ms")
+    print(f"{'report from index':<24} {report:>10.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
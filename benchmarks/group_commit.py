@@ -0,0 +1,110 @@
+"""
+Transaction persistence: per-save writes vs write-behind group commit
+
+Saves a burst of confirmations from many concurrent tasks in three ways:
+
+* direct: ``TransactionStore.save_transaction`` on the event loop, one append
+  and fsync per save (the previous path, with fsync enabled);
+* awaited: ``TransactionWriter.save(wait=True)``, each caller waiting for its
+  durable commit;
+* fire-and-forget: ``TransactionWriter.save()``, followed by one flush.
+
+Reports throughput, fsyncs (commits) and the worst event-loop stall seen by a
+ticker task while the burst runs.
+
+Usage:
+    python -m benchmarks.group_commit --saves 5000 --concurrency 200
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.models.schemas import TransactionConfirmation
+from app.services.transaction_store import TransactionStore
+from app.services.transaction_writer import TransactionWriter
+
+
+def make_tx(i: int) -> TransactionConfirmation:
+    return TransactionConfirmation(
+        tx_hash=f"0x{i:064x}",
+        status="confirmed",
+        gas_used=21000.0,
+        gas_price=30.0,
+        address="0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+    )
+
+
+async def burst(save: Callable[[TransactionConfirmation], Awaitable[None]], saves: int, concurrency: int) -> Dict[str, float]:
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall = max(stall, time.perf_counter() - start - 0.001)
+
+    queue = iter(range(saves))
+
+    async def worker():
+        for i in queue:
+            await save(make_tx(i))
+
+    tick = asyncio.ensure_future(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return {"saves_per_s": round(saves / elapsed), "max_stall_ms": round(stall * 1000, 1)}
+
+
+async def run(saves: int, concurrency: int, root: Path) -> Dict[str, Dict[str, float]]:
+    results = {}
+
+    store = TransactionStore(root / "direct.json", fsync=True)
+
+    async def direct(tx):
+        store.save_transaction(tx)
+
+    results["direct (fsync per save)"] = await burst(direct, saves, concurrency)
+    results["direct (fsync per save)"]["commits"] = saves
+    store.close()
+
+    for label, wait in (("write-behind, awaited", True), ("write-behind, fire-and-forget", False)):
+        store = TransactionStore(root / f"{'awaited' if wait else 'queued'}.json")
+        writer = TransactionWriter(store, fsync=True)
+
+        async def queued(tx, wait=wait):
+            await writer.save(tx, wait=wait)
+
+        result = await burst(queued, saves, concurrency)
+        await writer.close()
+        assert len(store.load_transactions()) == saves
+        result["commits"] = writer.commits
+        results[label] = result
+        store.close()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--saves", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run(args.saves, args.concurrency, Path(tmp)))
+    print(f"{'':<32} {'saves/s':>9} {'commits':>8} {'max stall ms':>13}")
+    for label, result in results.items():
+        print(f"{label:<32} {result['saves_per_s']:>9} {result['commits']:>8} {result['max_stall_ms']:>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
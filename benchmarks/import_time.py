@@ -0,0 +1,95 @@
+"""
+Import-time budget for the API entry point
+
+Imports ``main`` in fresh interpreters under ``python -X importtime``. It
+reports the median total import time and the slowest modules, then fails if
+the median exceeds the budget or if any module that should load lazily
+during start-up (web3, the service stack) was imported eagerly.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 800 --runs 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded by the lifespan warm-up, never by importing the app
+LAZY_MODULES = ["web3", "eth_account", "app.services.wallet_assistant"]
+
+PROBE = (
+    "import json, sys; import {module}; "
+    "print(json.dumps([m for m in {modules!r} if m in sys.modules]))"
+)
+
+
+def measure(module: str, lazy_modules: List[str]) -> Tuple[float, Dict[str, float], List[str]]:
+    """Import a module in a fresh interpreter; return total ms, self ms per module and eager lazy modules"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    code = PROBE.format(module=module, modules=lazy_modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    self_ms: Dict[str, float] = {}
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # header line
+        name = fields[2].strip()
+        self_ms[name] = self_us / 1000
+        if name == module:
+            total_ms = cumulative_us / 1000
+
+    eager = json.loads(result.stdout.strip().splitlines()[-1])
+    return total_ms, self_ms, eager
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="maximum median import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    totals = []
+    slowest: Dict[str, float] = {}
+    eager: List[str] = []
+    for _ in range(args.runs):
+        total_ms, self_ms, eager = measure(args.module, LAZY_MODULES)
+        totals.append(total_ms)
+        for name, ms in self_ms.items():
+            slowest[name] = max(slowest.get(name, 0.0), ms)
+
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print("Slowest modules (self time):")
+    for name, ms in sorted(slowest.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"Over budget by {median - args.budget_ms:.1f} ms", file=sys.stderr)
+        failed = True
+    if eager:
+        print(f"Imported eagerly, should load during warm-up: {', '.join(eager)}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+Offline load test for the AI Wallet Assistant API
+
+Starts the FastAPI app from ``main.py`` under uvicorn. The app is pointed at
+a stub LLM server and a stub JSON-RPC node, so runs are deterministic and
+need no network access or API keys. Virtual users connect a wallet, replay
+commands from a JSONL workload against ``/command`` and poll
+``/session/{id}``. The report covers per-endpoint p50/p95/p99 latency,
+requests per second and memory growth, and can be saved as a baseline and
+compared with later runs.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 32 --requests 2000
+    python -m benchmarks.load_test --save-baseline benchmarks/baselines/local.json
+    python -m benchmarks.load_test --baseline benchmarks/baselines/local.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.stubs import StubChainServer, StubLLMServer
+
+DEFAULT_WORKLOAD = Path(__file__).with_name("workload.jsonl")
+TEST_ADDRESSES = [f"0x{i:040x}" for i in range(1, 257)]
+
+
+def load_workload(path: Path) -> List[str]:
+    """Read commands from a JSONL workload, repeating each by its weight"""
+    commands = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            # Accept both {"command": ...} and request-style {"body": ...} lines
+            command = item.get("command") or item.get("body")
+            commands.extend([command] * int(item.get("weight", 1)))
+    if not commands:
+        raise SystemExit(f"No commands found in {path}")
+    return commands
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int) -> Dict[str, Any]:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class AppServer:
+    """Runs the FastAPI app under uvicorn in a background thread"""
+
+    def __init__(self, port: int):
+        import uvicorn
+        from main import app
+
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, name="uvicorn", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+class LoadGenerator:
+    """Virtual users replaying the workload against the running API"""
+
+    def __init__(self, base_url: str, commands: List[str], total_requests: int, concurrency: int, seed: int):
+        self.base_url = base_url
+        self.commands = commands
+        self.total_requests = total_requests
+        self.concurrency = concurrency
+        self.random = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = {"connect": [], "command": [], "session": []}
+        self.errors: Dict[str, int] = {"connect": 0, "command": 0, "session": 0}
+        self._remaining = total_requests
+
+    async def _request(self, http: aiohttp.ClientSession, endpoint: str, method: str, path: str, body: Any = None) -> Optional[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            async with http.request(method, f"{self.base_url}{path}", json=body) as response:
+                data = await response.json(content_type=None)
+                ok = response.status == 200 and not (isinstance(data, dict) and "error" in data and endpoint != "command")
+        except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError):
+            data, ok = None, False
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if not ok:
+            self.errors[endpoint] += 1
+        return data
+
+    def _take(self) -> bool:
+        if self._remaining <= 0:
+            return False
+        self._remaining -= 1
+        return True
+
+    async def _user(self, http: aiohttp.ClientSession, user_id: int):
+        address = TEST_ADDRESSES[user_id % len(TEST_ADDRESSES)]
+        session_id = None
+        while self._take():
+            if session_id is None:
+                data = await self._request(http, "connect", "POST", "/api/connect", {"address": address, "network": "mainnet"})
+                session_id = data.get("session_id") if isinstance(data, dict) else None
+            elif self.random.random() < 0.2:
+                await self._request(http, "session", "GET", f"/api/session/{session_id}")
+            else:
+                command = self.random.choice(self.commands)
+                await self._request(http, "command", "POST", "/api/command", {"session_id": session_id, "command": command})
+
+    async def run(self) -> float:
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as http:
+            start = time.perf_counter()
+            await asyncio.gather(*(self._user(http, i) for i in range(self.concurrency)))
+            return time.perf_counter() - start
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return descriptions of metrics that regressed beyond the tolerance"""
+    regressions = []
+    for endpoint, stats in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(endpoint)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[metric] and stats[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{endpoint} {metric}: {base[metric]} -> {stats[metric]}")
+
+    base_rps = baseline.get("overall", {}).get("requests_per_sec")
+    rps = current["overall"]["requests_per_sec"]
+    if base_rps and rps < base_rps * (1 - tolerance):
+        regressions.append(f"requests_per_sec: {base_rps} -> {rps}")
+    return regressions
+
+
+def configure_environment(args, llm: StubLLMServer, chain: StubChainServer, data_dir: Path):
+    """Point the app's settings at the stubs and a scratch data directory before it is imported"""
+    os.environ.update({
+        "GROQ_API_KEY": "benchmark",
+        "GROQ_API_BASE": f"{llm.url}/v1",
+        "ETHEREUM_RPC_URL": f"{chain.url}/",
+        "FAST_PATH_ENABLED": "false" if args.no_fast_path else "true",
+        "INTENT_CACHE_ENABLED": "false" if args.no_intent_cache else "true",
+        "SESSION_BACKEND": args.session_backend,
+        "PRICE_SOURCE": "none",  # offline: no live price feed
+        "TRANSACTIONS_FILE": str(data_dir / "transactions.json"),
+        "INTENT_CACHE_FILE": str(data_dir / "intent_cache.json"),
+        "SESSION_DB_FILE": str(data_dir / "sessions.db"),
+    })
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", type=Path, default=DEFAULT_WORKLOAD)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000, help="total requests across all users")
+    parser.add_argument("--warmup", type=int, default=200, help="requests sent before measuring")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--rpc-latency-ms", type=float, default=5.0)
+    parser.add_argument("--no-fast-path", action="store_true")
+    parser.add_argument("--no-intent-cache", action="store_true")
+    parser.add_argument("--session-backend", default="memory", choices=["memory", "sqlite"])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    parser.add_argument("--save-baseline", type=Path, help="store the report as a baseline")
+    parser.add_argument("--baseline", type=Path, help="compare against a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    commands = load_workload(args.workload)
+    llm = StubLLMServer(latency_ms=args.llm_latency_ms).start()
+    chain = StubChainServer(latency_ms=args.rpc_latency_ms).start()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        configure_environment(args, llm, chain, Path(data_dir))
+        port = free_port()
+        server = AppServer(port)
+        server.start()
+        base_url = f"http://127.0.0.1:{port}"
+
+        try:
+            if args.warmup:
+                asyncio.run(LoadGenerator(base_url, commands, args.warmup, args.concurrency, args.seed).run())
+
+            gc.collect()
+            rss_start = rss_mb()
+            generator = LoadGenerator(base_url, commands, args.requests, args.concurrency, args.seed)
+            elapsed = asyncio.run(generator.run())
+            gc.collect()
+            rss_end = rss_mb()
+        finally:
+            server.stop()
+            llm.stop()
+            chain.stop()
+
+    all_latencies = [value for values in generator.latencies.values() for value in values]
+    report = {
+        "meta": {
+            "workload": str(args.workload),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "llm_latency_ms": args.llm_latency_ms,
+            "rpc_latency_ms": args.rpc_latency_ms,
+            "fast_path": not args.no_fast_path,
+            "intent_cache": not args.no_intent_cache,
+            "session_backend": args.session_backend,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        },
+        "endpoints": {
+            endpoint: summarize(values, generator.errors[endpoint])
+            for endpoint, values in generator.latencies.items()
+        },
+        "overall": {
+            **summarize(all_latencies, sum(generator.errors.values())),
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_sec": round(len(all_latencies) / elapsed, 1) if elapsed else 0.0,
+            "upstream_llm_requests": llm.requests,
+            "upstream_rpc_requests": chain.requests
+        },
+        "memory": {
+            "rss_start_mb": round(rss_start, 1),
+            "rss_end_mb": round(rss_end, 1),
+            "growth_mb": round(rss_end - rss_start, 1)
+        }
+    }
+
+    print(json.dumps(report, indent=2))
+    for path in (args.output, args.save_baseline):
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
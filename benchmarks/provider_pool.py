@@ -0,0 +1,112 @@
+"""
+Provider pool against local stub nodes with injected latency and failures
+
+Sends the same read requests through a single ``JsonRpcClient`` pointed at the
+first endpoint and through a ``ProviderPool`` over every endpoint. Halfway
+through, the endpoint the pool prefers is made slow, so the run also shows
+hedging and re-routing. Reports latency percentiles and the error rate of each.
+
+Usage:
+    python -m benchmarks.provider_pool --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.core.metrics import RPC_HEDGES
+from app.services.provider_pool import ProviderPool
+from app.services.rpc_client import JsonRpcClient, RpcError
+from benchmarks.stubs import StubChainServer
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+async def drive(send, requests: int, concurrency: int, on_halfway) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            if i == requests // 2:
+                on_halfway()
+            start = time.perf_counter()
+            try:
+                await send()
+            except RpcError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "error_rate": round(errors / requests, 4)
+    }
+
+
+async def run(args) -> Dict[str, Dict[str, float]]:
+    nodes = [
+        StubChainServer(latency_ms=args.flaky_latency_ms, failure_rate=args.flaky_failure_rate).start(),
+        StubChainServer(latency_ms=args.fast_latency_ms).start(),
+        StubChainServer(latency_ms=args.slow_latency_ms).start(),
+    ]
+    urls = [f"{node.url}/" for node in nodes]
+    calls = [("eth_blockNumber", []), ("eth_gasPrice", [])]
+
+    def degrade():
+        # The pool's favourite endpoint turns slow partway through
+        nodes[1].latency_ms = args.slow_latency_ms * 2
+
+    results = {}
+    single = JsonRpcClient(urls[0])
+    try:
+        results["single endpoint"] = await drive(lambda: single.batch(calls), args.requests, args.concurrency, lambda: None)
+    finally:
+        await single.close()
+
+    nodes[1].latency_ms = args.fast_latency_ms
+    pool = ProviderPool({"mainnet": urls}, hedge_min_delay=0.02, cooldown=5.0)
+    try:
+        await pool.check()
+        network = pool["mainnet"]
+        results["provider pool"] = await drive(lambda: network.batch(calls), args.requests, args.concurrency, degrade)
+        results["provider pool"]["hedged"] = RPC_HEDGES.value(network="mainnet")
+    finally:
+        await pool.close()
+        for node in nodes:
+            node.stop()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--flaky-latency-ms", type=float, default=20.0)
+    parser.add_argument("--flaky-failure-rate", type=float, default=0.1)
+    parser.add_argument("--fast-latency-ms", type=float, default=5.0)
+    parser.add_argument("--slow-latency-ms", type=float, default=100.0)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    print(f"{'':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>8} {'hedged':>8}")
+    for label, result in results.items():
+        print(
+            f"{label:<16} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+            f"{result['error_rate']:>8} {result.get('hedged', '-'):>8}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
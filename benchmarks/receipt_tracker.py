@@ -0,0 +1,95 @@
+"""
+Receipt tracker against a local dev chain
+
+Runs ``ReceiptTracker`` against the stub JSON-RPC node with a short block
+time. Each block a share of the pending transactions is mined. The run
+reports how many HTTP requests the node received per block and the CPU time
+spent, so you can check that both stay flat as the pending set grows.
+
+Usage:
+    python -m benchmarks.receipt_tracker --pending 100 1000 5000 --block-time 0.5
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.services.receipt_tracker import ReceiptTracker, TrackedTransaction
+from app.services.rpc_client import JsonRpcClient
+from benchmarks.stubs import StubChainServer
+
+
+async def run(pending: int, block_time: float, mined_per_block: float, seed: int) -> Dict[str, float]:
+    chain = StubChainServer(block_time=block_time).start()
+    client = JsonRpcClient(f"{chain.url}/")
+    confirmed: Dict[str, float] = {}
+    rng = random.Random(seed)
+
+    async def on_receipt(tracked, confirmation):
+        confirmed[tracked.tx_hash] = time.monotonic()
+
+    tracker = ReceiptTracker(
+        {"mainnet": client},
+        on_receipt,
+        # Deliberately wrong, so the run also shows the estimate converging
+        block_time=block_time * 4,
+        min_interval=block_time / 10,
+        max_interval=block_time * 8
+    )
+    hashes = [f"0x{rng.getrandbits(256):064x}" for _ in range(pending)]
+    submitted = time.monotonic()
+    for tx_hash in hashes:
+        tracker.track(TrackedTransaction(tx_hash=tx_hash, network="mainnet"))
+
+    tracker.start()
+    cpu_start, start_head = time.process_time(), chain.head
+    try:
+        unmined = list(hashes)
+        while len(confirmed) < pending:
+            # Mine a share of the remaining transactions in each new block
+            head = chain.head
+            count = max(1, int(len(unmined) * mined_per_block))
+            for tx_hash in unmined[:count]:
+                chain.mine(tx_hash)
+            unmined = unmined[count:]
+            while chain.head == head:
+                await asyncio.sleep(block_time / 20)
+    finally:
+        await tracker.stop()
+        await client.close()
+        chain.stop()
+
+    blocks = max(1, chain.head - start_head)
+    latencies = sorted(at - submitted for at in confirmed.values())
+    return {
+        "pending": pending,
+        "blocks": blocks,
+        "requests_per_block": round(chain.requests / blocks, 2),
+        "cpu_ms_per_block": round((time.process_time() - cpu_start) * 1000 / blocks, 2),
+        "block_time_estimate": round(tracker.block_time("mainnet"), 3),
+        "p50_confirm_s": round(latencies[len(latencies) // 2], 3)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pending", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--block-time", type=float, default=0.5)
+    parser.add_argument("--mined-per-block", type=float, default=0.25, help="share of remaining txs mined per block")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'pending':>8} {'blocks':>7} {'req/block':>10} {'cpu ms/block':>13} {'block time':>11} {'p50 confirm':>12}")
+    for pending in args.pending:
+        result = asyncio.run(run(pending, args.block_time, args.mined_per_block, args.seed))
+        print(
+            f"{result['pending']:>8} {result['blocks']:>7} {result['requests_per_block']:>10} "
+            f"{result['cpu_ms_per_block']:>13} {result['block_time_estimate']:>11} {result['p50_confirm_s']:>12}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+History serialization benchmark
+
+Renders a history response of N transactions in two ways:
+
+* the previous path: ``to_dict()`` per ``TransactionConfirmation``, FastAPI's
+  ``jsonable_encoder`` and a standard ``JSONResponse``, plus the
+  ``DecimalEncoder``-based ``format_response`` pass;
+* the fast path: ``FastJSONResponse`` encoding stored records and models
+  straight to bytes.
+
+Usage:
+    python -m benchmarks.serialization --entries 10000 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.schemas import DecimalEncoder, TransactionConfirmation
+from app.utils.serialization import FastJSONResponse, dumps, orjson
+
+
+def make_history(entries: int) -> List[TransactionConfirmation]:
+    start = datetime(2024, 1, 1)
+    return [
+        TransactionConfirmation(
+            tx_hash=f"0x{i:064x}",
+            status="confirmed" if i % 10 else "failed",
+            timestamp=start + timedelta(seconds=12 * i),
+            gas_used=21000.0,
+            gas_price=30.5 + i % 7,
+            address="0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+        )
+        for i in range(entries)
+    ]
+
+
+def median_time(fn: Callable[[], bytes], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    models = make_history(args.entries)
+    # The transaction store hands out records already in dict form
+    records = [tx.to_dict() for tx in models]
+
+    def previous_response() -> bytes:
+        content = {"transactions": [tx.to_dict() for tx in models]}
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def previous_format_response() -> bytes:
+        return json.dumps({"transactions": [tx.to_dict() for tx in models]}, indent=2, cls=DecimalEncoder).encode()
+
+    def fast_records() -> bytes:
+        return FastJSONResponse({"transactions": records}).body
+
+    def fast_models() -> bytes:
+        return FastJSONResponse({"transactions": models}).body
+
+    def fast_format_response() -> bytes:
+        return dumps({"transactions": models}, indent=True)
+
+    assert json.loads(previous_response()) == json.loads(fast_models()) == json.loads(fast_records())
+
+    print(f"{args.entries} transactions, median of {args.repeat} runs, encoder: {'orjson' if orjson else 'json'}")
+    baseline = median_time(previous_response, args.repeat)
+    rows = [
+        ("to_dict + jsonable_encoder + JSONResponse", baseline),
+        ("to_dict + DecimalEncoder (format_response)", median_time(previous_format_response, args.repeat)),
+        ("FastJSONResponse (store records)", median_time(fast_records, args.repeat)),
+        ("FastJSONResponse (models)", median_time(fast_models, args.repeat)),
+        ("dumps(indent=True) (models)", median_time(fast_format_response, args.repeat)),
+    ]
+    for label, elapsed in rows:
+        print(f"{label:<44} {elapsed * 1000:9.2f} ms  {baseline / elapsed:6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Local stand-ins for the LLM API and an Ethereum node
+
+Both servers are small aiohttp applications with deterministic answers and
+optional injected latency and failures. The benchmarks run the app against
+them without network access or API keys.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+from eth_abi import decode, encode
+
+ADDRESS = re.compile(r"0x[a-fA-F0-9]{40}")
+AMOUNT = re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)(?![\w.])")
+ASSET = re.compile(r"\b(ETH|USDC|USDT|DAI|WBTC)\b", re.IGNORECASE)
+NETWORK = re.compile(r"\bon\s+([A-Za-z][\w-]*)", re.IGNORECASE)
+
+
+def stub_intent(command: str) -> Dict[str, Any]:
+    """Deterministic intent for a command, standing in for the model"""
+    text = command.lower()
+    address = ADDRESS.search(command)
+    amount = AMOUNT.search(ADDRESS.sub("", command))
+    asset = ASSET.search(command)
+    network = NETWORK.search(command)
+
+    if address and amount and any(word in text for word in ("send", "transfer", "pay", "move")):
+        action = "send"
+    elif any(word in text for word in ("swap", "exchange", "convert")):
+        action = "swap"
+    elif any(word in text for word in ("balance", "portfolio", "holdings", "rich", "funds")):
+        action = "balance"
+    elif any(word in text for word in ("history", "transactions", "activity")):
+        action = "history"
+    else:
+        action = "help"
+
+    return {
+        "action": action,
+        "asset": asset.group(1).upper() if asset and action in ("send", "swap") else None,
+        "amount": float(amount.group(1)) if amount and action in ("send", "swap") else None,
+        "recipient": address.group(0) if address and action == "send" else None,
+        "network": network.group(1).lower() if network else None
+    }
+
+
+class _StubServer:
+    """Runs an aiohttp application on its own event loop thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, failure_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.fail_next = 0  # the next N requests fail, whatever the failure rate
+        self.requests = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def build_app(self) -> web.Application:
+        raise NotImplementedError
+
+    async def _delay(self):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def _should_fail(self) -> bool:
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            return True
+        return self.failure_rate > 0 and random.random() < self.failure_rate
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self) -> "_StubServer":
+        """Start serving in a background thread"""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        """Stop serving and join the thread"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+
+class StubLLMServer(_StubServer):
+    """OpenAI-compatible /v1/chat/completions with deterministic intents"""
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        return app
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        await self._delay()
+        if self._should_fail():
+            return web.json_response({"error": {"message": "stub overloaded"}}, status=503)
+
+        user_input = body["messages"][-1]["content"]
+        content = json.dumps(stub_intent(user_input))
+        usage = {"prompt_tokens": 60, "completion_tokens": 30, "total_tokens": 90}
+
+        if not body.get("stream"):
+            return web.json_response({
+                "id": "stub",
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i in range(0, len(content), 8):
+            chunk = {"choices": [{"index": 0, "delta": {"content": content[i:i + 8]}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+
+class StubChainServer(_StubServer):
+    """JSON-RPC node stand-in answering the calls the app makes"""
+
+    def __init__(self, *args, block_time: float = 12.0, chain_id: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.block_time = block_time
+        self.chain_id = chain_id
+        self.base_fee = 20 * 10 ** 9
+        self.priority_fee = 2 * 10 ** 9
+        self.balance_wei = 5 * 10 ** 18
+        self.token_balance = 1000 * 10 ** 6
+        self.block_number = 19_000_000
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        self._started = time.monotonic()
+
+    @property
+    def head(self) -> int:
+        """Current block number; a new block is produced every block_time seconds"""
+        return self.block_number + int((time.monotonic() - self._started) / self.block_time)
+
+    def mine(self, tx_hash: str, success: bool = True, gas_used: int = 21000):
+        """Make a receipt available for a transaction in the current block"""
+        self.receipts[tx_hash.lower()] = {
+            "transactionHash": tx_hash.lower(),
+            "blockNumber": hex(self.head),
+            "status": "0x1" if success else "0x0",
+            "gasUsed": hex(gas_used),
+            "effectiveGasPrice": hex(self.base_fee + self.priority_fee)
+        }
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/", self.rpc)
+        return app
+
+    async def rpc(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        payload = await request.json()
+        await self._delay()
+        if self._should_fail():
+            return web.Response(status=502, text="stub node unavailable")
+
+        if isinstance(payload, list):
+            return web.json_response([self._answer(call) for call in payload])
+        return web.json_response(self._answer(payload))
+
+    def _answer(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        method = call.get("method")
+        params = call.get("params", [])
+        handler = getattr(self, f"_rpc_{method}", None)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": f"Method {method} not found"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": handler(*params)}
+
+    def _rpc_eth_chainId(self):
+        return hex(self.chain_id)
+
+    def _rpc_net_version(self):
+        return str(self.chain_id)
+
+    def _rpc_eth_blockNumber(self):
+        return hex(self.head)
+
+    def _rpc_eth_gasPrice(self):
+        return hex(self.base_fee + self.priority_fee)
+
+    def _rpc_eth_maxPriorityFeePerGas(self):
+        return hex(self.priority_fee)
+
+    def _rpc_eth_getBlockByNumber(self, number, full=False):
+        return {
+            "number": hex(self.head),
+            "hash": "0x" + "11" * 32,
+            "parentHash": "0x" + "22" * 32,
+            "timestamp": hex(1_700_000_000),
+            "baseFeePerGas": hex(self.base_fee),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": hex(15_000_000),
+            "transactions": []
+        }
+
+    def _rpc_eth_getBalance(self, address, block="latest"):
+        return hex(self.balance_wei)
+
+    def _rpc_eth_getTransactionCount(self, address, block="latest"):
+        return hex(7)
+
+    def _rpc_eth_estimateGas(self, tx, block="latest"):
+        return hex(21000 if not tx.get("data") else 65000)
+
+    def _rpc_eth_getCode(self, address, block="latest"):
+        return "0x"
+
+    def _rpc_eth_getTransactionReceipt(self, tx_hash):
+        return self.receipts.get(tx_hash.lower())
+
+    def _rpc_eth_call(self, tx, block="latest"):
+        data = bytes.fromhex(tx["data"][2:])
+        if data[:4] == bytes.fromhex("82ad56cb"):
+            # Multicall3 aggregate3: every sub-call is answered with the token balance
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = [(True, self.token_balance.to_bytes(32, "big")) for _ in calls]
+            return "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+        return "0x" + self.token_balance.to_bytes(32, "big").hex()
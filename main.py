@@ -1,19 +1,36 @@
 """
 AI Wallet Assistant - Main application entry point
 """
+from contextlib import asynccontextmanager
+from pathlib import Path
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api.routes import router
+from app.api.dependencies import readiness, start_session_manager, shutdown_session_manager
 from app.core.config import settings
+from app.core.metrics import registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are built and warmed up in the background; /ready reports when they are done
+    start_session_manager()
+    yield
+    # Flush caches and close storage on shutdown
+    await shutdown_session_manager()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Wallet Assistant",
     description="An AI-powered assistant for cryptocurrency wallet management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -25,8 +42,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount static files when the frontend build is present
+if Path("static").is_dir():
+    app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Include API routes
 app.include_router(router, prefix="/api")
@@ -36,5 +54,17 @@ app.include_router(router, prefix="/api")
 async def root():
     return {"message": "Welcome to AI Wallet Assistant API. Use /docs for API documentation."}
 
+# Readiness probe: 503 until a start-up warm-up attempt has succeeded
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    # One process: it owns the transaction log, nonce counters and receipt tracking
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""
+Shared fixtures
+
+Tests run against the local stub LLM and JSON-RPC servers from
+``benchmarks.stubs``, so they need no network access or API keys. Async
+scenarios are driven with ``asyncio.run``.
+"""
+import pytest
+
+from benchmarks.stubs import StubChainServer, StubLLMServer
+
+
+@pytest.fixture
+def llm_server():
+    server = StubLLMServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def chain():
+    server = StubChainServer().start()
+    yield server
+    server.stop()
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.balance_service import BalanceService
+from app.services.provider_pool import ProviderPool
+from app.services.token_registry import TokenRegistry
+
+ALICE = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+BOB = "0x" + "ab" * 20
+
+
+def _run(chain, scenario, **kwargs):
+    async def main():
+        pool = ProviderPool({"mainnet": [chain.url + "/"]}, failure_threshold=100)
+        service = BalanceService(pool, TokenRegistry.load(settings.TOKEN_REGISTRY_FILE), **kwargs)
+        try:
+            return await scenario(service)
+        finally:
+            service.close()
+            await pool.close()
+    return asyncio.run(main())
+
+
+def test_concurrent_lookups_share_one_batch(chain):
+    async def scenario(service):
+        return await asyncio.gather(service.get_balances("mainnet", ALICE), service.get_balances("mainnet", BOB))
+
+    alice, bob = _run(chain, scenario)
+    assert chain.requests == 1
+    assert alice == bob
+    assert alice["ETH"] == chain.balance_wei / 10 ** 18
+    assert alice["USDC"] == chain.token_balance / 10 ** 6
+
+
+def test_invalid_address_fails_alone(chain):
+    async def scenario(service):
+        return await asyncio.gather(
+            service.get_balances("mainnet", ALICE),
+            service.get_balances("mainnet", "0xnotanaddress"),
+            service.get_balances("mainnet", BOB),
+            return_exceptions=True
+        )
+
+    alice, invalid, bob = _run(chain, scenario)
+    assert isinstance(invalid, ValueError)
+    assert "Invalid Ethereum address" in str(invalid)
+    assert alice["ETH"] == bob["ETH"] == 5.0
+    assert chain.requests == 1
+
+
+def test_node_failure_fails_the_batch(chain):
+    chain.failure_rate = 1.0
+
+    async def scenario(service):
+        return await asyncio.gather(
+            service.get_balances("mainnet", ALICE),
+            service.get_balances("mainnet", BOB),
+            return_exceptions=True
+        )
+
+    for result in _run(chain, scenario):
+        assert isinstance(result, ValueError)
+        assert "Could not load balances" in str(result)
+
+
+def test_stale_balances_served_when_node_fails(chain):
+    async def scenario(service):
+        fresh = await service.get_balances("mainnet", ALICE)
+        chain.failure_rate = 1.0
+        return fresh, await service.get_balances("mainnet", ALICE)
+
+    fresh, stale = _run(chain, scenario, ttl=0.0)
+    assert stale == fresh
+
+
+def test_cached_within_ttl_and_reloaded_after_invalidate(chain):
+    async def scenario(service):
+        await service.get_balances("mainnet", ALICE)
+        await service.get_balances("mainnet", ALICE.lower())
+        cached_requests = chain.requests
+        service.invalidate("mainnet", ALICE)
+        await service.get_balances("mainnet", ALICE)
+        return cached_requests
+
+    assert _run(chain, scenario, ttl=60.0) == 1
+    assert chain.requests == 2
+
+
+def test_unsupported_network(chain):
+    async def scenario(service):
+        await service.get_balances("sepolia", ALICE)
+
+    with pytest.raises(ValueError, match="Unsupported network: sepolia"):
+        _run(chain, scenario)
+    assert chain.requests == 0
+
+
+def test_fallback_balances_without_nodes():
+    async def main():
+        service = BalanceService({}, TokenRegistry.load(settings.TOKEN_REGISTRY_FILE), fallback_balances={"ETH": 1.0})
+        return await service.get_balances("mainnet", ALICE)
+
+    assert asyncio.run(main()) == {"ETH": 1.0}
+
+
+def test_cache_evicts_least_recently_used(chain):
+    carol = "0x" + "cd" * 20
+
+    async def scenario(service):
+        await service.get_balances("mainnet", ALICE)
+        await service.get_balances("mainnet", BOB)
+        await service.get_balances("mainnet", ALICE)  # Alice is now the most recently used
+        await service.get_balances("mainnet", carol)  # evicts Bob
+        before = chain.requests
+        await service.get_balances("mainnet", ALICE)
+        await service.get_balances("mainnet", carol)
+        cached_requests = chain.requests - before
+        await service.get_balances("mainnet", BOB)
+        return cached_requests, chain.requests - before
+
+    assert _run(chain, scenario, ttl=60.0, max_entries=2) == (0, 1)
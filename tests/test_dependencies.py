@@ -0,0 +1,35 @@
+import asyncio
+
+from app.api import dependencies
+from app.core.config import settings
+
+
+def test_failed_warm_up_is_retried_until_ready(monkeypatch):
+    attempts = []
+
+    async def warm_up_once():
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise ValueError("malformed node reply")
+
+    monkeypatch.setattr(dependencies, "_warm_up_once", warm_up_once)
+    monkeypatch.setattr(settings, "WARMUP_RETRY_INTERVAL", 0.01)
+
+    async def main():
+        task = dependencies.start_session_manager()
+        # Requests only wait for the first attempt, which reports its error
+        await dependencies._first_attempt.wait()
+        first = dependencies.readiness()
+        await asyncio.wait_for(task, timeout=2)
+        return first, dependencies.readiness()
+
+    try:
+        first, final = asyncio.run(main())
+    finally:
+        dependencies._warmup = dependencies._first_attempt = None
+        dependencies._readiness.update(ready=False, warmup_seconds=None, error=None)
+    assert first["ready"] is False
+    assert first["error"] == "malformed node reply"
+    assert final["ready"] is True
+    assert final["error"] is None
+    assert len(attempts) == 3
@@ -0,0 +1,114 @@
+import asyncio
+
+from app.services.gas_oracle import GWEI, GasOracle
+from app.services.provider_pool import ProviderPool
+from benchmarks.stubs import StubChainServer
+
+
+class LegacyChainServer(StubChainServer):
+    """A node without EIP-1559 fields"""
+
+    def _rpc_eth_getBlockByNumber(self, number, full=False):
+        block = super()._rpc_eth_getBlockByNumber(number, full)
+        del block["baseFeePerGas"]
+        return block
+
+
+def _run(chain, scenario, **kwargs):
+    async def main():
+        pool = ProviderPool({"mainnet": [chain.url + "/"]})
+        oracle = GasOracle(pool["mainnet"], **kwargs)
+        try:
+            return await scenario(oracle)
+        finally:
+            # Bounded, so a stop that never returns fails the test instead of hanging it
+            await asyncio.wait_for(oracle.stop(), timeout=2)
+            await pool.close()
+    return asyncio.run(main())
+
+
+def test_fallback_before_first_refresh(chain):
+    async def scenario(oracle):
+        return oracle.get_quote()
+
+    quote = _run(chain, scenario, fallback_gas_price_gwei=30, fallback_priority_fee_gwei=1.5)
+    assert quote.source == "fallback"
+    assert quote.gas_price == 30 * GWEI
+    assert quote.priority_fee == int(1.5 * GWEI)
+    assert quote.fetched_at is None
+
+
+def test_node_quote_after_refresh(chain):
+    async def scenario(oracle):
+        await oracle.refresh()
+        return oracle.get_quote()
+
+    quote = _run(chain, scenario)
+    assert quote.source == "node"
+    assert quote.base_fee == chain.base_fee
+    assert quote.priority_fee == chain.priority_fee
+    assert quote.gas_price == chain.base_fee + chain.priority_fee
+    assert quote.max_fee == 2 * chain.base_fee + chain.priority_fee
+
+
+def test_background_refresh_replaces_fallback(chain):
+    async def scenario(oracle):
+        first = oracle.get_quote()
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            quote = oracle.get_quote()
+            if quote.source == "node":
+                return first, quote
+        return first, quote
+
+    first, quote = _run(chain, scenario, refresh_interval=10.0)
+    assert first.source == "fallback"
+    assert quote.source == "node"
+
+
+def test_failed_refresh_keeps_recent_quote(chain):
+    async def scenario(oracle):
+        await oracle.refresh()
+        chain.failure_rate = 1.0
+        await oracle.refresh()
+        return oracle.get_quote()
+
+    assert _run(chain, scenario, max_age=60.0).source == "node"
+
+
+def test_fallback_once_node_down_past_max_age(chain):
+    async def scenario(oracle):
+        await oracle.refresh()
+        chain.failure_rate = 1.0
+        oracle.start()
+        await asyncio.sleep(0.4)
+        return oracle.get_quote()
+
+    quote = _run(chain, scenario, refresh_interval=0.05, max_age=0.2)
+    assert quote.source == "fallback"
+    # The age of the last node data is still reported
+    assert quote.fetched_at is not None
+
+
+def test_legacy_node_quotes_gas_price():
+    chain = LegacyChainServer().start()
+    try:
+        async def scenario(oracle):
+            await oracle.refresh()
+            return oracle.get_quote()
+
+        quote = _run(chain, scenario)
+    finally:
+        chain.stop()
+    assert quote.source == "node"
+    assert quote.base_fee is None
+    assert quote.max_fee == quote.gas_price == chain.base_fee + chain.priority_fee
+
+
+def test_without_node_always_fallback():
+    async def main():
+        oracle = GasOracle(None)
+        await oracle.refresh()
+        return oracle.get_quote()
+
+    assert asyncio.run(main()).source == "fallback"
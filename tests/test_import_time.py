@@ -0,0 +1,16 @@
+import statistics
+
+from benchmarks.import_time import LAZY_MODULES, measure
+
+BUDGET_MS = 1500.0
+RUNS = 3
+
+
+def test_importing_main_stays_within_budget():
+    totals = []
+    for _ in range(RUNS):
+        total_ms, _, eager = measure("main", LAZY_MODULES)
+        # The service stack loads during warm-up, never when the app is imported
+        assert eager == []
+        totals.append(total_ms)
+    assert statistics.median(totals) <= BUDGET_MS
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.llm_client import AsyncLLMClient, LLMRequestError
+from benchmarks.stubs import stub_intent
+
+MESSAGES = [{"role": "user", "content": "show my balance"}]
+
+
+def _client(server, **kwargs) -> AsyncLLMClient:
+    return AsyncLLMClient("test-key", server.url + "/v1", backoff_base=0.01, **kwargs)
+
+
+def _content(response) -> dict:
+    return json.loads(response["choices"][0]["message"]["content"])
+
+
+def test_retries_retryable_status(llm_server):
+    llm_server.fail_next = 1
+
+    async def scenario():
+        client = _client(llm_server)
+        try:
+            return await client.chat_completion(MESSAGES, "stub-model")
+        finally:
+            await client.close()
+
+    response = asyncio.run(scenario())
+    assert _content(response) == stub_intent("show my balance")
+    assert llm_server.requests == 2
+
+
+def test_gives_up_after_max_retries(llm_server):
+    llm_server.fail_next = 10
+
+    async def scenario():
+        client = _client(llm_server, max_retries=2)
+        try:
+            await client.chat_completion(MESSAGES, "stub-model")
+        finally:
+            await client.close()
+
+    with pytest.raises(LLMRequestError) as error:
+        asyncio.run(scenario())
+    assert error.value.status == 503
+    assert llm_server.requests == 3
+
+
+def test_identical_requests_share_one_upstream_call(llm_server):
+    llm_server.latency_ms = 100
+
+    async def scenario():
+        client = _client(llm_server)
+        try:
+            return await asyncio.gather(*(client.chat_completion(MESSAGES, "stub-model") for _ in range(10)))
+        finally:
+            await client.close()
+
+    responses = asyncio.run(scenario())
+    assert llm_server.requests == 1
+    assert all(response == responses[0] for response in responses)
+
+
+def test_different_requests_are_not_shared(llm_server):
+    llm_server.latency_ms = 50
+
+    async def scenario():
+        client = _client(llm_server)
+        try:
+            return await asyncio.gather(
+                client.chat_completion(MESSAGES, "stub-model"),
+                client.chat_completion([{"role": "user", "content": "show history"}], "stub-model")
+            )
+        finally:
+            await client.close()
+
+    balance, history = asyncio.run(scenario())
+    assert llm_server.requests == 2
+    assert _content(balance)["action"] == "balance"
+    assert _content(history)["action"] == "history"
+
+
+def test_stream_retries_before_first_delta(llm_server):
+    llm_server.fail_next = 1
+
+    async def scenario():
+        client = _client(llm_server)
+        try:
+            return "".join([delta async for delta in client.stream_chat_completion(MESSAGES, "stub-model")])
+        finally:
+            await client.close()
+
+    assert json.loads(asyncio.run(scenario())) == stub_intent("show my balance")
+    assert llm_server.requests == 2
@@ -0,0 +1,47 @@
+import asyncio
+
+from app.services.nonce_manager import NonceManager
+from app.services.provider_pool import ProviderPool
+
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+
+
+def _run(chain, scenario, **kwargs):
+    async def main():
+        pool = ProviderPool({"mainnet": [chain.url + "/"]})
+        try:
+            return await scenario(NonceManager(pool, **kwargs))
+        finally:
+            await pool.close()
+    return asyncio.run(main())
+
+
+def test_concurrent_reservations_get_disjoint_ranges(chain):
+    async def scenario(nonces):
+        return await asyncio.gather(*(nonces.reserve("mainnet", ALICE, 3) for _ in range(4)))
+
+    starts = _run(chain, scenario)
+    # The stub reports 7 transactions sent; the node is read once
+    assert sorted(starts) == [7, 10, 13, 16]
+    assert chain.requests == 1
+
+
+def test_forget_reads_the_node_again(chain):
+    async def scenario(nonces):
+        first = await nonces.reserve("mainnet", ALICE, 2)
+        nonces.forget("mainnet", ALICE)
+        return first, await nonces.reserve("mainnet", ALICE)
+
+    assert _run(chain, scenario) == (7, 7)
+    assert chain.requests == 2
+
+
+def test_idle_addresses_are_evicted_after_ttl(chain):
+    async def scenario(nonces):
+        await nonces.reserve("mainnet", ALICE)
+        await asyncio.sleep(0.1)
+        await nonces.reserve("mainnet", BOB)
+        return len(nonces)
+
+    assert _run(chain, scenario, ttl=0.05) == 1
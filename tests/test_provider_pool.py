@@ -0,0 +1,149 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from app.services.provider_pool import ProviderPool
+from app.services.rpc_client import RpcError
+from benchmarks.stubs import StubChainServer
+
+
+@contextmanager
+def stub_chains(*configs):
+    servers = [StubChainServer(**config).start() for config in configs]
+    try:
+        yield servers
+    finally:
+        for server in servers:
+            server.stop()
+
+
+def _run(servers, scenario, **kwargs):
+    async def main():
+        pool = ProviderPool({"mainnet": [server.url + "/" for server in servers]}, **kwargs)
+        try:
+            return await scenario(pool)
+        finally:
+            await pool.close()
+    return asyncio.run(main())
+
+
+def _endpoint_stats(pool, server):
+    return next(e for e in pool.stats()["mainnet"]["endpoints"] if e["endpoint"].endswith(f":{server.port}"))
+
+
+def test_fails_over_to_a_healthy_endpoint():
+    with stub_chains({"failure_rate": 1.0}, {}) as (dead, healthy):
+        async def scenario(pool):
+            return await pool["mainnet"].call("eth_chainId")
+
+        assert _run([dead, healthy], scenario) == "0x1"
+        assert dead.requests == 1
+        assert healthy.requests == 1
+
+
+def test_circuit_opens_after_repeated_failures():
+    with stub_chains({"failure_rate": 1.0}, {}) as (dead, healthy):
+        async def scenario(pool):
+            for _ in range(4):
+                await pool["mainnet"].call("eth_blockNumber")
+            return _endpoint_stats(pool, dead)
+
+        stats = _run([dead, healthy], scenario, failure_threshold=2, cooldown=30.0)
+        assert stats["circuit"] == "open"
+        # Once open, the dead endpoint is skipped
+        assert dead.requests == 2
+        assert healthy.requests == 4
+
+
+def test_all_endpoints_down_raises():
+    with stub_chains({"failure_rate": 1.0}, {"failure_rate": 1.0}) as servers:
+        async def scenario(pool):
+            await pool["mainnet"].call("eth_blockNumber")
+
+        with pytest.raises(RpcError):
+            _run(servers, scenario)
+
+
+def test_json_rpc_errors_pass_through_without_failover():
+    with stub_chains({}, {}) as (first, second):
+        async def scenario(pool):
+            with pytest.raises(RpcError) as error:
+                await pool["mainnet"].call("eth_unsupported")
+            return error.value, _endpoint_stats(pool, first)
+
+        error, stats = _run([first, second], scenario)
+        assert error.code == -32601
+        assert stats["failures"] == 0
+        assert first.requests + second.requests == 1
+
+
+def test_slow_endpoint_is_hedged():
+    with stub_chains({"latency_ms": 1000}, {}) as (slow, fast):
+        async def scenario(pool):
+            start = time.perf_counter()
+            result = await pool["mainnet"].call("eth_blockNumber")
+            return result, time.perf_counter() - start
+
+        result, elapsed = _run([slow, fast], scenario, hedge_delay=0.05)
+        assert int(result, 16) >= slow.block_number
+        assert elapsed < 0.5
+        assert fast.requests == 1
+
+
+def test_non_idempotent_calls_are_not_hedged():
+    with stub_chains({"latency_ms": 300}, {}) as (slow, fast):
+        async def scenario(pool):
+            # The stub rejects the method, which keeps the test free of side effects
+            with pytest.raises(RpcError):
+                await pool["mainnet"].call("eth_sendRawTransaction", ["0x00"])
+
+        _run([slow, fast], scenario, hedge_delay=0.05)
+        assert slow.requests == 1
+        assert fast.requests == 0
+
+
+def test_networks_resolve_by_chain_id():
+    with stub_chains({}) as servers:
+        async def scenario(pool):
+            return pool.resolve("0x1"), pool.resolve(1), await pool["1"].call("eth_chainId"), pool.get("sepolia")
+
+        assert _run(servers, scenario) == ("mainnet", "mainnet", "0x1", None)
+
+
+def test_health_check_disables_endpoint_on_wrong_chain():
+    with stub_chains({"chain_id": 5}, {}) as (wrong, right):
+        async def scenario(pool):
+            await pool.check()
+            stats = _endpoint_stats(pool, wrong)
+            before = wrong.requests
+            await pool["mainnet"].call("eth_blockNumber")
+            return stats, wrong.requests - before
+
+        stats, requests_after_check = _run([wrong, right], scenario)
+        assert stats["disabled"]
+        assert requests_after_check == 0
+
+
+class NullBlockChainServer(StubChainServer):
+    """A node answering eth_blockNumber with null"""
+
+    def _rpc_eth_blockNumber(self):
+        return None
+
+
+def test_health_check_fails_only_the_endpoint_with_a_malformed_reply():
+    broken = NullBlockChainServer().start()
+    try:
+        with stub_chains({}) as (healthy,):
+            async def scenario(pool):
+                await pool.check()
+                return _endpoint_stats(pool, broken), _endpoint_stats(pool, healthy)
+
+            broken_stats, healthy_stats = _run([broken, healthy], scenario)
+    finally:
+        broken.stop()
+    assert broken_stats["failures"] == 1
+    assert healthy_stats["failures"] == 0
+    assert not healthy_stats["disabled"]
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from app.services.provider_pool import ProviderPool
+from app.services.receipt_tracker import ReceiptTracker, TrackedTransaction
+from benchmarks.stubs import StubChainServer
+
+TX_A = "0x" + "aa" * 32
+TX_B = "0x" + "bb" * 32
+
+
+class MalformedBlockNumberServer(StubChainServer):
+    """A node whose block number replies are garbage until it is fixed"""
+    broken = True
+
+    def _rpc_eth_blockNumber(self):
+        return "garbage" if self.broken else super()._rpc_eth_blockNumber()
+
+
+def _run(chain, scenario, **kwargs):
+    async def main():
+        pool = ProviderPool({"mainnet": [chain.url + "/"]}, failure_threshold=100)
+        confirmed = []
+
+        async def on_receipt(tracked, confirmation):
+            confirmed.append(confirmation)
+
+        tracker = ReceiptTracker(pool, on_receipt, **kwargs)
+        try:
+            return await scenario(tracker, confirmed)
+        finally:
+            await asyncio.wait_for(tracker.stop(), timeout=2)
+            await pool.close()
+    return asyncio.run(main())
+
+
+async def _wait_for(condition, timeout: float = 3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.02)
+
+
+def test_poll_confirms_mined_transactions(chain):
+    chain.mine(TX_A)
+    chain.mine(TX_B, success=False, gas_used=50000)
+
+    async def scenario(tracker, confirmed):
+        for tx_hash in (TX_A, TX_B, "0x" + "cc" * 32):
+            tracker.track(TrackedTransaction(tx_hash, "mainnet", address="0x" + "11" * 20))
+        mined = await tracker.poll("mainnet")
+        return mined, len(tracker), confirmed
+
+    mined, still_pending, confirmed = _run(chain, scenario)
+    assert mined == 2
+    assert still_pending == 1
+    assert chain.requests == 1
+    by_hash = {confirmation.tx_hash: confirmation for confirmation in confirmed}
+    assert by_hash[TX_A].status == "confirmed"
+    assert by_hash[TX_A].gas_used == 21000
+    assert by_hash[TX_A].gas_price == (chain.base_fee + chain.priority_fee) / 10 ** 9
+    assert by_hash[TX_A].network == "mainnet"
+    assert by_hash[TX_B].status == "failed"
+    assert by_hash[TX_B].gas_used == 50000
+
+
+def test_large_polls_are_chunked(chain):
+    hashes = [f"0x{i:064x}" for i in range(5)]
+    for tx_hash in hashes:
+        chain.mine(tx_hash)
+
+    async def scenario(tracker, confirmed):
+        for tx_hash in hashes:
+            tracker.track(TrackedTransaction(tx_hash, "mainnet"))
+        return await tracker.poll("mainnet")
+
+    assert _run(chain, scenario, max_batch=2) == 5
+    assert chain.requests == 3
+
+
+def test_background_loop_confirms_transaction(chain):
+    async def scenario(tracker, confirmed):
+        tracker.start()
+        tracker.track(TrackedTransaction(TX_A, "mainnet"))
+        await asyncio.sleep(0.1)
+        chain.mine(TX_A)
+        await _wait_for(lambda: confirmed)
+        return confirmed, len(tracker)
+
+    confirmed, still_pending = _run(chain, scenario, block_time=0.1, min_interval=0.02, max_interval=0.2)
+    assert [confirmation.tx_hash for confirmation in confirmed] == [TX_A]
+    assert still_pending == 0
+
+
+def test_node_outage_backs_off_and_recovers(chain):
+    chain.failure_rate = 1.0
+
+    async def scenario(tracker, confirmed):
+        tracker.start()
+        tracker.track(TrackedTransaction(TX_A, "mainnet"))
+        await asyncio.sleep(0.3)
+        pending_during_outage = len(tracker)
+        chain.failure_rate = 0.0
+        chain.mine(TX_A)
+        await _wait_for(lambda: confirmed)
+        return pending_during_outage
+
+    assert _run(chain, scenario, block_time=0.05, min_interval=0.02, max_interval=0.2) == 1
+
+
+def test_malformed_reply_does_not_stop_the_loop():
+    chain = MalformedBlockNumberServer().start()
+    try:
+        async def scenario(tracker, confirmed):
+            tracker.start()
+            tracker.track(TrackedTransaction(TX_A, "mainnet"))
+            await asyncio.sleep(0.3)
+            alive = not tracker._task.done()
+            chain.broken = False
+            chain.mine(TX_A)
+            await _wait_for(lambda: confirmed)
+            return alive
+
+        assert _run(chain, scenario, block_time=0.05, min_interval=0.02, max_interval=0.2)
+    finally:
+        chain.stop()
+
+
+def test_track_requires_a_configured_network(chain):
+    async def scenario(tracker, confirmed):
+        tracker.track(TrackedTransaction(TX_A, "sepolia"))
+
+    with pytest.raises(ValueError, match="No node configured"):
+        _run(chain, scenario)
@@ -0,0 +1,40 @@
+import time
+
+from app.models.schemas import WalletState
+from app.services.session_store import TieredSessionStore
+
+
+def _state(i):
+    return WalletState(address=f"0x{i:040x}", balance={"ETH": 1.0})
+
+
+def test_hibernated_sessions_are_not_counted_as_active(tmp_path):
+    store = TieredSessionStore(tmp_path / "cold.db", timeout=0.05)
+    try:
+        for i in range(3):
+            store.put(f"s{i}", _state(i))
+        assert len(store) == 3
+
+        time.sleep(0.1)
+        store.expire()
+        assert len(store) == 0
+        assert store.stats()["cold"] == 3
+
+        # A returning session is active again
+        assert store.get("s0") is not None
+        assert len(store) == 1
+    finally:
+        store.close()
+
+
+def test_sessions_spilled_for_memory_stay_active(tmp_path):
+    store = TieredSessionStore(tmp_path / "cold.db", timeout=3600, memory_budget=1)
+    try:
+        for i in range(3):
+            store.put(f"s{i}", _state(i))
+        stats = store.stats()
+        assert stats["hot"] == 1
+        assert stats["cold"] == 2
+        assert len(store) == 3
+    finally:
+        store.close()
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.core.config import settings
+from app.services.provider_pool import ProviderPool
+from app.services.token_registry import TokenRegistry
+from app.services.transfer_gas import TransferGasEstimator
+from benchmarks.stubs import StubChainServer
+
+SENDER = "0x" + "11" * 20
+WALLET = "0x" + "22" * 20
+CONTRACT = "0x" + "33" * 20
+
+
+class ContractChainServer(StubChainServer):
+    """A node where CONTRACT holds code whose receive function costs gas"""
+
+    def _rpc_eth_getCode(self, address, block="latest"):
+        return "0x6080" if address.lower() == CONTRACT else "0x"
+
+    def _rpc_eth_estimateGas(self, tx, block="latest"):
+        if tx.get("to", "").lower() == CONTRACT:
+            return hex(45000)
+        return super()._rpc_eth_estimateGas(tx, block)
+
+
+def _run(chain, scenario):
+    async def main():
+        pool = ProviderPool({"mainnet": [chain.url + "/"]})
+        estimator = TransferGasEstimator(pool, contract_headroom=40000)
+        eth = TokenRegistry.load(settings.TOKEN_REGISTRY_FILE).native("mainnet")
+        try:
+            return await scenario(estimator, eth)
+        finally:
+            await estimator.close()
+            await pool.close()
+    return asyncio.run(main())
+
+
+def test_unknown_recipient_gets_contract_headroom():
+    chain = ContractChainServer().start()
+    try:
+        async def scenario(estimator, eth):
+            first = estimator.gas_limit(eth, SENDER, CONTRACT)
+            await asyncio.gather(*estimator._tasks)
+            return first, estimator.gas_limit(eth, SENDER, CONTRACT)
+
+        first, estimated = _run(chain, scenario)
+    finally:
+        chain.stop()
+    assert first == 21000 + 40000
+    assert estimated == int(45000 * 1.2)
+
+
+def test_known_wallet_is_estimated_without_headroom():
+    chain = ContractChainServer().start()
+    try:
+        async def scenario(estimator, eth):
+            await estimator.refresh(eth, SENDER, WALLET)
+            return estimator.recipient_type("mainnet", WALLET), estimator.gas_limit(eth, SENDER, WALLET)
+
+        recipient_type, gas = _run(chain, scenario)
+    finally:
+        chain.stop()
+    assert recipient_type == "eoa"
+    assert gas == int(21000 * 1.2)
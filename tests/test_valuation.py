@@ -0,0 +1,43 @@
+import asyncio
+
+from app.services.price_feed import PriceCache, StaticPriceSource
+from app.services.valuation import HoldingsIndex, ValuationEngine
+
+PRICES = {"ETH": 2500.0, "USDC": 1.0}
+
+
+def _engine(**kwargs):
+    prices = PriceCache(StaticPriceSource(PRICES), **kwargs)
+    asyncio.run(prices.refresh())
+    return ValuationEngine(prices)
+
+
+def test_mainnet_assets_are_priced():
+    report = _engine().value({"ETH": 2.0, "USDC": 10.0, "PEPE": 1.0}, "mainnet")
+    assert report["valuesUSD"] == {"ETH": 5000.0, "USDC": 10.0}
+    assert report["totalValueUSD"] == 5010.0
+    assert report["unpriced"] == ["PEPE"]
+
+
+def test_testnet_assets_are_unpriced():
+    report = _engine().value({"ETH": 2.0, "USDC": 10.0}, "sepolia")
+    assert report["valuesUSD"] == {}
+    assert report["totalValueUSD"] is None
+    assert report["unpriced"] == ["ETH", "USDC"]
+
+
+def test_prices_apply_to_configured_networks():
+    report = _engine(networks=["mainnet", "arbitrum"]).value({"ETH": 1.0}, "arbitrum")
+    assert report["totalValueUSD"] == 2500.0
+
+
+def test_exposure_keeps_networks_apart():
+    index = HoldingsIndex()
+    index.update("a", "0x" + "aa" * 20, "mainnet", {"ETH": 1.0})
+    index.update("b", "0x" + "bb" * 20, "sepolia", {"ETH": 100.0})
+
+    report = _engine().exposure(index)
+    assert report["totalValueUSD"] == 2500.0
+    assert report["networks"] == {"mainnet": 2500.0}
+    assert report["assets"]["mainnet"]["ETH"] == {"amount": 1.0, "priceUSD": 2500.0, "valueUSD": 2500.0}
+    assert report["assets"]["sepolia"]["ETH"] == {"amount": 100.0, "priceUSD": None, "valueUSD": None}